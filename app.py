@@ -7,18 +7,33 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QFont
 
-from ui.settings_page import SettingsPage
-from ui.about_page import AboutPage
-from ui.home_page import MainTransferPage
 from utils.utils import load_stylesheet
 
-STYLES = load_stylesheet("./styles/styles.qss")
+def _transfer_page():
+    from ui.home_page import MainTransferPage
+    return MainTransferPage()
+
+def _jobs_page():
+    from ui.jobs_page import JobsPage
+    return JobsPage()
+
+def _settings_page():
+    from ui.settings_page import SettingsPage
+    return SettingsPage()
+
+def _about_page():
+    from ui.about_page import AboutPage
+    return AboutPage()
 
 class FileMoverApp(QMainWindow):
+    # Pages, in sidebar order; each is imported and built the first time it is shown
+    PAGES = [_transfer_page, _jobs_page, _settings_page, _about_page]
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("FilePorta")
         self.setMinimumSize(900, 600)
+        self.pages = {}
         
         # Initialize logging
         logging.basicConfig(
@@ -28,7 +43,7 @@ class FileMoverApp(QMainWindow):
         )
         
         self.setup_ui()
-        self.setStyleSheet(STYLES)
+        self.setStyleSheet(load_stylesheet())
         
     def setup_ui(self):
         # Create main widget and layout
@@ -63,26 +78,30 @@ class FileMoverApp(QMainWindow):
         self.transfer_btn.setChecked(True)
         self.transfer_btn.clicked.connect(lambda: self.show_page(0))
         
+        self.jobs_btn = QPushButton("Transfer Queue")
+        self.jobs_btn.setObjectName("sidebarButton")
+        self.jobs_btn.setCheckable(True)
+        self.jobs_btn.clicked.connect(lambda: self.show_page(1))
+        
         self.settings_btn = QPushButton("Settings")
         self.settings_btn.setObjectName("sidebarButton")
         self.settings_btn.setCheckable(True)
-        self.settings_btn.clicked.connect(lambda: self.show_page(1))
+        self.settings_btn.clicked.connect(lambda: self.show_page(2))
         
         self.about_btn = QPushButton("About")
         self.about_btn.setObjectName("sidebarButton")
         self.about_btn.setCheckable(True)
-        self.about_btn.clicked.connect(lambda: self.show_page(2))
+        self.about_btn.clicked.connect(lambda: self.show_page(3))
         
         sidebar_layout.addWidget(self.transfer_btn)
+        sidebar_layout.addWidget(self.jobs_btn)
         sidebar_layout.addWidget(self.settings_btn)
         sidebar_layout.addWidget(self.about_btn)
         sidebar_layout.addStretch()
         
         # Create stacked widget for different pages
         self.stacked_widget = QStackedWidget()
-        self.stacked_widget.addWidget(MainTransferPage())
-        self.stacked_widget.addWidget(SettingsPage())
-        self.stacked_widget.addWidget(AboutPage())
+        self.page(0)
         
         # Add sidebar and stacked widget to main layout
         main_layout.addWidget(sidebar)
@@ -90,19 +109,28 @@ class FileMoverApp(QMainWindow):
     
     def show_page(self, index: int):
         # Update button states
-        for btn in [self.transfer_btn, self.settings_btn, self.about_btn]:
+        for btn in [self.transfer_btn, self.jobs_btn, self.settings_btn, self.about_btn]:
             btn.setChecked(False)
             
         # Check the appropriate button
         if index == 0:
             self.transfer_btn.setChecked(True)
         elif index == 1:
+            self.jobs_btn.setChecked(True)
+        elif index == 2:
             self.settings_btn.setChecked(True)
         else:
             self.about_btn.setChecked(True)
         
         # Show the selected page
-        self.stacked_widget.setCurrentIndex(index)
+        self.stacked_widget.setCurrentWidget(self.page(index))
+    
+    def page(self, index: int) -> QWidget:
+        """The page at a sidebar index, built on first use"""
+        if index not in self.pages:
+            self.pages[index] = self.PAGES[index]()
+            self.stacked_widget.addWidget(self.pages[index])
+        return self.pages[index]
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,92 @@
+"""
+Benchmark: small files copied one by one vs through tar streams.
+
+Builds a tree of --files files of 0-4 KiB (node_modules-like: --per-dir files
+per directory), then copies it with:
+
+  - shutil.copy2, file by file on one thread (the baseline)
+  - TransferEngine, per-file path
+  - TransferEngine with aggregate_below, once per available compression
+
+and checks that every copy has the source's content, mode and mtime.
+
+Usage:
+    python -m benchmarks.bench_aggregation [--files 100000] [--per-dir 200] [--dir PATH]
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from utils.aggregator import zstandard
+from utils.transfer_engine import TransferEngine
+
+THRESHOLD = 64 * 1024
+
+
+def build_tree(root: str, files: int, per_dir: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    payload = os.urandom(4096)
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i // per_dir:05d}")
+        if i % per_dir == 0:
+            os.makedirs(directory)
+        with open(os.path.join(directory, f"f{i:06d}.js"), 'wb') as f:
+            f.write(payload[:rng.randint(0, 4096)])
+
+
+def copy2_tree(source_dir: str, dest_dir: str) -> None:
+    for root, dirs, files in os.walk(source_dir):
+        target = os.path.join(dest_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            shutil.copy2(os.path.join(root, name), os.path.join(target, name))
+
+
+def check_copy(source_dir: str, dest_dir: str) -> None:
+    for root, dirs, files in os.walk(source_dir):
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(dest_dir, os.path.relpath(src, source_dir))
+            src_stat, dst_stat = os.stat(src), os.stat(dst)
+            if (src_stat.st_size, src_stat.st_mode, src_stat.st_mtime_ns) != \
+                    (dst_stat.st_size, dst_stat.st_mode, dst_stat.st_mtime_ns):
+                raise SystemExit(f"{dst} differs from {src}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100_000, help="Number of small files")
+    parser.add_argument("--per-dir", type=int, default=200, help="Files per directory")
+    parser.add_argument("--dir", default=None, help="Where to create the tree (defaults to the temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source_dir = os.path.join(tmp, "source")
+        start = time.perf_counter()
+        build_tree(source_dir, args.files, args.per_dir)
+        print(f"Built {args.files} files in {time.perf_counter() - start:.1f}s")
+
+        runs = {
+            "shutil.copy2": lambda dst: copy2_tree(source_dir, dst),
+            "engine, per file": lambda dst: TransferEngine(source_dir, dst, set()).run(),
+        }
+        for compression in ('none', 'gzip') + (('zstd',) if zstandard is not None else ()):
+            runs[f"engine, tar ({compression})"] = lambda dst, compression=compression: TransferEngine(
+                source_dir, dst, set(), aggregate_below=THRESHOLD, aggregate_compression=compression
+            ).run()
+
+        for i, (name, run) in enumerate(runs.items()):
+            dest_dir = os.path.join(tmp, f"dest{i}")
+            start = time.perf_counter()
+            run(dest_dir)
+            elapsed = time.perf_counter() - start
+            check_copy(source_dir, dest_dir)
+            print(f"{name:>20}: {elapsed:7.2f}s ({args.files / elapsed:,.0f} files/s)")
+            shutil.rmtree(dest_dir)
+
+
+if __name__ == "__main__":
+    main()
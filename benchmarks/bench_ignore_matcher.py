@@ -0,0 +1,124 @@
+"""
+Micro-benchmark: compiled IgnoreMatcher vs the per-component fnmatch loop.
+
+Builds a synthetic tree on disk (the legacy implementation calls
+os.path.isdir), checks both implementations agree on every path and prints
+the time each one takes.
+
+Usage:
+    python -m benchmarks.bench_ignore_matcher [--dirs 200] [--files 50]
+"""
+import os
+import time
+import fnmatch
+import argparse
+import tempfile
+from typing import List, Set, Tuple
+
+from utils.ignore_matcher import IgnoreMatcher
+
+PATTERNS = [
+    "node_modules/", ".git/", "env/", ".next/", "__pycache__", "*.pyc", "*.tmp",
+    "*.log", "dist/", "build/", ".venv/", "*.egg-info", ".idea/", ".vscode/",
+    "coverage/", ".mypy_cache/", ".pytest_cache/", "*.o", "*.so", "target/",
+    ".DS_Store", "Thumbs.db", "*.swp", "*.bak", "vendor/", "tmp/", "*.class",
+    "out/", "logs/*", "cache-?/", "[Bb]in/",
+]
+NAMES = ["src", "lib", "node_modules", "docs", ".git", "build", "cache-1", "Bin", "pkg", "tests"]
+EXTENSIONS = [".py", ".pyc", ".js", ".log", ".txt", ".tmp", ".md", ".so"]
+
+
+def process_patterns(patterns: List[str]) -> Set[str]:
+    """Same normalisation FileTransferWorker._process_patterns applies"""
+    processed = set()
+    for pattern in patterns:
+        pattern = pattern.strip()
+        if pattern and not pattern.startswith('#'):
+            if pattern.endswith('/'):
+                pattern = pattern[:-1]
+            if not pattern.endswith('/*'):
+                processed.add(pattern)
+                processed.add(f"{pattern}/*")
+            else:
+                processed.add(pattern)
+    return processed
+
+
+def legacy_should_ignore(path: str, source_dir: str, ignore_patterns: Set[str]) -> bool:
+    """The original FileTransferWorker.should_ignore"""
+    rel_path = os.path.relpath(path, source_dir)
+    rel_path = rel_path.replace(os.sep, '/')
+
+    path_parts = rel_path.split('/')
+    current_path = ""
+
+    for part in path_parts:
+        if current_path:
+            current_path += '/'
+        current_path += part
+
+        for pattern in ignore_patterns:
+            if fnmatch.fnmatch(part, pattern):
+                return True
+            if fnmatch.fnmatch(current_path, pattern):
+                return True
+            if fnmatch.fnmatch(current_path + '/*', pattern):
+                return True
+            if os.path.isdir(os.path.join(source_dir, current_path)):
+                if fnmatch.fnmatch(current_path + '/', pattern):
+                    return True
+
+    return False
+
+
+def build_tree(root: str, n_dirs: int, n_files: int) -> List[Tuple[str, bool]]:
+    """Create a nested synthetic tree and return (path, is_dir) for every entry"""
+    entries = []
+    dirs = [root]
+    for i in range(n_dirs):
+        parent = dirs[i // 3]
+        path = os.path.join(parent, f"{NAMES[i % len(NAMES)]}{i // len(NAMES) or ''}")
+        os.makedirs(path, exist_ok=True)
+        dirs.append(path)
+        entries.append((path, True))
+        for j in range(n_files):
+            file_path = os.path.join(path, f"file{j}{EXTENSIONS[j % len(EXTENSIONS)]}")
+            open(file_path, 'w').close()
+            entries.append((file_path, False))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dirs", type=int, default=200, help="Number of directories to create")
+    parser.add_argument("--files", type=int, default=50, help="Files per directory")
+    args = parser.parse_args()
+
+    processed = process_patterns(PATTERNS)
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        entries = build_tree(source_dir, args.dirs, args.files)
+        print(f"{len(entries)} paths, {len(processed)} processed patterns")
+
+        start = time.perf_counter()
+        legacy = [legacy_should_ignore(path, source_dir, processed) for path, _ in entries]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher = IgnoreMatcher(processed)
+        compiled = [
+            matcher.matches(os.path.relpath(path, source_dir).replace(os.sep, '/'), is_dir)
+            for path, is_dir in entries
+        ]
+        compiled_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"ignored: {sum(compiled)}, mismatches: {mismatches}")
+    print(f"fnmatch loop : {legacy_time:8.3f}s")
+    print(f"IgnoreMatcher: {compiled_time:8.3f}s ({legacy_time / compiled_time:.1f}x faster)")
+    if mismatches:
+        raise SystemExit("IgnoreMatcher verdicts differ from the fnmatch loop")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: memory held by scanned items, List[BatchItem] vs ItemStore.
+
+Generates the items a scan of a deep tree would yield (no files are
+created), stores them both ways and reports the memory each holds, measured
+with tracemalloc, plus the time to build and to iterate the store.
+
+Usage:
+    python -m benchmarks.bench_item_store [--files 1000000] [--per-dir 20] [--depth 6]
+"""
+import os
+import time
+import argparse
+import tracemalloc
+from typing import Iterator
+
+from constants.constants import BatchItem
+from utils.item_store import ItemStore
+
+SOURCE = "/home/user/projects/workspace/monorepo"
+DEST = "/media/user/backup-drive/monorepo"
+NAMES = ["index.js", "package.json", "README.md", "main.py", "utils.py", "style.css",
+         "logo.png", "LICENSE", "test_api.py", "config.yaml"]
+
+
+def generate(files: int, per_dir: int, depth: int) -> Iterator[BatchItem]:
+    """Items in scan order: each directory, then its files"""
+    made = 0
+    directory = 0
+    while made < files:
+        parts = [f"pkg{(directory // 10 ** level) % 10}" for level in range(depth)]
+        rel = os.path.join(*parts, f"mod{directory}")
+        src_dir, dst_dir = os.path.join(SOURCE, rel), os.path.join(DEST, rel)
+        yield BatchItem(src_dir, dst_dir, True)
+        for i in range(min(per_dir, files - made)):
+            name = NAMES[i % len(NAMES)] if i < len(NAMES) else f"file{i}.txt"
+            yield BatchItem(os.path.join(src_dir, name), os.path.join(dst_dir, name), False,
+                            1000 + i, 1_700_000_000_000_000_000 + i)
+        made += per_dir
+        directory += 1
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = build()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    count = sum(1 for _ in store)
+    iterate = time.perf_counter() - start
+    return store, held, elapsed, iterate, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=1_000_000, help="Number of file items")
+    parser.add_argument("--per-dir", type=int, default=20, help="Files per directory")
+    parser.add_argument("--depth", type=int, default=6, help="Directory levels above each file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, build in (
+        ("List[BatchItem]", lambda: list(generate(args.files, args.per_dir, args.depth))),
+        ("ItemStore", lambda: ItemStore(generate(args.files, args.per_dir, args.depth))),
+    ):
+        store, held, elapsed, iterate, count = measure(build)
+        results[name] = store
+        print(f"{name:>16}: {count:>9} items  {held / 2**20:8.1f} MiB  "
+              f"{held / count:6.1f} B/item  build {elapsed:5.2f}s  iterate {iterate:5.2f}s")
+        del store
+
+    legacy, compact = results.values()
+    print("Same items:", all(a == b for a, b in zip(legacy, compact)) and len(legacy) == len(compact))
+
+
+if __name__ == "__main__":
+    main()
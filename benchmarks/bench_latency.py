@@ -0,0 +1,88 @@
+"""
+Benchmark: transfer threads on a high-latency destination.
+
+Copies a tree of small files to a destination that stands in for a network
+share: opening a file, setting its metadata and renaming it into place each
+cost --latency-ms under the destination directory, as a round trip to an
+SMB/NFS server would. Local disk speed hardly matters then; what counts is
+how many transfers are waiting on the "server" at once.
+
+Runs the engine with its default workers and with --workers workers, which
+is what the "Network share" preset raises.
+
+Usage:
+    python -m benchmarks.bench_latency [--files 2000] [--latency-ms 20] [--workers 128]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import functools
+
+import utils.copy_engine
+from utils.transfer_engine import TransferEngine
+
+
+def add_latency(dest_dir: str, delay: float):
+    """Make destination opens, metadata updates and renames wait ``delay`` seconds"""
+    def slow(fn, path_arg):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if os.fspath(args[path_arg]).startswith(dest_dir):
+                time.sleep(delay)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    # The copy engine opens files through its module's open(), so shadow it there
+    utils.copy_engine.open = slow(open, 0)
+    shutil.copystat = slow(shutil.copystat, 1)
+    os.replace = slow(os.replace, 1)
+
+
+def build_tree(root: str, files: int, per_dir: int = 100) -> None:
+    for i in range(files):
+        directory = os.path.join(root, f"d{i // per_dir:04d}")
+        if i % per_dir == 0:
+            os.makedirs(directory)
+        with open(os.path.join(directory, f"f{i:06d}.txt"), 'wb') as f:
+            f.write(b"x" * (i % 4096))
+
+
+def run_engine(engine: TransferEngine) -> float:
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+    if engine.processed_count != engine.total_items or engine.failed_count:
+        raise SystemExit(f"{type(engine).__name__} transferred {engine.processed_count}/{engine.total_items} files")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000, help="Number of small files")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Delay per destination operation")
+    parser.add_argument("--workers", type=int, default=128, help="Threads for the wide run")
+    parser.add_argument("--dir", default=None, help="Where to create the tree (defaults to the temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source_dir = os.path.join(tmp, "source")
+        build_tree(source_dir, args.files)
+        dest_root = os.path.join(tmp, "dest")
+        add_latency(dest_root, args.latency_ms / 1000)
+        print(f"{args.files} files, {args.latency_ms:g} ms per destination operation")
+
+        runs = {
+            f"threads x{TransferEngine.MAX_WORKERS}": lambda dst: TransferEngine(source_dir, dst, set()),
+            f"threads x{args.workers}": lambda dst: TransferEngine(
+                source_dir, dst, set(), max_workers=args.workers
+            ),
+        }
+        for i, (name, make_engine) in enumerate(runs.items()):
+            elapsed = run_engine(make_engine(os.path.join(dest_root, str(i))))
+            print(f"{name:>16}: {elapsed:7.2f}s ({args.files / elapsed:,.0f} files/s)")
+
+
+if __name__ == "__main__":
+    main()
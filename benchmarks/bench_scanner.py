@@ -0,0 +1,140 @@
+"""
+Benchmark: os.walk + os.stat scan vs the parallel os.scandir scanner.
+
+Builds a synthetic tree with --entries files and directories (about one
+directory per --fanout files, nested up to --depth levels, a share of it
+under ignored node_modules directories), then scans it both ways with the
+same ignore patterns and checks that they yield the same items.
+
+--latency-ms adds a delay to every directory listing, standing in for a
+network share or a slow USB drive; both scanners list through os.scandir,
+so both pay it.
+
+Usage:
+    python -m benchmarks.bench_scanner [--entries 1000000] [--fanout 50] [--depth 5]
+                                       [--workers 8] [--latency-ms 0] [--dir PATH]
+"""
+import os
+import time
+import argparse
+import tempfile
+from typing import Iterator
+
+from constants.constants import BatchItem
+from utils.ignore_matcher import IgnoreMatcher
+from utils.scanner import DirectoryScanner
+
+PATTERNS = {"node_modules", "node_modules/*", "*.pyc", "*.pyc/*"}
+
+
+def legacy_scan(source_dir: str, dest_dir: str, matcher: IgnoreMatcher, max_depth: int) -> Iterator[BatchItem]:
+    """The scan loop FilePorta used before DirectoryScanner"""
+    base_depth = source_dir.rstrip(os.path.sep).count(os.path.sep)
+    for root, dirs, files in os.walk(source_dir):
+        current_depth = root.count(os.path.sep) - base_depth
+        if current_depth >= max_depth:
+            dirs[:] = []
+            continue
+        rel_root = os.path.relpath(root, source_dir).replace(os.sep, '/')
+        if matcher.matches(rel_root, True):
+            dirs[:] = []
+            continue
+        rel_prefix = '' if rel_root == '.' else rel_root + '/'
+        kept_dirs = [d for d in dirs if not matcher.matches(rel_prefix + d, True)]
+        kept_files = [f for f in files if not matcher.matches(rel_prefix + f, False)]
+        dirs[:] = kept_dirs
+        dest_root = dest_dir if rel_root == '.' else os.path.join(dest_dir, rel_root)
+        yield BatchItem(root, dest_root, True)
+        for file in kept_files:
+            src_file = os.path.join(root, file)
+            stat = os.stat(src_file)
+            yield BatchItem(src_file, os.path.join(dest_root, file), False, stat.st_size, stat.st_mtime_ns)
+
+
+def build_tree(root: str, entries: int, fanout: int, depth: int) -> int:
+    """Create about ``entries`` files and directories under root; returns how many were made"""
+    made = 0
+    frontier = [(root, 0)]
+    while made < entries:
+        next_frontier = []
+        for path, level in frontier:
+            for i in range(fanout):
+                if made >= entries:
+                    return made
+                name = f"f{i}.pyc" if i % 10 == 9 else f"f{i}.txt"
+                with open(os.path.join(path, name), "w") as f:
+                    f.write("x" * (i % 7))
+                made += 1
+            if level + 1 >= depth:
+                continue
+            for i in range(max(2, fanout // 10)):
+                if made >= entries:
+                    return made
+                sub = os.path.join(path, "node_modules" if i == 0 and level else f"d{i}")
+                os.mkdir(sub)
+                made += 1
+                next_frontier.append((sub, level + 1))
+        if not next_frontier:
+            # Tree is as deep as allowed; widen it with another top-level directory
+            sub = os.path.join(root, f"top{made}")
+            os.mkdir(sub)
+            made += 1
+            next_frontier.append((sub, 1))
+        frontier = next_frontier
+    return made
+
+
+def slow_scandir(delay: float):
+    scandir = os.scandir
+
+    def wrapper(*args, **kwargs):
+        time.sleep(delay)
+        return scandir(*args, **kwargs)
+    return wrapper
+
+
+def key(item: BatchItem):
+    return item.src, item.dst, item.is_directory, item.size, item.mtime_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000, help="Files and directories to create")
+    parser.add_argument("--fanout", type=int, default=50, help="Files per directory")
+    parser.add_argument("--depth", type=int, default=5, help="Deepest directory level, also the scan max_depth")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for the parallel scanner")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to each directory listing")
+    parser.add_argument("--dir", default=None, help="Where to create the tree (defaults to the temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source_dir = os.path.join(tmp, "source")
+        os.mkdir(source_dir)
+        start = time.perf_counter()
+        made = build_tree(source_dir, args.entries, args.fanout, args.depth)
+        print(f"Built {made} entries in {time.perf_counter() - start:.1f}s")
+
+        if args.latency_ms:
+            os.scandir = slow_scandir(args.latency_ms / 1000)
+
+        dest_dir = os.path.join(tmp, "dest")
+        results = {}
+        runs = {
+            "os.walk + os.stat": lambda: legacy_scan(source_dir, dest_dir, IgnoreMatcher(PATTERNS), args.depth),
+            f"scandir x{args.workers}": lambda: DirectoryScanner(
+                source_dir, dest_dir, IgnoreMatcher(PATTERNS), args.workers, args.depth
+            ).scan(),
+        }
+        for name, scan in runs.items():
+            start = time.perf_counter()
+            items = [key(item) for item in scan()]
+            elapsed = time.perf_counter() - start
+            results[name] = items
+            print(f"{name:>20}: {len(items):>8} items in {elapsed:7.2f}s ({len(items) / elapsed:,.0f} items/s)")
+
+        legacy, parallel = results.values()
+        print("Same items, same order:", legacy == parallel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: GUI startup, import time and time to first paint.
+
+Runs the app in fresh interpreters, --runs times each:
+
+  - python -X importtime -c "import app": total import time of the app
+    module, the slowest imports, and whether the transfer stack (engine,
+    thread pools) was pulled in before it is needed
+  - time from starting the interpreter to the main window's first paint
+    (Qt's offscreen platform is used when there is no display)
+
+and reports the medians. With --max-ms it exits non-zero when the median
+time to first paint is above the limit, so it can guard against regressions.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--top 10] [--max-ms MS]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules the first window can do without
+DEFERRED = ["utils.transfer_engine", "utils.file_transfer_worker", "utils.job_manager",
+            "concurrent.futures.thread"]
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times() -> Dict[str, tuple]:
+    """(self, cumulative) microseconds of each module imported by 'import app'"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def first_paint_ms() -> float:
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY") and sys.platform.startswith("linux"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                             cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    line = child.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1000
+    child.wait()
+    if line.strip() != "painted":
+        raise SystemExit("The app exited before painting its window")
+    return elapsed
+
+
+def run_child():
+    """Start the app as app.main does and quit on the main window's first paint"""
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    from PyQt6.QtGui import QFont
+    from PyQt6.QtWidgets import QApplication
+
+    import app
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and not self.painted:
+                self.painted = True
+                print("painted", flush=True)
+                QTimer.singleShot(0, qt_app.quit)
+            return False
+
+    qt_app = QApplication(sys.argv[:1])
+    qt_app.setFont(QFont("Segoe UI", 10))
+    window = app.FileMoverApp()
+    watcher = FirstPaint()
+    watcher.painted = False
+    window.installEventFilter(watcher)
+    window.show()
+    QTimer.singleShot(30_000, qt_app.quit)  # Never hang if nothing gets painted
+    qt_app.exec()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Interpreters started for each measurement")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median time to first paint is above this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    runs = [import_times() for _ in range(args.runs)]
+    totals = [times["app"][1] / 1000 for times in runs]
+    print(f"import app: {statistics.median(totals):.1f} ms (median of {args.runs})")
+    print("Slowest imports (self time, last run):")
+    for name, (self_us, cumulative_us) in sorted(runs[-1].items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:7.1f} ms  {name}")
+    eager = [name for name in DEFERRED if name in runs[-1]]
+    print(f"Imported before first use: {', '.join(eager) if eager else 'none'}")
+
+    paints = [first_paint_ms() for _ in range(args.runs)]
+    median = statistics.median(paints)
+    print(f"First paint: {median:.0f} ms (median of {args.runs}, min {min(paints):.0f} ms)")
+    if args.max_ms is not None and median > args.max_ms:
+        raise SystemExit(f"First paint took {median:.0f} ms, over the {args.max_ms:.0f} ms limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark: the whole transfer engine on synthetic trees, tracked across commits.
+
+For each scenario a reproducible tree is generated (see synthetic_tree),
+then copied --runs times by TransferEngine, without Qt, each run in a fresh
+process so its peak RSS is its own. Every run also times a scan on its own.
+Reported per scenario, as the median of the runs:
+
+  - scan_seconds: a full DirectoryScanner walk with the ignore patterns
+  - ignore_seconds: time spent matching ignore patterns during the transfer
+  - transfer_seconds, files_per_second, bytes_per_second: the copy itself
+  - peak_rss_bytes: the child process's peak resident memory
+
+--output writes the results as JSON. --compare reads an earlier results
+file and exits non-zero if any metric got worse by more than --threshold
+percent, so a change to the scanner, ignore matching or batching can be
+checked against the commit before it. Only compare results taken on the
+same machine, and raise --runs where timings are noisy; timings under
+MIN_SECONDS are not compared at all.
+
+Usage:
+    python -m benchmarks.bench_suite [--scenario NAME ...] [--scale 1.0] [--runs 3]
+                                     [--output results.json] [--compare baseline.json]
+                                     [--threshold 10] [--dir PATH]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from dataclasses import replace
+
+from benchmarks.synthetic_tree import IGNORE_PATTERNS, TreeSpec, build_tree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'small-files': TreeSpec(files=20_000, sizes='small', depth=4, fanout=8, files_per_dir=50, ignored=0.1),
+    'mixed': TreeSpec(files=5_000, sizes='mixed', depth=5, fanout=6, files_per_dir=40, ignored=0.1),
+    'deep-narrow': TreeSpec(files=10_000, sizes='small', depth=12, fanout=2, files_per_dir=5, ignored=0.1),
+    'mostly-ignored': TreeSpec(files=20_000, sizes='small', depth=4, fanout=8, files_per_dir=50, ignored=0.8),
+    'large-files': TreeSpec(files=24, sizes='large', depth=1, fanout=2, files_per_dir=8, ignored=0.0),
+}
+
+# Whether a bigger value of a metric is better; used to decide what counts as a regression
+METRICS = {
+    'scan_seconds': False,
+    'ignore_seconds': False,
+    'transfer_seconds': False,
+    'files_per_second': True,
+    'bytes_per_second': True,
+    'peak_rss_bytes': False,
+}
+MIN_SECONDS = 0.05  # Timings shorter than this are mostly noise and are not compared
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+
+def run_child(source_dir: str, dest_dir: str, max_depth: int):
+    """One measured run, printed as a JSON line for the parent"""
+    from utils.transfer_engine import TransferEngine
+
+    scanner = TransferEngine(source_dir, dest_dir, IGNORE_PATTERNS, max_depth=max_depth)
+    start = time.perf_counter()
+    for _ in scanner.iter_scan():
+        pass
+    scan_seconds = time.perf_counter() - start
+
+    transfer = TransferEngine(source_dir, dest_dir, IGNORE_PATTERNS, max_depth=max_depth)
+    transfer.time_ignores = True  # Only on by default with a metrics file, as it slows the scan a little
+    start = time.perf_counter()
+    transfer.run()
+    transfer_seconds = time.perf_counter() - start
+    summary = transfer.metrics.summary()
+    print(json.dumps({
+        'files': transfer.processed_count,
+        'failed': transfer.failed_count,
+        'scan_seconds': scan_seconds,
+        'ignore_seconds': summary['ignore_matching']['seconds'],
+        'transfer_seconds': transfer_seconds,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }))
+
+
+def run_scenario(spec: TreeSpec, runs: int, tmp: str) -> dict:
+    source_dir = os.path.join(tmp, "source")
+    start = time.perf_counter()
+    stats = build_tree(source_dir, spec)
+    print(f"  built {stats.files} files ({stats.bytes / 2**20:.0f} MiB) in {time.perf_counter() - start:.1f}s")
+
+    measured = []
+    for _ in range(runs):
+        dest_dir = os.path.join(tmp, "dest")
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_suite", "--child", source_dir, dest_dir,
+             "--max-depth", str(spec.depth + 2)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        if run['failed'] or run['files'] != stats.transferred_files:
+            raise SystemExit(f"Copied {run['files']} files ({run['failed']} failed), "
+                             f"expected {stats.transferred_files}")
+        run['files_per_second'] = run['files'] / run['transfer_seconds']
+        run['bytes_per_second'] = stats.transferred_bytes / run['transfer_seconds']
+        measured.append(run)
+        shutil.rmtree(dest_dir)
+    shutil.rmtree(source_dir)
+
+    result = {'spec': spec.to_dict(), 'files': stats.transferred_files, 'bytes': stats.transferred_bytes}
+    for metric in METRICS:
+        values = [run[metric] for run in measured if run[metric] is not None]
+        result[metric] = statistics.median(values) if values else None
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print each metric against the baseline; returns the regressions beyond threshold percent"""
+    regressions = []
+    for name, result in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        if before.get('spec') != result['spec']:
+            print(f"{name}: tree differs from the baseline's, not compared")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            # Rates are as noisy as the copy time they come from
+            timing = 'transfer_seconds' if metric.endswith('_per_second') else metric
+            if timing.endswith('_seconds') and max(before[timing], result[timing]) < MIN_SECONDS:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            print(f"{name:>16} {metric:>18}: {old:12.4g} -> {new:12.4g} ({change:+6.1f}%){flag}")
+            if flag:
+                regressions.append((name, metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run; may be repeated (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's file count")
+    parser.add_argument("--runs", type=int, default=3, help="Measured runs per scenario")
+    parser.add_argument("--output", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Results of an earlier run to check against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent by which a metric may get worse before --compare fails")
+    parser.add_argument("--dir", default=None, help="Where to create the trees (defaults to the temp dir)")
+    parser.add_argument("--child", nargs=2, metavar=("SOURCE", "DEST"), help=argparse.SUPPRESS)
+    parser.add_argument("--max-depth", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.max_depth)
+        return
+
+    results = {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'runs': args.runs,
+        'scenarios': {},
+    }
+    for name in args.scenario or SCENARIOS:
+        spec = SCENARIOS[name]
+        spec = replace(spec, files=max(1, round(spec.files * args.scale)))
+        print(f"{name}:")
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            result = results['scenarios'][name] = run_scenario(spec, args.runs, tmp)
+        rss = result['peak_rss_bytes']
+        print(f"  scan {result['scan_seconds']:.2f}s, copy {result['transfer_seconds']:.2f}s, "
+              f"{result['files_per_second']:,.0f} files/s, {result['bytes_per_second'] / 2**20:.1f} MiB/s"
+              + (f", peak RSS {rss / 2**20:.0f} MiB" if rss else ""))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} metrics regressed by more than {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
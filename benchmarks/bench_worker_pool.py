@@ -0,0 +1,87 @@
+"""
+Benchmark: persistent worker pool with a sliding window vs the old
+ThreadPoolExecutor-per-batch model that waits for every batch to finish.
+
+A synthetic tree of mostly small files with a few large ones spread through
+it is copied with both models; one large file per batch is enough to leave
+the other threads of the batch-barrier model idle.
+
+Usage:
+    python -m benchmarks.bench_worker_pool [--small 3000] [--large 24] [--large-mb 16]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+
+from constants.constants import BatchItem
+from utils.transfer_engine import TransferEngine
+
+
+class BatchBarrierEngine(TransferEngine):
+    """TransferEngine with the original one-pool-per-batch process_batch"""
+
+    def process_batch(self, batch: List[BatchItem]) -> None:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = []
+
+            for item in batch:
+                if item.is_directory:
+                    os.makedirs(item.dst, exist_ok=True)
+                else:
+                    futures.append(executor.submit(self.transfer_file, item.src, item.dst))
+
+            # Wait for all transfers in this batch to complete
+            for future in futures:
+                future.result()
+                self.processed_count += 1
+
+
+def build_tree(root: str, n_small: int, n_large: int, large_mb: int, seed: int = 0) -> None:
+    """Create small (1-16 KiB) and large files, shuffled so large files land in different batches"""
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 16) * 1024 for _ in range(n_small)] + [large_mb * 1024 * 1024] * n_large
+    rng.shuffle(sizes)
+
+    os.makedirs(root, exist_ok=True)
+    payload = os.urandom(large_mb * 1024 * 1024)
+    for i, size in enumerate(sizes):
+        with open(os.path.join(root, f"file{i:06d}.bin"), 'wb') as f:
+            f.write(payload[:size])
+
+
+def run_engine(engine_cls, source_dir: str, dest_dir: str, workers: int) -> float:
+    engine = engine_cls(source_dir, dest_dir, set(), streaming=False, max_workers=workers)
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+    if engine.processed_count != engine.total_items:
+        raise SystemExit(f"{engine_cls.__name__} transferred {engine.processed_count}/{engine.total_items} files")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--small", type=int, default=3000, help="Number of small files")
+    parser.add_argument("--large", type=int, default=24, help="Number of large files")
+    parser.add_argument("--large-mb", type=int, default=16, help="Size of each large file in MiB")
+    parser.add_argument("--workers", type=int, default=TransferEngine.MAX_WORKERS)
+    parser.add_argument("--dir", default=None, help="Where to create the tree (defaults to the temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source_dir = os.path.join(tmp, "source")
+        build_tree(source_dir, args.small, args.large, args.large_mb)
+        total_bytes = sum(entry.stat().st_size for entry in os.scandir(source_dir))
+        print(f"{args.small + args.large} files, {total_bytes / 2**20:.1f} MiB, {args.workers} workers")
+
+        for name, engine_cls in [("batch barrier", BatchBarrierEngine), ("sliding window", TransferEngine)]:
+            elapsed = run_engine(engine_cls, source_dir, os.path.join(tmp, name.replace(' ', '_')), args.workers)
+            print(f"{name:15}: {elapsed:7.3f}s  {total_bytes / 2**20 / elapsed:8.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Reproducible synthetic source trees for the benchmarks.
+
+A TreeSpec fixes the number of files, their size distribution, how deep
+and wide the directories go and what share of the files the benchmark
+ignore patterns exclude. The same spec and seed always give the same
+names, sizes and content, so results taken on different commits compare
+like with like.
+"""
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List
+
+KIB = 1024
+MIB = 1024 * 1024
+
+# What the ignored share of a tree is made of, as a transfer would be told to skip it
+IGNORE_PATTERNS = {"node_modules/", "*.pyc"}
+
+
+def _mixed(rng: random.Random) -> int:
+    # Mostly small source-like files with a long tail: median about 8 KiB, 1 in 100 files 8-64 MiB
+    if rng.random() < 0.01:
+        return rng.randint(8 * MIB, 64 * MIB)
+    return min(int(rng.lognormvariate(9, 1.5)), 4 * MIB)
+
+
+SIZE_DISTRIBUTIONS: Dict[str, Callable[[random.Random], int]] = {
+    'empty': lambda rng: 0,
+    'small': lambda rng: rng.randint(0, 4 * KIB),
+    'mixed': _mixed,
+    'large': lambda rng: rng.randint(8 * MIB, 32 * MIB),
+}
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    files: int = 10_000
+    sizes: str = 'small'  # A key of SIZE_DISTRIBUTIONS
+    depth: int = 4  # Directory levels below the root
+    fanout: int = 8  # Subdirectories per directory
+    files_per_dir: int = 50
+    ignored: float = 0.1  # Share of files under node_modules/ or named *.pyc
+    seed: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class TreeStats:
+    files: int = 0
+    bytes: int = 0
+    ignored_files: int = 0
+    ignored_bytes: int = 0
+
+    @property
+    def transferred_files(self) -> int:
+        return self.files - self.ignored_files
+
+    @property
+    def transferred_bytes(self) -> int:
+        return self.bytes - self.ignored_bytes
+
+
+def _directory(index: int, spec: TreeSpec) -> List[str]:
+    """Path parts of the index-th leaf directory, spreading leaves over the levels like a real project"""
+    parts = []
+    for level in range(spec.depth):
+        parts.append(f"d{level}_{index % spec.fanout}")
+        index //= spec.fanout
+        if not index:
+            break
+    return parts
+
+
+def build_tree(root: str, spec: TreeSpec) -> TreeStats:
+    """Create spec's files under root (which must not exist yet) and count what was made"""
+    if spec.sizes not in SIZE_DISTRIBUTIONS:
+        raise ValueError(f"Size distribution must be one of {', '.join(SIZE_DISTRIBUTIONS)}")
+    rng = random.Random(spec.seed)
+    draw_size = SIZE_DISTRIBUTIONS[spec.sizes]
+    block = rng.randbytes(MIB)
+    stats = TreeStats()
+    made_dirs = set()
+
+    os.makedirs(root)
+    for i in range(spec.files):
+        parts = _directory(i // spec.files_per_dir, spec)
+        name = f"f{i:07d}.txt"
+        ignored = rng.random() < spec.ignored
+        if ignored and rng.random() < 0.5:
+            parts = parts + ["node_modules"]
+        elif ignored:
+            name = f"f{i:07d}.pyc"
+        directory = os.path.join(root, *parts)
+        if directory not in made_dirs:
+            os.makedirs(directory, exist_ok=True)
+            made_dirs.add(directory)
+
+        size = draw_size(rng)
+        offset = rng.randrange(MIB)
+        with open(os.path.join(directory, name), 'wb') as f:
+            written = 0
+            while written < size:
+                # Rotating through the block keeps the content varied but cheap to make
+                chunk = block[offset:offset + size - written] or block[:size - written]
+                f.write(chunk)
+                written += len(chunk)
+                offset = 0
+        stats.files += 1
+        stats.bytes += size
+        if ignored:
+            stats.ignored_files += 1
+            stats.ignored_bytes += size
+    return stats
@@ -0,0 +1,288 @@
+"""
+Headless FilePorta: run a transfer from the command line, without Qt.
+
+Usage:
+    python cli.py SOURCE DESTINATION [--ignore PATTERN ...] [--operation copy|move] [--json]
+    python cli.py SOURCE DESTINATION --watch    # then mirror changes until Ctrl-C
+    python cli.py SOURCE DESTINATION --dry-run  # sizes and free space only; writes nothing
+"""
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+from dataclasses import asdict
+from typing import Set
+
+from constants.constants import ProgressSnapshot
+from utils.transfer_engine import TransferEngine, TransferListener
+from utils.aggregator import COMPRESSIONS
+from utils.watcher import BACKENDS, MirrorWatcher
+from utils.settings import PRESETS, Settings, load_settings
+from utils.plan import TOP_LEVEL_FILES, TransferPlan, TransferPlanner
+from utils.utils import format_bytes, format_duration
+
+
+class ConsoleListener(TransferListener):
+    """Prints a progress line and messages to stderr"""
+
+    def __init__(self):
+        self.errors = 0
+        self.progress_shown = False
+
+    def _print(self, message: str):
+        # Finish the progress line before printing below it
+        if self.progress_shown:
+            sys.stderr.write("\n")
+            self.progress_shown = False
+        sys.stderr.write(message + "\n")
+
+    def on_stats(self, snapshot: ProgressSnapshot):
+        eta = format_duration(snapshot.eta_seconds) if snapshot.eta_seconds is not None else "--"
+        sys.stderr.write(
+            f"\r{snapshot.percent:3d}%  {snapshot.files_done}/{snapshot.files_total} files  "
+            f"{format_bytes(snapshot.bytes_done)}/{format_bytes(snapshot.bytes_total)}  "
+            f"{format_bytes(snapshot.average_bps)}/s  ETA {eta}   "
+        )
+        sys.stderr.flush()
+        self.progress_shown = True
+
+    def on_status(self, message: str):
+        self._print(message)
+
+    def on_error(self, message: str):
+        self.errors += 1
+        logging.error(f"Error during file transfer: {message}")
+        self._print(f"Error: {message}")
+
+    def on_finished(self):
+        if self.errors:
+            self._print(f"File transfer finished with {self.errors} error{'s' if self.errors != 1 else ''}")
+        else:
+            self._print("File transfer completed successfully")
+
+
+class JsonListener(TransferListener):
+    """Writes one JSON object per event to stdout, for scripts and cron jobs"""
+
+    def __init__(self):
+        self.errors = 0
+
+    def _write(self, event: str, **fields):
+        sys.stdout.write(json.dumps({"event": event, **fields}) + "\n")
+        sys.stdout.flush()
+
+    def on_stats(self, snapshot: ProgressSnapshot):
+        self._write("progress", **asdict(snapshot))
+
+    def on_status(self, message: str):
+        self._write("status", message=message)
+
+    def on_error(self, message: str):
+        self.errors += 1
+        logging.error(f"Error during file transfer: {message}")
+        self._write("error", message=message)
+
+    def on_metrics(self, summary: dict):
+        self._write("metrics", **summary)
+
+    def on_finished(self):
+        self._write("finished", errors=self.errors)
+
+
+def parse_patterns(text: str) -> Set[str]:
+    return {pattern.strip() for pattern in text.strip().split('\n') if pattern.strip()}
+
+
+def parse_rate(text: str) -> int:
+    """Bytes (per second) from e.g. 500K, 10M or 1G (binary units)"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate: {text!r}")
+
+
+def print_plan(plan: TransferPlan, as_json: bool):
+    if as_json:
+        sys.stdout.write(json.dumps({"event": "plan", **plan.to_dict()}) + "\n")
+        sys.stdout.flush()
+        return
+    lines = plan.summary()
+    for directory in plan.directories:
+        name = "(top level)" if directory.name == TOP_LEVEL_FILES else directory.name
+        lines.append(f"  {format_bytes(directory.bytes):>10}  {directory.files:>8} files  {name}")
+    if not plan.fits:
+        lines.append("Not enough free space on the destination")
+    sys.stderr.write("\n".join(lines) + "\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fileporta", description="Copy or move a directory tree.")
+    parser.add_argument("source", help="Source directory")
+    parser.add_argument("destination", help="Destination directory")
+    parser.add_argument("-i", "--ignore", action="append", default=[], metavar="PATTERN",
+                        help="Pattern to ignore, .gitignore style; may be repeated")
+    parser.add_argument("--ignore-file", metavar="FILE", help="File with one ignore pattern per line")
+    parser.add_argument("--settings", metavar="FILE",
+                        help="settings.json to take ignore patterns and tunables from; flags override it")
+    parser.add_argument("--preset", choices=list(PRESETS),
+                        help="Tunables for a kind of destination, applied over --settings")
+    parser.add_argument("-o", "--operation", choices=["copy", "move"], default="copy")
+    parser.add_argument("-w", "--workers", "--concurrency", type=int,
+                        help="Threads copying small files; raise it (e.g. to 128) for high-latency network shares")
+    parser.add_argument("--large-file-workers", type=int, help="Threads copying large files")
+    parser.add_argument("--chunk-size", type=int, help="Bytes copied per chunk")
+    parser.add_argument("--scan-workers", type=int, help="Threads listing source directories")
+    parser.add_argument("--max-depth", type=int, help="Directories at this depth or deeper are not transferred; 0 for no limit")
+    parser.add_argument("--batch-size", type=int, help="Most files handed to the transfer threads at a time")
+    parser.add_argument("--retries", type=int, help="Attempts per file")
+    parser.add_argument("--retry-delay", type=float, metavar="SECONDS",
+                        help="Wait before the first retry, doubled for each one after")
+    parser.add_argument("--incremental", action="store_true", help="Only copy new or changed files")
+    parser.add_argument("--compare-hashes", action="store_true",
+                        help="In incremental mode, compare content when only the mtime differs")
+    parser.add_argument("--dedup", choices=["off", "hardlink", "reflink"],
+                        help="Write identical files once and link the duplicates to it")
+    parser.add_argument("--verify", action="store_true",
+                        help="Read each copy back and compare it with the source before putting it in place")
+    parser.add_argument("--verify-workers", type=int, help="Processes reading copies back")
+    parser.add_argument("--verify-report", metavar="FILE",
+                        help="Where to write the JSON verification report (default: under the destination)")
+    parser.add_argument("--limit-rate", type=parse_rate, metavar="RATE",
+                        help="Bandwidth limit in bytes per second, e.g. 500K or 20M")
+    parser.add_argument("--aggregate-below", type=parse_rate, metavar="SIZE",
+                        help="Copy files smaller than SIZE (e.g. 64K) in groups through a tar stream")
+    parser.add_argument("--aggregate-compression", choices=COMPRESSIONS,
+                        help="Compression for --aggregate-below streams (zstd needs the zstandard package)")
+    parser.add_argument("--files-per-second", type=float, help="Limit on files started per second")
+    parser.add_argument("--low-priority", action="store_true", help="Run at the lowest CPU and I/O priority")
+    parser.add_argument("--metrics", metavar="FILE", help="Write a JSON metrics summary when the run ends")
+    parser.add_argument("--metrics-stream", metavar="FILE", help="Append live metrics to FILE as JSON lines")
+    parser.add_argument("--profile", action="append", choices=["cpu", "memory"],
+                        help="Profile the run with cProfile (cpu) or tracemalloc (memory); may be repeated")
+    parser.add_argument("--profile-dir", metavar="DIR", help="Where profiling output goes (default: .)")
+    parser.add_argument("--watch", action="store_true",
+                        help="After copying, keep watching the source and copy changes until Ctrl-C")
+    parser.add_argument("--watch-backend", choices=BACKENDS,
+                        help="'watchdog' (needs the watchdog package), 'poll', or 'auto' (default)")
+    parser.add_argument("--watch-debounce", type=float, metavar="SECONDS",
+                        help="Quiet time that ends a batch of changes in --watch mode")
+    parser.add_argument("--poll-interval", type=float, metavar="SECONDS",
+                        help="Seconds between listings of the source when polling")
+    parser.add_argument("--plan", action="store_true",
+                        help="Scan and check free space first; stop before writing if the files won't fit")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only show the plan: sizes per directory and free space. Writes nothing "
+                             "unless --probe is given")
+    parser.add_argument("--probe", action="store_true",
+                        help="With --dry-run, also time a short probe copy to the destination for an estimate")
+    parser.add_argument("--no-probe", action="store_true",
+                        help="With --plan, plan without timing a short probe copy: no estimate, "
+                             "but nothing is written before the transfer")
+    parser.add_argument("--json", action="store_true", help="Write progress and events as JSON lines to stdout")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.source):
+        parser.error("Source directory does not exist.")
+    if os.path.abspath(args.source) == os.path.abspath(args.destination):
+        parser.error("Source and destination directories cannot be the same.")
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    settings = load_settings(args.settings) if args.settings else Settings(ignore_patterns='')
+    if args.preset:
+        settings = settings.with_preset(args.preset)
+    patterns = settings.patterns()
+    patterns.update(args.ignore)
+    if args.ignore_file:
+        with open(args.ignore_file, 'r') as f:
+            patterns.update(parse_patterns(f.read()))
+
+    if args.watch and args.operation != 'copy':
+        parser.error("--watch only works with copy.")
+    if args.probe and args.no_probe:
+        parser.error("--probe and --no-probe can't be combined.")
+    if args.watch_debounce is not None and args.watch_debounce < 0:
+        parser.error("--watch-debounce can't be negative.")
+    if args.poll_interval is not None and args.poll_interval <= 0:
+        parser.error("--poll-interval must be more than 0.")
+
+    listener = JsonListener() if args.json else ConsoleListener()
+    options = settings.engine_options()
+    flags = dict(
+        max_workers=args.workers,
+        large_file_workers=args.large_file_workers,
+        compare_hashes=args.compare_hashes,
+        chunk_size=args.chunk_size,
+        scan_workers=args.scan_workers,
+        batch_size=args.batch_size,
+        max_depth=args.max_depth,
+        max_retries=args.retries,
+        retry_delay=args.retry_delay,
+        dedup=args.dedup,
+        verify_workers=args.verify_workers,
+        metrics_path=args.metrics,
+        metrics_stream=args.metrics_stream,
+        profile=args.profile,
+        profile_dir=args.profile_dir,
+        bandwidth_limit=args.limit_rate,
+        files_per_second=args.files_per_second,
+        low_priority=args.low_priority,
+        aggregate_below=args.aggregate_below,
+        aggregate_compression=args.aggregate_compression
+    )
+    # Flags left out (None, or False for switches) keep the value from the settings
+    options.update((name, value) for name, value in flags.items() if value is not None and value is not False)
+    options.update(
+        verify=args.verify,
+        verify_report=args.verify_report,
+        listener=listener
+    )
+    try:
+        if args.watch:
+            engine = MirrorWatcher(
+                args.source,
+                args.destination,
+                patterns,
+                backend=args.watch_backend or settings.watch_backend,
+                debounce=settings.watch_debounce if args.watch_debounce is None else args.watch_debounce,
+                max_delay=settings.watch_max_delay,
+                poll_interval=settings.watch_poll_interval if args.poll_interval is None else args.poll_interval,
+                **options
+            )
+        else:
+            engine = TransferEngine(args.source, args.destination, patterns, args.operation,
+                                    incremental=args.incremental, **options)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Ctrl-C stops the transfer cleanly so it can be resumed later
+    signal.signal(signal.SIGINT, lambda signum, frame: setattr(engine, 'should_stop', True))
+    if args.plan or args.dry_run:
+        # A dry run must not touch the destination unless a probe was asked for
+        probe = args.probe if args.dry_run else settings.plan_probe and not args.no_probe
+        plan = TransferPlanner(engine.engine if args.watch else engine, probe).plan()
+        if engine.should_stop:
+            return 130
+        print_plan(plan, args.json)
+        if args.dry_run or not plan.fits:
+            return 0 if plan.fits else 1
+    engine.run()
+
+    if args.watch:
+        return 1 if listener.errors else 0  # Stopping is how watching ends
+    if engine.should_stop:
+        return 130
+    return 1 if listener.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
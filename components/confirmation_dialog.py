@@ -6,14 +6,12 @@ from PyQt6.QtCore import Qt
 
 from utils.utils import load_stylesheet
 
-STYLES = load_stylesheet("./styles/styles.qss")
-
 class ConfirmationDialog(QDialog):
     def __init__(self, message: str, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Confirmation")
         self.setFixedSize(400, 150)
-        self.setStyleSheet(STYLES)
+        self.setStyleSheet(load_stylesheet())
 
         layout = QVBoxLayout()
         
@@ -0,0 +1,54 @@
+from PyQt6.QtWidgets import (
+    QVBoxLayout, QHBoxLayout,
+    QPushButton, QLabel, QDialog, QTableWidget, QTableWidgetItem, QHeaderView
+)
+
+from utils.plan import TOP_LEVEL_FILES, TransferPlan
+from utils.utils import format_bytes, load_stylesheet
+
+class PlanDialog(QDialog):
+    """Shows a transfer's plan; accepted means start the transfer"""
+
+    def __init__(self, plan: TransferPlan, dry_run: bool = False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Transfer Plan")
+        self.setMinimumSize(520, 400)
+        self.setStyleSheet(load_stylesheet())
+
+        layout = QVBoxLayout()
+
+        for line in plan.summary():
+            layout.addWidget(QLabel(line))
+
+        if not plan.fits:
+            warning = QLabel("The destination does not have enough free space for this transfer.")
+            warning.setWordWrap(True)
+            warning.setStyleSheet("color: #e74c3c; font-weight: bold;")
+            layout.addWidget(warning)
+
+        # Per top-level directory, largest first
+        table = QTableWidget(len(plan.directories), 3)
+        table.setHorizontalHeaderLabels(["Directory", "Files", "Size"])
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for row, directory in enumerate(plan.directories):
+            name = "(files at the top level)" if directory.name == TOP_LEVEL_FILES else directory.name
+            table.setItem(row, 0, QTableWidgetItem(name))
+            table.setItem(row, 1, QTableWidgetItem(str(directory.files)))
+            table.setItem(row, 2, QTableWidgetItem(format_bytes(directory.bytes)))
+        layout.addWidget(table)
+
+        button_layout = QHBoxLayout()
+
+        if not dry_run:
+            start_button = QPushButton("Start Transfer" if plan.fits else "Start Anyway")
+            start_button.clicked.connect(self.accept)
+            button_layout.addWidget(start_button)
+
+        close_button = QPushButton("Close" if dry_run else "Cancel")
+        close_button.clicked.connect(self.reject)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
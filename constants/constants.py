@@ -1,7 +1,57 @@
 from dataclasses import dataclass
+from typing import List, Optional
+
+# Directory under the destination holding FilePorta's own bookkeeping
+STATE_DIRNAME = '.fileporta'
+
+# Defaults of the tunables settings.json can override. TransferEngine, MirrorWatcher
+# and JobManager inherit them as class constants; Settings reads them from here, so
+# that loading settings doesn't load the transfer stack (see app.py)
+
+class EngineDefaults:
+    BATCH_SIZE = 100  # Number of files per batch
+    MAX_WORKERS = 8   # Number of transfer threads for small files
+    QUEUE_SIZE = 1000  # Scanned items allowed to wait for transfer in streaming mode
+    SCAN_WORKERS = 8  # Threads listing source directories
+    MAX_DEPTH = 5  # Directories at this depth or deeper are not transferred; 0 for no limit
+    
+    # Large files are bandwidth-bound, so they get a separate, narrower lane
+    LARGE_FILE_WORKERS = 2
+    LARGE_FILE_THRESHOLD = 8 * 1024 * 1024  # Bytes
+    
+    MAX_RETRIES = 3  # Attempts per file
+    RETRY_DELAY = 1.0  # Seconds before the first retry, doubled for each one after
+    
+    VERIFY_WORKERS = 4  # Processes reading copies back to check them
+
+class WatchDefaults:
+    BACKENDS = ('auto', 'watchdog', 'poll')
+    DEBOUNCE = 1.0  # Seconds of quiet that end a batch of changes
+    MAX_DELAY = 10.0  # Most seconds a change waits while changes keep coming
+    POLL_INTERVAL = 2.0  # Seconds between listings when polling
+
+class JobDefaults:
+    MAX_JOBS = 2  # Jobs running at once
 
 @dataclass
 class BatchItem:
     src: str
     dst: str
-    is_directory: bool
\ No newline at end of file
+    is_directory: bool
+    size: int = 0
+    mtime_ns: int = 0
+    # Directory with entries that are not transferred (ignored, too deep or symlinked)
+    filtered: bool = False
+    # Items of a directory that can be moved with a single rename, used if the rename fails
+    children: Optional[List['BatchItem']] = None
+
+@dataclass
+class ProgressSnapshot:
+    bytes_done: int
+    bytes_total: int
+    files_done: int
+    files_total: int
+    percent: int
+    current_bps: float  # Bytes per second since the previous snapshot
+    average_bps: float  # Exponentially smoothed bytes per second
+    eta_seconds: Optional[float]
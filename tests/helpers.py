@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from typing import Dict, Optional
+
+from constants.constants import STATE_DIRNAME
+
+
+class TransferTestCase(unittest.TestCase):
+    """A temporary source and destination directory, with helpers to fill and compare trees"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.source = os.path.join(self.root, "source")
+        self.dest = os.path.join(self.root, "dest")
+        os.makedirs(self.source)
+
+    def write(self, directory: str, rel_path: str, content: Optional[str] = None) -> str:
+        """Write a file under directory, creating its parents; its full path. The content defaults to rel_path"""
+        path = os.path.join(directory, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(rel_path if content is None else content)
+        return path
+
+    def tree(self, directory: str) -> Dict[str, str]:
+        """Content of every file under directory by '/'-separated path, leaving out FilePorta's state"""
+        files = {}
+        for root, dirs, names in os.walk(directory):
+            if root == directory and STATE_DIRNAME in dirs:
+                dirs.remove(STATE_DIRNAME)
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path) as f:
+                    files[os.path.relpath(path, directory).replace(os.sep, "/")] = f.read()
+        return files
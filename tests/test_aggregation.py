@@ -0,0 +1,79 @@
+import os
+import shutil
+import tarfile
+import unittest
+from unittest import mock
+
+from tests.helpers import TransferTestCase
+from utils import aggregator
+from utils.transfer_engine import TransferEngine
+
+
+class AggregationTest(TransferTestCase):
+    """Small files copied through tar streams arrive as they would one by one"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(50):
+            self.write(self.source, f"pkg{i % 5}/f{i:02d}.js", "x" * i)
+        self.write(self.source, "big.bin", "y" * 8192)
+        os.chmod(os.path.join(self.source, "pkg0", "f00.js"), 0o600)
+        os.utime(os.path.join(self.source, "pkg1", "f01.js"), ns=(1_234_567_891, 1_234_567_891))
+
+    def engine(self, **kwargs) -> TransferEngine:
+        return TransferEngine(self.source, self.dest, set(), aggregate_below=4096, **kwargs)
+
+    def assertCopied(self):
+        self.assertEqual(self.tree(self.dest), self.tree(self.source))
+        for rel_path in ("pkg0/f00.js", "pkg1/f01.js", "pkg2/f02.js"):
+            src = os.stat(os.path.join(self.source, rel_path))
+            dst = os.stat(os.path.join(self.dest, rel_path))
+            self.assertEqual((dst.st_mode, dst.st_mtime_ns), (src.st_mode, src.st_mtime_ns))
+
+    def test_round_trip(self):
+        for compression in ("none", "gzip"):
+            with self.subTest(compression=compression):
+                engine = self.engine(aggregate_compression=compression)
+                engine.run()
+                self.assertCopied()
+                self.assertEqual(engine.metrics.counters["packed"], 50)
+                self.assertEqual(engine.processed_count, 51)
+                self.assertEqual(engine.failed_count, 0)
+                shutil.rmtree(self.dest)
+
+    def test_unwritable_member_is_copied_on_its_own(self):
+        unpack = aggregator.unpack_member
+
+        def flaky(member, dst):
+            if member.index == 3:
+                raise OSError("disk hiccup")
+            unpack(member, dst)
+
+        with mock.patch("utils.transfer_engine.unpack_member", flaky):
+            engine = self.engine()
+            engine.run()
+        self.assertCopied()
+        self.assertEqual(engine.metrics.counters["packed"], 49)
+        self.assertEqual(engine.failed_count, 0)
+
+    def test_broken_stream_falls_back(self):
+        def broken(self, paths, should_stop=lambda: False):
+            yield from ()
+            raise tarfile.ReadError("unexpected end of tar stream")
+
+        with mock.patch.object(aggregator.TarStream, "members", broken), self.assertLogs(level="WARNING"):
+            engine = self.engine()
+            engine.run()
+        self.assertCopied()
+        self.assertEqual(engine.metrics.counters["stream_errors"], 1)
+        self.assertEqual(engine.failed_count, 0)
+
+    def test_copy_only(self):
+        with self.assertRaises(ValueError):
+            TransferEngine(self.source, self.dest, set(), "move", aggregate_below=4096)
+        with self.assertRaises(ValueError):
+            self.engine(dedup="hardlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import errno
+import unittest
+
+from constants.constants import STATE_DIRNAME
+from tests.helpers import TransferTestCase
+from utils.journal import TransferJournal
+from utils.transfer_engine import TransferEngine
+
+
+class AtomicCopyTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.dest)
+        self.write(self.source, "small.txt", "content")
+
+    def test_failed_small_copy_removes_part_file(self):
+        engine = TransferEngine(self.source, self.dest, set())
+
+        def fail(src, dst, **kwargs):
+            with open(dst, "wb") as f:
+                f.write(b"partial")
+            raise OSError(errno.ENOSPC, "No space left on device")
+        engine.copy_engine.copy = fail
+
+        dst = os.path.join(self.dest, "small.txt")
+        with self.assertRaises(OSError):
+            engine._copy_atomic(os.path.join(self.source, "small.txt"), dst)
+        self.assertFalse(os.path.exists(dst + TransferEngine.PART_SUFFIX))
+
+    def test_journal_is_not_replayed_for_another_operation(self):
+        journal = TransferJournal(self.dest, self.source, 'copy')
+        journal.mark_complete("small.txt", 7, 1)
+        journal.close()
+
+        copying = TransferJournal(self.dest, self.source, 'copy')
+        copying.close()
+        self.assertTrue(copying.resuming)
+        moving = TransferJournal(self.dest, self.source, 'move')
+        self.addCleanup(moving.close)
+        self.assertFalse(moving.resuming)
+        self.assertTrue(os.path.isdir(os.path.join(self.dest, STATE_DIRNAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import threading
+import unittest
+
+from utils.watcher import ChangeBatcher, MirrorWatcher
+
+
+class FakeClock:
+    """A clock that only moves when waited on, running the changes scheduled on the way"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.events = []
+        self._order = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def at(self, when: float, action) -> None:
+        heapq.heappush(self.events, (when, next(self._order), action))
+
+    def advance(self, seconds: float) -> None:
+        """Move on by seconds, or only up to the next scheduled change"""
+        until = self.now + seconds
+        if self.events and self.events[0][0] <= until:
+            when, _, action = heapq.heappop(self.events)
+            self.now = max(self.now, when)
+            action()
+        else:
+            self.now = until
+
+
+class FakeCondition(threading.Condition):
+    """A condition whose waits pass on the fake clock instead of blocking"""
+
+    def __init__(self, clock: FakeClock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None) -> bool:
+        self.clock.advance(timeout)
+        return False
+
+
+class ChangeBatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def batcher(self, debounce=1.0, max_delay=10.0) -> ChangeBatcher:
+        batcher = ChangeBatcher(debounce, max_delay, clock=self.clock)
+        batcher._changed = FakeCondition(self.clock)
+        return batcher
+
+    def take(self, batcher: ChangeBatcher, until: float = 100.0):
+        return batcher.take(lambda: self.clock.now >= until)
+
+    def test_released_after_quiet_period(self):
+        batcher = self.batcher()
+        batcher.add(["a", "b"])
+        self.assertEqual(self.take(batcher), {"a", "b"})
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+    def test_each_change_restarts_the_quiet_period(self):
+        batcher = self.batcher()
+        batcher.add(["a"])
+        self.clock.at(0.6, lambda: batcher.add(["b"]))
+        self.clock.at(1.2, lambda: batcher.add(["c"]))
+        self.assertEqual(self.take(batcher), {"a", "b", "c"})
+        self.assertAlmostEqual(self.clock.now, 2.2)
+
+    def test_repeated_path_does_not_hold_the_batch_back(self):
+        batcher = self.batcher()
+        batcher.add(["a"])
+        self.clock.at(0.6, lambda: batcher.add(["a"]))
+        self.assertEqual(self.take(batcher), {"a"})
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+    def test_max_delay_caps_a_steady_stream(self):
+        batcher = self.batcher(debounce=1.0, max_delay=3.0)
+        batcher.add(["p0"])
+        for i in range(1, 20):
+            self.clock.at(i * 0.5, lambda i=i: batcher.add([f"p{i}"]))
+        self.assertEqual(self.take(batcher), {f"p{i}" for i in range(7)})
+        self.assertAlmostEqual(self.clock.now, 3.0)
+        # Changes still coming start the next batch, capped from its own first change
+        self.assertEqual(self.take(batcher), {f"p{i}" for i in range(7, 14)})
+        self.assertAlmostEqual(self.clock.now, 6.5)
+
+    def test_zero_debounce_releases_at_once(self):
+        batcher = self.batcher(debounce=0)
+        self.clock.now = 5.0
+        batcher.add(["a"])
+        self.assertEqual(self.take(batcher), {"a"})
+        self.assertEqual(self.clock.now, 5.0)
+
+    def test_stop_returns_empty_and_keeps_changes(self):
+        batcher = self.batcher()
+        self.assertEqual(self.take(batcher, until=2.0), set())
+        batcher.add(["a"])
+        self.assertEqual(self.take(batcher, until=2.5), set())
+        self.assertEqual(self.take(batcher), {"a"})
+        self.assertAlmostEqual(self.clock.now, 3.0)
+
+    def test_watcher_keeps_zero_settings(self):
+        watcher = MirrorWatcher("source", "dest", set(), backend="poll", debounce=0, max_delay=0)
+        self.assertEqual((watcher.batcher.debounce, watcher.batcher.max_delay), (0, 0))
+        watcher = MirrorWatcher("source", "dest", set(), backend="poll")
+        self.assertEqual(watcher.batcher.debounce, MirrorWatcher.DEBOUNCE)
+
+
+if __name__ == "__main__":
+    unittest.main()
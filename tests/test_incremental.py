@@ -0,0 +1,45 @@
+import os
+import unittest
+
+from tests.helpers import TransferTestCase
+from utils.transfer_engine import TransferEngine
+
+
+class IncrementalCopyTest(TransferTestCase):
+    """Repeated incremental copies transfer only what changed since the last run"""
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.source, "a.txt")
+        self.write(self.source, "sub/b.txt")
+        self.write(self.source, "sub/deeper/c.txt")
+
+    def copy(self) -> TransferEngine:
+        engine = TransferEngine(self.source, self.dest, set(), incremental=True)
+        engine.run()
+        self.assertEqual(engine.failed_count, 0)
+        self.assertEqual(self.tree(self.dest), self.tree(self.source))
+        return engine
+
+    def test_round_trip(self):
+        engine = self.copy()
+        self.assertEqual((engine.processed_count, engine.skipped_count), (3, 0))
+
+        engine = self.copy()
+        self.assertEqual((engine.processed_count, engine.skipped_count), (3, 3))
+
+        changed = self.write(self.source, "sub/b.txt", "changed, and longer")
+        self.write(self.source, "new.txt")
+        engine = self.copy()
+        self.assertEqual((engine.processed_count, engine.skipped_count), (4, 2))
+
+        # Same size, newer mtime: still transferred
+        mtime_ns = os.stat(changed).st_mtime_ns
+        self.write(self.source, "sub/b.txt", "changed, and LONGER")
+        os.utime(changed, ns=(mtime_ns, mtime_ns + 2 * TransferEngine.MTIME_TOLERANCE_NS))
+        engine = self.copy()
+        self.assertEqual((engine.processed_count, engine.skipped_count), (4, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
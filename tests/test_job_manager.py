@@ -0,0 +1,63 @@
+import threading
+import unittest
+from unittest import mock
+
+from tests.helpers import TransferTestCase
+from utils.job_manager import JobManager, TransferJob
+
+
+class JobManagerTest(TransferTestCase):
+    """Jobs run on the manager's shared pools, which the manager sets up"""
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.source, "one.txt")
+        self.write(self.source, "sub/two.txt")
+
+    def manager(self, **kwargs) -> JobManager:
+        manager = JobManager(**kwargs)
+        self.addCleanup(manager.shutdown)
+        return manager
+
+    def test_low_priority_applies_to_shared_threads(self):
+        lowered = set()
+
+        def lower():
+            lowered.add(threading.current_thread().name)
+            return True
+
+        with mock.patch("utils.job_manager.lower_thread_priority", lower), \
+                mock.patch("utils.transfer_engine.lower_thread_priority", lower):
+            manager = self.manager(low_priority=True)
+            job = manager.add_job(self.source, self.dest, set())
+            self.assertTrue(manager.wait(timeout=30))
+
+        self.assertEqual(job.state, TransferJob.DONE)
+        self.assertTrue(job.engine.low_priority)
+        self.assertTrue(any(name.startswith("fileporta-small") for name in lowered))
+        self.assertEqual(self.tree(self.dest), self.tree(self.source))
+
+    def test_job_cannot_override_the_managers_priority(self):
+        manager = self.manager()
+        with self.assertRaises(ValueError):
+            manager.add_job(self.source, self.dest, set(), low_priority=True)
+        self.assertEqual(manager.jobs, {})
+
+    def test_job_options_reach_the_engine(self):
+        manager = self.manager(workers=2)
+        job = manager.add_job(self.source, self.dest, set(), max_workers=32)
+        self.assertEqual(job.engine.max_workers, 32)
+        self.assertTrue(manager.wait(timeout=30))
+        self.assertEqual(job.state, TransferJob.DONE)
+
+    def test_per_thread_profiling_is_refused(self):
+        manager = self.manager()
+        with mock.patch("utils.metrics.sys.version_info", (3, 11)):
+            with self.assertRaises(ValueError):
+                manager.add_job(self.source, self.dest, set(), profile=["cpu"], profile_dir=self.root)
+            manager.add_job(self.source, self.dest, set(), profile=["memory"], profile_dir=self.root)
+        self.assertTrue(manager.wait(timeout=30))
+
+
+if __name__ == "__main__":
+    unittest.main()
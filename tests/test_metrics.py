@@ -0,0 +1,33 @@
+import os
+import json
+import unittest
+
+from tests.helpers import TransferTestCase
+from utils.transfer_engine import TransferEngine
+
+
+class MetricsSummaryTest(TransferTestCase):
+    """Ignore matching is timed for metrics files, and left out of the summary otherwise"""
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.source, "kept.txt")
+        self.write(self.source, "node_modules/ignored.js")
+
+    def test_metrics_file_times_ignore_matching(self):
+        path = os.path.join(self.root, "metrics.json")
+        TransferEngine(self.source, self.dest, {"node_modules/"}, metrics_path=path).run()
+        with open(path) as f:
+            summary = json.load(f)
+        self.assertGreater(summary["ignore_matching"]["calls"], 0)
+        self.assertEqual(summary["counters"].get("failed", 0), 0)
+
+    def test_untimed_summary_has_no_ignore_matching(self):
+        engine = TransferEngine(self.source, self.dest, {"node_modules/"})
+        engine.run()
+        self.assertFalse(engine.time_ignores)
+        self.assertNotIn("ignore_matching", engine.metrics_summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import unittest
+
+from tests.helpers import TransferTestCase
+from utils.transfer_engine import TransferEngine
+
+
+class SameDeviceMoveTest(TransferTestCase):
+    """A move within one filesystem renames whole directories where it can and copies no data"""
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.source, "top.txt")
+        self.write(self.source, "whole/a.txt")
+        self.write(self.source, "whole/deeper/b.txt")
+        self.write(self.source, "partial/c.txt")
+        self.write(self.source, "partial/node_modules/ignored.js")
+
+    def test_round_trip(self):
+        expected = self.tree(self.source)
+        del expected["partial/node_modules/ignored.js"]
+        whole_inode = os.stat(os.path.join(self.source, "whole")).st_ino
+
+        engine = TransferEngine(self.source, self.dest, {"node_modules/"}, 'move')
+        engine.run()
+
+        self.assertEqual(engine.failed_count, 0)
+        self.assertEqual(self.tree(self.dest), expected)
+        # Ignored files stay behind, with the directories holding them
+        self.assertEqual(self.tree(self.source), {"partial/node_modules/ignored.js": "partial/node_modules/ignored.js"})
+        # The untouched directory went over in one rename
+        self.assertEqual(os.stat(os.path.join(self.dest, "whole")).st_ino, whole_inode)
+        # Progress is complete, but renames moved no bytes
+        snapshot = engine.tracker.snapshot()
+        self.assertEqual(snapshot.bytes_done, snapshot.bytes_total)
+        self.assertEqual(snapshot.files_done, 4)
+        self.assertEqual(engine.tracker.bytes_moved, 0)
+
+        # Moving again finds nothing left but the ignored file
+        engine = TransferEngine(self.source, self.dest, {"node_modules/"}, 'move')
+        engine.run()
+        self.assertEqual(engine.processed_count, 0)
+        self.assertEqual(self.tree(self.dest), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
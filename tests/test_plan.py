@@ -0,0 +1,64 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import cli
+from tests.helpers import TransferTestCase
+from utils.plan import TransferPlanner
+from utils.transfer_engine import TransferEngine
+
+
+class PlanProbeTest(TransferTestCase):
+    """The probe writes only inside the destination and only when asked to"""
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.dest)
+        for i in range(5):
+            self.write(self.source, f"{i}.txt", "x" * 100 * i)
+
+    def plan(self, probe: bool):
+        return TransferPlanner(TransferEngine(self.source, self.dest, set()), probe).plan()
+
+    def test_probe(self):
+        plan = self.plan(probe=True)
+        self.assertEqual(plan.files, 5)
+        self.assertIsNotNone(plan.estimated_seconds)
+        self.assertEqual(os.listdir(self.dest), [])
+        self.assertEqual(sorted(os.listdir(self.root)), ["dest", "source"])
+
+    def test_without_probe(self):
+        plan = self.plan(probe=False)
+        self.assertEqual((plan.files, plan.bytes), (5, 1000))
+        self.assertIsNone(plan.estimated_seconds)
+        self.assertIsNotNone(plan.free_bytes)
+
+
+class CliProbeTest(TransferTestCase):
+    """A dry run only probes the destination when asked to"""
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.source, "a.txt")
+
+    def probed(self, *flags) -> bool:
+        with mock.patch("cli.TransferPlanner", wraps=TransferPlanner) as planner, redirect_stdout(io.StringIO()):
+            cli.main([self.source, self.dest, *flags])
+        return planner.call_args.args[1]
+
+    def test_dry_run_writes_nothing(self):
+        self.assertFalse(self.probed("--dry-run"))
+        self.assertEqual(sorted(os.listdir(self.root)), ["source"])
+
+    def test_dry_run_probe_is_opt_in(self):
+        self.assertTrue(self.probed("--dry-run", "--probe"))
+
+    def test_plan_probes_by_default(self):
+        self.assertTrue(self.probed("--plan"))
+        self.assertFalse(self.probed("--plan", "--no-probe"))
+
+
+if __name__ == "__main__":
+    unittest.main()
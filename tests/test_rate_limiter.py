@@ -0,0 +1,72 @@
+import unittest
+
+from utils.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """A clock that only moves when slept on"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def bucket(self, rate, burst_seconds=1.0) -> TokenBucket:
+        return TokenBucket(rate, burst_seconds, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_unlimited_never_waits(self):
+        for rate in (None, 0):
+            self.bucket(rate).acquire(10 ** 9)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_sustained_rate(self):
+        bucket = self.bucket(100)
+        for _ in range(10):
+            bucket.acquire(50)
+        self.assertAlmostEqual(self.clock.now, 5.0)
+        self.assertLessEqual(max(self.clock.sleeps), TokenBucket.MAX_WAIT)
+
+    def test_burst_is_capped(self):
+        bucket = self.bucket(100, burst_seconds=2.0)
+        self.clock.now = 60.0  # Idle for a minute saves up only two seconds' worth
+        bucket.acquire(200)
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire(100)
+        self.assertAlmostEqual(self.clock.now, 61.0)
+
+    def test_request_larger_than_the_bucket_is_paid_back(self):
+        bucket = self.bucket(100)
+        bucket.acquire(300)
+        self.assertAlmostEqual(self.clock.now, 3.0)
+
+    def test_rate_change_applies_while_waiting(self):
+        bucket = self.bucket(100)
+        sleep = self.clock.sleep
+
+        def lift_after_first_wait(seconds):
+            sleep(seconds)
+            bucket.set_rate(None)
+        bucket._sleep = lift_after_first_wait
+        bucket.acquire(1000)
+        self.assertAlmostEqual(self.clock.now, TokenBucket.MAX_WAIT)
+        self.assertIsNone(bucket.rate)
+
+    def test_should_stop_ends_the_wait(self):
+        bucket = self.bucket(100)
+        bucket.acquire(1000, should_stop=lambda: self.clock.now >= 0.5)
+        self.assertAlmostEqual(self.clock.now, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
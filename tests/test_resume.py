@@ -0,0 +1,110 @@
+import os
+import errno
+import unittest
+from unittest import mock
+
+from tests.helpers import TransferTestCase
+from utils.journal import TransferJournal
+from utils.transfer_engine import TransferEngine
+
+
+class ResumeTest(TransferTestCase):
+    """An interrupted transfer picks up where it stopped, through the destination's journal"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(6):
+            self.write(self.source, f"dir{i % 2}/small{i}.txt")
+        self.write(self.source, "large.bin", "x" * 64 * 1024)
+
+    def engine(self, operation: str = 'copy') -> TransferEngine:
+        engine = TransferEngine(self.source, self.dest, set(), operation, large_file_threshold=16 * 1024)
+        engine.CHECKPOINT_BYTES = 16 * 1024
+        engine.copy_engine.chunk_size = 4 * 1024
+        return engine
+
+    def test_completed_files_are_not_copied_again(self):
+        first = self.engine()
+        transfer_file = first.transfer_file
+
+        def stop_after_one(src, dst):
+            transfer_file(src, dst)
+            first.should_stop = True
+        first.transfer_file = stop_after_one
+        first.run()
+        self.assertNotEqual(self.tree(self.dest), self.tree(self.source))
+
+        second = self.engine()
+        second.run()
+        self.assertGreaterEqual(second.resumed_count, 1)
+        self.assertEqual(second.failed_count, 0)
+        self.assertEqual(self.tree(self.dest), self.tree(self.source))
+        # Finished, so there is nothing left to resume
+        self.assertFalse(TransferJournal(self.dest, self.source).resuming)
+
+    def test_large_file_continues_from_its_last_checkpoint(self):
+        source = os.path.join(self.source, "large.bin")
+        first = self.engine()
+        first.paths = {"large.bin"}
+        copy = first.copy_engine.copy
+
+        def stop_at_first_checkpoint(src, dst, offset=0, on_checkpoint=None, **kwargs):
+            def checkpoint(done):
+                on_checkpoint(done)
+                first.should_stop = True
+            return copy(src, dst, offset, on_checkpoint=checkpoint, **kwargs)
+        first.copy_engine.copy = stop_at_first_checkpoint
+        first.run()
+        part = os.path.join(self.dest, "large.bin" + TransferEngine.PART_SUFFIX)
+        self.assertTrue(os.path.exists(part))
+
+        second = self.engine()
+        offsets = []
+        copy = second.copy_engine.copy
+
+        def record_offset(src, dst, offset=0, **kwargs):
+            if src == source:
+                offsets.append(offset)
+            return copy(src, dst, offset, **kwargs)
+        second.copy_engine.copy = record_offset
+        second.run()
+        self.assertEqual(len(offsets), 1)
+        self.assertGreater(offsets[0], 0)
+        self.assertFalse(os.path.exists(part))
+        self.assertEqual(self.tree(self.dest), self.tree(self.source))
+
+    def test_interrupted_cross_device_move_still_removes_the_source(self):
+        src = os.path.join(self.source, "dir0", "small0.txt")
+        replace, remove = os.replace, os.remove
+
+        def cross_device(a, b):
+            if a.startswith(self.source):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return replace(a, b)
+
+        def crash(path):
+            if path == src:
+                raise KeyboardInterrupt  # The process dies between the copy and the removal
+            return remove(path)
+
+        expected = self.tree(self.source)
+        first = self.engine('move')
+        first.journal = TransferJournal(self.dest, self.source, 'move')
+        os.makedirs(os.path.dirname(src.replace(self.source, self.dest)))
+        with mock.patch('os.replace', cross_device), mock.patch('os.remove', crash):
+            with self.assertRaises(KeyboardInterrupt):
+                first.transfer_file(src, src.replace(self.source, self.dest))
+        first.journal.close()
+        self.assertTrue(os.path.exists(src))
+
+        second = self.engine('move')
+        with mock.patch('os.replace', cross_device):
+            second.run()
+        self.assertEqual(second.failed_count, 0)
+        self.assertEqual(second.resumed_count, 0)
+        self.assertEqual(self.tree(self.dest), expected)
+        self.assertEqual(self.tree(self.source), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
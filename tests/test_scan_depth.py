@@ -0,0 +1,44 @@
+import os
+import unittest
+
+from tests.helpers import TransferTestCase
+from utils.settings import Settings
+from utils.transfer_engine import TransferEngine
+
+
+class ScanDepthTest(TransferTestCase):
+    """max_depth None is the engine's default and 0 is no limit, for scans and path lists"""
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.source, "a/b/c/d/e/f/g/deep.txt")
+
+    def files(self, items):
+        return {os.path.basename(item.src) for item in items if not item.is_directory}
+
+    def engine(self, max_depth=None) -> TransferEngine:
+        return TransferEngine(self.source, self.dest, set(), max_depth=max_depth)
+
+    def test_default_depth(self):
+        engine = self.engine()
+        self.assertEqual(engine.max_depth, TransferEngine.MAX_DEPTH)
+        self.assertEqual(self.files(engine.iter_scan()), set())
+        self.assertEqual(self.files(engine.iter_scan(max_depth=0)), {"deep.txt"})
+
+    def test_no_limit(self):
+        engine = self.engine(max_depth=0)
+        self.assertEqual(self.files(engine.iter_scan()), {"deep.txt"})
+        self.assertEqual(self.files(engine.iter_paths(["a/b/c/d/e/f/g/deep.txt"])), {"deep.txt"})
+        self.assertEqual(self.files(engine.iter_paths(["a/b"])), {"deep.txt"})
+        self.assertEqual(self.files(engine.iter_scan(max_depth=3)), set())
+
+    def test_settings_defaults_are_the_engines(self):
+        options = Settings().engine_options()
+        self.assertEqual(options["max_depth"], TransferEngine.MAX_DEPTH)
+        self.assertEqual(options["max_workers"], TransferEngine.MAX_WORKERS)
+        self.assertEqual(options["retry_delay"], TransferEngine.RETRY_DELAY)
+        self.assertEqual(Settings.from_dict({"scan_depth": 0}, strict=True).scan_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+
+from constants.constants import STATE_DIRNAME
+from tests.helpers import TransferTestCase
+from utils.manifest import TransferManifest
+from utils.transfer_engine import TransferEngine
+
+
+class StateDirectoryTest(TransferTestCase):
+    """A destination's .fileporta directory is never transferred as user data"""
+
+    def setUp(self):
+        super().setUp()
+        # Copied from a to b, then from b on to c
+        self.a, self.b, self.c = self.source, self.dest, os.path.join(self.root, "chained")
+        self.write(self.a, "one.txt")
+        self.write(self.a, "sub/two.txt")
+
+    def run_engine(self, source, dest, **options) -> TransferEngine:
+        engine = TransferEngine(source, dest, set(), incremental=True, **options)
+        engine.run()
+        self.assertEqual(engine.failed_count, 0)
+        return engine
+
+    def test_chained_incremental_copy(self):
+        self.run_engine(self.a, self.b)
+        self.assertTrue(os.path.isdir(os.path.join(self.b, STATE_DIRNAME)))
+
+        engine = self.run_engine(self.b, self.c)
+        self.assertEqual(engine.skipped_count, 0)
+        self.assertEqual(engine.processed_count, 2)
+        manifest = TransferManifest(self.c)
+        self.addCleanup(manifest.close)
+        self.assertIsNone(manifest.get(f"{STATE_DIRNAME}/{TransferManifest.FILENAME}"))
+        self.assertIsNotNone(manifest.get("sub/two.txt"))
+        # A second run finds both files unchanged and nothing else
+        engine = self.run_engine(self.b, self.c)
+        self.assertEqual(engine.skipped_count, 2)
+
+    def test_scan_skips_state_directory_at_the_root_only(self):
+        nested = os.path.join(self.a, "sub", STATE_DIRNAME)
+        os.makedirs(nested)
+        os.makedirs(os.path.join(self.a, STATE_DIRNAME))
+        engine = TransferEngine(self.a, self.b, set())
+        sources = {os.path.relpath(item.src, self.a) for item in engine.iter_scan()}
+        self.assertNotIn(STATE_DIRNAME, sources)
+        self.assertIn(os.path.join("sub", STATE_DIRNAME), sources)
+
+        paths = {os.path.relpath(item.src, self.a)
+                 for item in engine.iter_paths([STATE_DIRNAME, "sub/two.txt"])}
+        self.assertNotIn(STATE_DIRNAME, paths)
+        self.assertIn(os.path.join("sub", "two.txt"), paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,6 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QFrame
 )
 
-from utils.utils import load_stylesheet
-
-STYLES = load_stylesheet("./styles/styles.qss")
-
 class AboutPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -6,16 +6,21 @@ from typing import Set
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLineEdit, QLabel, QFileDialog,
-    QMessageBox, QProgressBar, QFrame, QDialog
+    QMessageBox, QProgressBar, QFrame, QDialog, QCheckBox, QSpinBox
 )
 
-from utils.file_transfer_worker import FileTransferWorker
+from constants.constants import ProgressSnapshot
+from utils.utils import format_bytes, format_duration
+from utils.settings import KB, Settings, load_settings
 from components.confirmation_dialog import ConfirmationDialog
 
 class MainTransferPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.worker = None
+        self.plan_worker = None
+        self.error_shown = False  # Whether this transfer already ended in an error dialog
+        self.limit_edited = False  # Whether the bandwidth limit was changed here, overriding the settings
         self.setup_ui()
         
     def setup_ui(self):
@@ -54,10 +59,54 @@ class MainTransferPage(QWidget):
         dest_layout.addWidget(dest_button)
         card_layout.addLayout(dest_layout)
         
-        # Progress bar
+        # Incremental sync option
+        self.incremental_checkbox = QCheckBox("Only copy new or changed files")
+        card_layout.addWidget(self.incremental_checkbox)
+        
+        # Post-copy verification option
+        self.verify_checkbox = QCheckBox("Verify copies against the source")
+        card_layout.addWidget(self.verify_checkbox)
+        
+        # Watch mode: mirror changes to the source after the first sync
+        self.watch_checkbox = QCheckBox("Keep watching for changes after the first sync")
+        card_layout.addWidget(self.watch_checkbox)
+        
+        # Plan review: sizes, free space and estimated time before anything is written.
+        # Planning scans the source once more, which takes a while on large trees
+        self.review_plan_checkbox = QCheckBox("Review the plan before transferring")
+        self.review_plan_checkbox.setChecked(True)
+        card_layout.addWidget(self.review_plan_checkbox)
+        
+        # Dry run: show the plan without transferring
+        self.dry_run_checkbox = QCheckBox("Dry run: only plan the transfer")
+        card_layout.addWidget(self.dry_run_checkbox)
+        
+        # A dry run writes nothing unless asked to time a probe for the estimate
+        self.dry_run_probe_checkbox = QCheckBox("Estimate the time in dry runs (writes a short probe)")
+        self.dry_run_probe_checkbox.setEnabled(False)
+        self.dry_run_checkbox.toggled.connect(self.dry_run_probe_checkbox.setEnabled)
+        card_layout.addWidget(self.dry_run_probe_checkbox)
+        
+        # Bandwidth limit, which can also be changed while a transfer runs
+        limit_layout = QHBoxLayout()
+        limit_layout.addWidget(QLabel("Bandwidth limit (KB/s, 0 = unlimited):"))
+        self.limit_spinbox = QSpinBox()
+        self.limit_spinbox.setRange(0, 100_000_000)
+        self.show_bandwidth_limit(self.load_settings().bandwidth_limit)
+        self.limit_spinbox.valueChanged.connect(self.update_bandwidth_limit)
+        limit_layout.addWidget(self.limit_spinbox)
+        limit_layout.addStretch()
+        card_layout.addLayout(limit_layout)
+        
+        # Progress bar with throughput and ETA next to it
+        progress_layout = QHBoxLayout()
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
-        card_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.progress_bar)
+        self.stats_label = QLabel()
+        self.stats_label.setVisible(False)
+        progress_layout.addWidget(self.stats_label)
+        card_layout.addLayout(progress_layout)
         
         # Buttons
         button_layout = QHBoxLayout()
@@ -99,15 +148,13 @@ class MainTransferPage(QWidget):
         if directory:
             line_edit.setText(directory)
     
-    def get_ignore_patterns(self) -> Set[str]:
-        """Load ignore patterns from settings"""
-        try:
-            with open('settings.json', 'r') as f:
-                settings = json.load(f)
-                patterns = settings.get('ignore_patterns', '').strip().split('\n')
-                return {pattern.strip() for pattern in patterns if pattern.strip()}
-        except FileNotFoundError:
-            return set()
+    def load_settings(self) -> Settings:
+        """Load settings, from disk only if they changed since the last call"""
+        return load_settings()
+    
+    def get_ignore_patterns(self, settings: Settings) -> Set[str]:
+        """Extract ignore patterns from settings"""
+        return settings.patterns()
     
     def confirm_cancel(self):
         dialog = ConfirmationDialog(
@@ -118,7 +165,12 @@ class MainTransferPage(QWidget):
             self.cancel_transfer()
     
     def cancel_transfer(self):
-        if self.worker and self.worker.isRunning():
+        if self.plan_worker and self.plan_worker.isRunning():
+            self.worker.should_stop = True  # Also stops the plan's scan
+            self.plan_worker.wait()
+            self.transfer_finished(cancelled=True)
+            logging.info("File transfer cancelled by user while planning")
+        elif self.worker and self.worker.isRunning():
             self.worker.should_stop = True
             self.worker.wait()
             self.transfer_finished(cancelled=True)
@@ -143,36 +195,116 @@ class MainTransferPage(QWidget):
         
         logging.info(f"Starting file transfer from {source_dir} to {dest_dir}")
         
-        self.worker = FileTransferWorker(
-            source_dir,
-            dest_dir,
-            self.get_ignore_patterns()
+        # The transfer stack is only imported once it is needed, keeping startup fast
+        from utils.file_transfer_worker import FileTransferWorker, PlanWorker
+        
+        settings = self.load_settings()
+        if not self.limit_edited:
+            self.show_bandwidth_limit(settings.bandwidth_limit)  # It may have changed on the Settings page
+        watch_options = {}
+        if self.watch_checkbox.isChecked():
+            watch_options = dict(
+                watch=True,
+                backend=settings.watch_backend,
+                debounce=settings.watch_debounce,
+                max_delay=settings.watch_max_delay,
+                poll_interval=settings.watch_poll_interval
+            )
+        options = settings.engine_options()
+        options.update(
+            incremental=self.incremental_checkbox.isChecked(),
+            verify=self.verify_checkbox.isChecked(),
+            bandwidth_limit=self.limit_spinbox.value() * KB if self.limit_edited else settings.bandwidth_limit
         )
+        try:
+            self.worker = FileTransferWorker(
+                source_dir,
+                dest_dir,
+                self.get_ignore_patterns(settings),
+                **options,
+                **watch_options
+            )
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         
         self.worker.progress.connect(self.update_progress)
+        self.worker.stats.connect(self.update_stats)
         self.worker.finished.connect(lambda: self.transfer_finished(False))
         self.worker.error.connect(self.handle_error)
+        self.worker.metrics.connect(lambda summary: logging.info(f"Transfer metrics: {json.dumps(summary)}"))
         
-        self.worker.start()
-        
-        self.progress_bar.setVisible(True)
+        self.error_shown = False
+        self.stats_label.setVisible(True)
         self.start_button.setEnabled(False)
         self.cancel_button.setVisible(True)
+        
+        if not self.review_plan_checkbox.isChecked() and not self.dry_run_checkbox.isChecked():
+            self.plan_worker = None
+            self.start_worker()
+            return
+        
+        # Nothing is written until the plan has been reviewed
+        if self.dry_run_checkbox.isChecked():
+            probe = self.dry_run_probe_checkbox.isChecked()
+        else:
+            probe = settings.plan_probe
+        self.plan_worker = PlanWorker(self.worker.transfer_engine, probe)
+        self.plan_worker.planned.connect(self.review_plan)
+        self.plan_worker.error.connect(self.handle_error)
+        self.plan_worker.start()
+        self.stats_label.setText("Planning...")
+    
+    def review_plan(self, plan):
+        if self.worker.should_stop:
+            return  # Cancelled while planning
+        logging.info(f"Transfer plan: {json.dumps(plan.to_dict())}")
+        from components.plan_dialog import PlanDialog  # Imports the transfer stack
+        dry_run = self.dry_run_checkbox.isChecked()
+        dialog = PlanDialog(plan, dry_run, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted or dry_run:
+            self.transfer_finished(cancelled=True)
+            return
+        self.start_worker()
+    
+    def start_worker(self):
+        self.worker.start()
+        self.progress_bar.setVisible(True)
+        self.stats_label.setText("Scanning...")
     
     def update_progress(self, value: int):
         self.progress_bar.setValue(value)
     
+    def show_bandwidth_limit(self, bytes_per_second: int):
+        """Show a limit from the settings, rounded up so that a small limit doesn't read as unlimited"""
+        self.limit_spinbox.blockSignals(True)
+        self.limit_spinbox.setValue(-(-bytes_per_second // KB))
+        self.limit_spinbox.blockSignals(False)
+    
+    def update_bandwidth_limit(self, kilobytes_per_second: int):
+        self.limit_edited = True
+        if self.worker and self.worker.isRunning():
+            self.worker.set_bandwidth_limit(kilobytes_per_second * KB)
+    
+    def update_stats(self, snapshot: ProgressSnapshot):
+        eta = format_duration(snapshot.eta_seconds) if snapshot.eta_seconds is not None else "--"
+        self.stats_label.setText(f"{format_bytes(snapshot.average_bps)}/s · ETA {eta}")
+    
     def transfer_finished(self, cancelled: bool = False):
         self.progress_bar.setVisible(False)
+        self.stats_label.setVisible(False)
         self.start_button.setEnabled(True)
         self.cancel_button.setVisible(False)
         self.progress_bar.setValue(0)
         
-        if not cancelled:
+        if not cancelled and not self.error_shown:
             logging.info("File transfer completed successfully")
             QMessageBox.information(self, "Complete", "File transfer has been completed successfully!")
     
     def handle_error(self, error_msg: str):
         logging.error(f"Error during file transfer: {error_msg}")
         QMessageBox.critical(self, "Error", f"An error occurred during transfer:\n{error_msg}")
-        self.transfer_finished()
\ No newline at end of file
+        self.error_shown = True
+        # A watcher carries on after an error, and a started transfer always ends with finished
+        if not self.worker or not (self.worker.isRunning() or self.worker.isFinished()):
+            self.transfer_finished()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import logging
+from typing import Dict, Set
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout,
+    QPushButton, QLineEdit, QLabel, QFileDialog, QComboBox,
+    QMessageBox, QProgressBar, QFrame, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView
+)
+
+from constants.constants import ProgressSnapshot
+from utils.job_manager import JobManager, JobListener, TransferJob
+from utils.utils import format_bytes, format_duration
+from utils.settings import Settings, load_settings
+
+class _JobSignals(QObject, JobListener):
+    """Forwards job manager events, which arrive on the jobs' threads, to the GUI thread"""
+    changed = pyqtSignal(object)  # TransferJob
+    progress = pyqtSignal(object, object)  # TransferJob, ProgressSnapshot
+
+    def on_job_changed(self, job: TransferJob):
+        self.changed.emit(job)
+
+    def on_job_progress(self, job: TransferJob, snapshot: ProgressSnapshot):
+        self.progress.emit(job, snapshot)
+
+class JobsPage(QWidget):
+    """Queue of transfer jobs, run by a JobManager, with progress for each"""
+    COLUMNS = ["Source", "Destination", "Operation", "State", "Progress", "Speed"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.manager = None
+        self.rows: Dict[int, int] = {}  # Job id -> table row
+        self.signals = _JobSignals()
+        self.signals.changed.connect(self.update_job)
+        self.signals.progress.connect(self.update_progress)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+
+        # Create a card-like container
+        card = QFrame()
+        card.setObjectName("card")
+        card_layout = QVBoxLayout(card)
+
+        title = QLabel("Transfer Queue")
+        title.setStyleSheet("font-size: 18px; font-weight: bold; margin-bottom: 10px;")
+        card_layout.addWidget(title)
+
+        description = QLabel(
+            "Queue several transfers. Jobs on different drives run at the same time; "
+            "jobs on the same drive wait for each other."
+        )
+        description.setWordWrap(True)
+        card_layout.addWidget(description)
+
+        # Source and destination selection
+        for label, attr in (("Source:", "source_input"), ("Destination:", "dest_input")):
+            row = QHBoxLayout()
+            line_edit = QLineEdit()
+            setattr(self, attr, line_edit)
+            row.addWidget(QLabel(label))
+            row.addWidget(line_edit)
+            browse_button = QPushButton("Browse")
+            browse_button.clicked.connect(lambda _, edit=line_edit: self.browse_directory(edit))
+            row.addWidget(browse_button)
+            card_layout.addLayout(row)
+
+        # Per-job options
+        options_layout = QHBoxLayout()
+        self.operation_combo = QComboBox()
+        self.operation_combo.addItems(["copy", "move"])
+        options_layout.addWidget(QLabel("Operation:"))
+        options_layout.addWidget(self.operation_combo)
+        self.patterns_input = QLineEdit()
+        self.patterns_input.setPlaceholderText("Extra ignore patterns, comma separated")
+        options_layout.addWidget(self.patterns_input)
+        add_button = QPushButton("Add Job")
+        add_button.clicked.connect(self.add_job)
+        options_layout.addWidget(add_button)
+        card_layout.addLayout(options_layout)
+
+        # Job list
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        card_layout.addWidget(self.table)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        cancel_button = QPushButton("Cancel Selected")
+        cancel_button.clicked.connect(self.cancel_selected)
+        button_layout.addWidget(cancel_button)
+        clear_button = QPushButton("Clear Finished")
+        clear_button.clicked.connect(self.clear_finished)
+        button_layout.addWidget(clear_button)
+        card_layout.addLayout(button_layout)
+
+        layout.addWidget(card)
+        self.setLayout(layout)
+
+    def browse_directory(self, line_edit: QLineEdit):
+        directory = QFileDialog.getExistingDirectory(self, "Select Directory")
+        if directory:
+            line_edit.setText(directory)
+
+    def load_settings(self) -> Settings:
+        """Load settings, from disk only if they changed since the last call"""
+        return load_settings()
+
+    def get_ignore_patterns(self, settings: Settings) -> Set[str]:
+        """Patterns from the settings plus the ones typed for this job"""
+        patterns = self.patterns_input.text().split(',')
+        return settings.patterns() | {pattern.strip() for pattern in patterns if pattern.strip()}
+
+    def add_job(self):
+        source_dir = self.source_input.text()
+        dest_dir = self.dest_input.text()
+        if not source_dir or not dest_dir:
+            QMessageBox.warning(self, "Error", "Please select both source and destination directories.")
+            return
+        if source_dir == dest_dir:
+            QMessageBox.warning(self, "Error", "Source and destination directories cannot be the same.")
+            return
+
+        settings = self.load_settings()
+        if self.manager is None:
+            self.manager = JobManager(
+                max_jobs=settings.max_jobs,
+                workers=settings.max_workers,
+                large_file_workers=settings.large_file_workers,
+                low_priority=settings.low_priority,
+                listener=self.signals
+            )
+
+        # The manager was set up with the priority in force when it was created
+        options = settings.engine_options()
+        del options['low_priority']
+
+        try:
+            job = self.manager.add_job(
+                source_dir,
+                dest_dir,
+                self.get_ignore_patterns(settings),
+                self.operation_combo.currentText(),
+                **options
+            )
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        logging.info(f"Queued transfer job {job.id} from {source_dir} to {dest_dir}")
+
+    def _row_for(self, job: TransferJob) -> int:
+        row = self.rows.get(job.id)
+        if row is None:
+            row = self.rows[job.id] = self.table.rowCount()
+            self.table.insertRow(row)
+            for column, text in enumerate((job.source_dir, job.dest_dir, job.operation)):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+            self.table.setItem(row, 3, QTableWidgetItem())
+            self.table.setCellWidget(row, 4, QProgressBar())
+            self.table.setItem(row, 5, QTableWidgetItem())
+        return row
+
+    def update_job(self, job: TransferJob):
+        row = self._row_for(job)
+        state = self.table.item(row, 3)
+        state.setText(job.state)
+        state.setToolTip(job.status)
+        if job.state == TransferJob.DONE:
+            self.table.cellWidget(row, 4).setValue(100)
+            logging.info(f"Transfer job {job.id} completed successfully")
+        elif job.state == TransferJob.FAILED:
+            logging.error(f"Transfer job {job.id} failed: {'; '.join(job.errors)}")
+
+    def update_progress(self, job: TransferJob, snapshot: ProgressSnapshot):
+        row = self._row_for(job)
+        self.table.cellWidget(row, 4).setValue(snapshot.percent)
+        eta = format_duration(snapshot.eta_seconds) if snapshot.eta_seconds is not None else "--"
+        self.table.item(row, 5).setText(f"{format_bytes(snapshot.average_bps)}/s · ETA {eta}")
+
+    def cancel_selected(self):
+        if self.manager is None:
+            return
+        selected = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for job_id, row in self.rows.items():
+            if row in selected:
+                self.manager.cancel(job_id)
+
+    def clear_finished(self):
+        if self.manager is None:
+            return
+        self.manager.remove_finished()
+        # Rebuild the table from the jobs that are left
+        self.table.setRowCount(0)
+        self.rows = {}
+        for job in self.manager.jobs.values():
+            self.update_job(job)
+            if job.snapshot is not None:
+                self.update_progress(job, job.snapshot)
@@ -1,40 +1,54 @@
-import json 
-
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout,
-    QPushButton, QLabel, QTextEdit,
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
+    QPushButton, QLabel, QTextEdit, QComboBox, QSpinBox, QDoubleSpinBox, QCheckBox,
     QMessageBox, QFrame
 )
 
-from utils.utils import load_stylesheet
-
-STYLES = load_stylesheet("./styles/styles.qss")
+from utils.settings import KB, MB, PRESETS, Settings, load_settings, save_settings
 
 class SettingsPage(QWidget):
+    # Tunables shown in the form: setting, label, unit the box counts in (None for seconds or rates)
+    TUNABLES = [
+        ('max_workers', "Transfer threads", 1),
+        ('large_file_workers', "Large-file threads", 1),
+        ('large_file_threshold', "Large files from (MB)", MB),
+        ('chunk_size', "Chunk size (KB)", KB),
+        ('scan_workers', "Scan threads", 1),
+        ('scan_depth', "Scan depth (0 = no limit)", 1),
+        ('queue_size', "Queue depth", 1),
+        ('batch_size', "Batch size", 1),
+        ('max_retries', "Attempts per file", 1),
+        ('retry_delay', "First retry after (s)", None),
+        ('bandwidth_limit', "Bandwidth limit (MB/s, 0 = unlimited)", MB),
+        ('files_per_second', "Files per second (0 = unlimited)", None),
+    ]
+    CUSTOM = "Custom"
+    DECIMALS = 3  # Shown for seconds and rates
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_ui()
         self.load_settings()
-        
+
     def setup_ui(self):
         layout = QVBoxLayout()
-        
+
         # Create a card-like container
         card = QFrame()
         card.setObjectName("card")
         card_layout = QVBoxLayout(card)
-        
+
         title = QLabel("Ignore Patterns Settings")
         title.setStyleSheet("font-size: 18px; font-weight: bold; margin-bottom: 10px;")
         card_layout.addWidget(title)
-        
+
         description = QLabel(
             "Enter patterns to ignore, one per line. Supports wildcards (*). "
             "Common patterns are pre-filled below."
         )
         description.setWordWrap(True)
         card_layout.addWidget(description)
-        
+
         self.patterns_edit = QTextEdit()
         self.patterns_edit.setPlaceholderText(
             "Example patterns:\n"
@@ -46,27 +60,94 @@ class SettingsPage(QWidget):
             "*.tmp"
         )
         card_layout.addWidget(self.patterns_edit)
-        
-        save_button = QPushButton("Save Patterns")
-        save_button.clicked.connect(self.save_settings)
-        card_layout.addWidget(save_button)
-        
         layout.addWidget(card)
+
+        # Performance tunables, with presets for common destinations
+        performance_card = QFrame()
+        performance_card.setObjectName("card")
+        performance_layout = QVBoxLayout(performance_card)
+
+        performance_title = QLabel("Performance")
+        performance_title.setStyleSheet("font-size: 18px; font-weight: bold; margin-bottom: 10px;")
+        performance_layout.addWidget(performance_title)
+
+        preset_layout = QHBoxLayout()
+        preset_layout.addWidget(QLabel("Preset:"))
+        self.preset_combo = QComboBox()
+        self.preset_combo.addItems([self.CUSTOM] + list(PRESETS))
+        self.preset_combo.textActivated.connect(self.apply_preset)
+        preset_layout.addWidget(self.preset_combo)
+        preset_layout.addStretch()
+        performance_layout.addLayout(preset_layout)
+
+        form = QFormLayout()
+        self.tunable_boxes = {}
+        for name, label, unit in self.TUNABLES:
+            minimum = Settings.limits(name)[0]
+            if unit is None:
+                box = QDoubleSpinBox()
+                box.setDecimals(self.DECIMALS)
+                box.setRange(minimum, 1_000_000)
+            else:
+                box = QSpinBox()
+                box.setRange(-(-minimum // unit), 1_000_000)
+            self.tunable_boxes[name] = box
+            form.addRow(label, box)
+        self.low_priority_checkbox = QCheckBox("Run at low CPU and I/O priority")
+        form.addRow(self.low_priority_checkbox)
+        self.plan_probe_checkbox = QCheckBox("Estimate transfer time when planning (writes a short probe)")
+        form.addRow(self.plan_probe_checkbox)
+        performance_layout.addLayout(form)
+        layout.addWidget(performance_card)
+
+        save_button = QPushButton("Save Settings")
+        save_button.clicked.connect(self.save_settings)
+        layout.addWidget(save_button)
+
         layout.addStretch()
         self.setLayout(layout)
-    
+
     def load_settings(self):
-        try:
-            with open('settings.json', 'r') as f:
-                settings = json.load(f)
-                self.patterns_edit.setPlainText(settings.get('ignore_patterns', ''))
-        except FileNotFoundError:
-            pass
-    
+        self.show_settings(load_settings())
+
+    def show_settings(self, settings: Settings):
+        self.patterns_edit.setPlainText(settings.ignore_patterns)
+        for name, label, unit in self.TUNABLES:
+            value = getattr(settings, name)
+            self.tunable_boxes[name].setValue(value if unit is None else value // unit)
+        self.low_priority_checkbox.setChecked(settings.low_priority)
+        self.plan_probe_checkbox.setChecked(settings.plan_probe)
+
+    def apply_preset(self, name: str):
+        if name in PRESETS:
+            self.show_settings(self.edited_settings().with_preset(name))
+
+    def edited_settings(self) -> Settings:
+        """The settings on disk with this page's edits applied; ValueError if one is invalid"""
+        current = load_settings()
+        values = current.to_dict()
+        values.update(
+            ignore_patterns=self.patterns_edit.toPlainText(),
+            low_priority=self.low_priority_checkbox.isChecked(),
+            plan_probe=self.plan_probe_checkbox.isChecked()
+        )
+        for name, label, unit in self.TUNABLES:
+            value = self.tunable_boxes[name].value()
+            # Keep values the box can't show exactly (e.g. a 500 KB/s limit) unless they were changed
+            saved = getattr(current, name)
+            shown = round(saved, self.DECIMALS) if unit is None else saved // unit
+            if value != shown:
+                values[name] = value if unit is None else value * unit
+        return Settings.from_dict(values, strict=True)
+
     def save_settings(self):
-        settings = {
-            'ignore_patterns': self.patterns_edit.toPlainText()
-        }
-        with open('settings.json', 'w') as f:
-            json.dump(settings, f)
+        # Settings that are not edited on this page (e.g. dedup) keep their values
+        try:
+            save_settings(self.edited_settings())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Invalid setting {e}")
+            return
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not save settings:\n{e}")
+            return
         QMessageBox.information(self, "Success", "Settings saved successfully!")
\ No newline at end of file
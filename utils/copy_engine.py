@@ -0,0 +1,208 @@
+import os
+import sys
+import errno
+import hashlib
+import threading
+from typing import Callable, Optional, Sequence
+
+from utils.rate_limiter import TokenBucket
+
+# Errors meaning "this copy method is not available for these files", not "the copy failed"
+_FALLBACK_ERRNOS = frozenset(
+    code for code in (
+        errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EBADF,
+        errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', None), getattr(errno, 'ENOTSOCK', None),
+    ) if code is not None
+)
+
+
+# ioctl that makes dst share src's extents (Linux btrfs, XFS and others), from linux/fs.h
+_FICLONE = 0x40049409
+
+
+class TransferCancelled(Exception):
+    """Raised inside a transfer that stopped part-way because the worker was cancelled"""
+
+
+def _available_methods() -> Sequence[str]:
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append('copy_file_range')
+    # Only Linux lets sendfile write to a regular file
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        methods.append('sendfile')
+    methods.append('readinto')
+    return tuple(methods)
+
+
+class CopyEngine:
+    """
+    Chunked file copier shared by the transfer threads.
+
+    Copies in chunks of ``chunk_size`` bytes using the fastest method the
+    platform offers: in-kernel ``copy_file_range``, then ``sendfile``, then a
+    ``readinto`` loop over a buffer reused per thread. A method that turns out
+    not to work for a pair of files falls through to the next one. Between
+    chunks it reports progress, checks for cancellation and, if asked to,
+    syncs the destination and reports a checkpoint.
+
+    Only file data is copied; metadata is left to the caller (shutil.copystat).
+    """
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+    METHODS = _available_methods()
+
+    def __init__(self, chunk_size: Optional[int] = None, should_stop: Optional[Callable[[], bool]] = None,
+                 methods: Optional[Sequence[str]] = None, rate_limiter: Optional[TokenBucket] = None):
+        """
+        Args:
+            chunk_size (Optional[int]): Bytes copied per step. Defaults to DEFAULT_CHUNK_SIZE
+            should_stop (Optional[Callable[[], bool]]): Polled between chunks; a True
+                result raises TransferCancelled
+            methods (Optional[Sequence[str]]): Copy methods to try, in order. Defaults to
+                every method available on this platform
+            rate_limiter (Optional[TokenBucket]): Paces the bytes copied, across every
+                thread sharing it
+        """
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.should_stop = should_stop or (lambda: False)
+        self.rate_limiter = rate_limiter
+        self.methods = tuple(methods) if methods else self.METHODS
+        unknown = set(self.methods) - set(self.METHODS)
+        if unknown:
+            raise ValueError(f"Copy methods not available on this platform: {', '.join(sorted(unknown))}")
+        self._local = threading.local()
+
+    def copy(self, src: str, dst: str, offset: int = 0,
+             on_progress: Optional[Callable[[int], None]] = None,
+             on_checkpoint: Optional[Callable[[int], None]] = None,
+             checkpoint_bytes: Optional[int] = None, hasher=None) -> int:
+        """
+        Copy the content of src to dst, returning the number of bytes in dst.
+
+        Args:
+            src (str): Source file
+            dst (str): Destination file, created or truncated to ``offset``
+            offset (int): Bytes of dst already in place; copying continues from there
+            on_progress (Optional[Callable[[int], None]]): Called with the bytes copied by each chunk
+            on_checkpoint (Optional[Callable[[int], None]]): Called with the offset synced to disk,
+                every ``checkpoint_bytes`` and before a cancellation is raised
+            checkpoint_bytes (Optional[int]): Bytes between checkpoints
+            hasher: hashlib object updated with the whole source content as it is copied.
+                Copying then goes through the readinto buffer, since the in-kernel
+                methods never bring the data into Python
+        """
+        with open(src, 'rb', buffering=0) as fsrc, open(dst, 'r+b' if offset else 'wb', buffering=0) as fdst:
+            if offset:
+                fdst.truncate(offset)
+            size = os.fstat(fsrc.fileno()).st_size
+            methods = list(self.methods)
+            if hasher is not None:
+                methods = ['readinto']
+                self._hash_prefix(fsrc, offset, hasher)
+            copy_chunk = getattr(self, f"_copy_{methods.pop(0)}")
+            unsynced = 0
+
+            while True:
+                try:
+                    copied = copy_chunk(fsrc, fdst, offset)
+                    if hasher is not None and copied:
+                        hasher.update(self._buffer()[:copied])
+                except OSError as e:
+                    if methods and e.errno in _FALLBACK_ERRNOS:
+                        copy_chunk = getattr(self, f"_copy_{methods.pop(0)}")
+                        continue
+                    raise
+
+                if not copied:
+                    # In-kernel methods can stop short on some filesystems; let a plainer one finish
+                    if methods and offset < size:
+                        copy_chunk = getattr(self, f"_copy_{methods.pop(0)}")
+                        continue
+                    break
+
+                offset += copied
+                unsynced += copied
+                if on_progress is not None:
+                    on_progress(copied)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(copied, self.should_stop)
+
+                stopping = self.should_stop()
+                if on_checkpoint is not None and (stopping or unsynced >= (checkpoint_bytes or 0)):
+                    os.fsync(fdst.fileno())
+                    on_checkpoint(offset)
+                    unsynced = 0
+                if stopping:
+                    raise TransferCancelled(src)
+
+                # Saves the final zero-length call; the file is copied at the size it had when opened
+                if offset >= size:
+                    break
+
+        return offset
+
+    def _hash_prefix(self, fsrc, length: int, hasher) -> None:
+        """Hash the part of the source a resumed copy does not read again"""
+        view = self._buffer()
+        fsrc.seek(0)
+        while length > 0:
+            read = fsrc.readinto(view[:min(length, len(view))])
+            if not read:
+                break
+            hasher.update(view[:read])
+            length -= read
+
+    def digest(self, path: str) -> str:
+        """Hash a file's content (blake2b) with the same chunked reads and buffer as a copy"""
+        digest = hashlib.blake2b()
+        view = self._buffer()
+        with open(path, 'rb', buffering=0) as file:
+            while True:
+                read = file.readinto(view)
+                if not read:
+                    break
+                digest.update(view[:read])
+                if self.should_stop():
+                    raise TransferCancelled(path)
+        return digest.hexdigest()
+
+    @staticmethod
+    def clone(src: str, dst: str):
+        """Create dst as a reflink of src, sharing its blocks until either is modified"""
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux", dst)
+        import fcntl
+        with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb', buffering=0) as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+
+    def _copy_copy_file_range(self, fsrc, fdst, offset: int) -> int:
+        return os.copy_file_range(fsrc.fileno(), fdst.fileno(), self.chunk_size, offset, offset)
+
+    def _copy_sendfile(self, fsrc, fdst, offset: int) -> int:
+        os.lseek(fdst.fileno(), offset, os.SEEK_SET)
+        return os.sendfile(fdst.fileno(), fsrc.fileno(), offset, self.chunk_size)
+
+    def _copy_readinto(self, fsrc, fdst, offset: int) -> int:
+        view = self._buffer()
+        fsrc.seek(offset)
+        read = fsrc.readinto(view)
+        if not read:
+            return 0
+
+        fdst.seek(offset)
+        written = 0
+        while written < read:
+            written += fdst.write(view[written:read])
+        return read
+
+    def _buffer(self) -> memoryview:
+        """Per-thread buffer, allocated once and reused for every chunk"""
+        view = getattr(self._local, 'view', None)
+        if view is None or len(view) != self.chunk_size:
+            view = self._local.view = memoryview(bytearray(self.chunk_size))
+        return view
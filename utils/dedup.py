@@ -0,0 +1,101 @@
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+
+class DedupContent:
+    """A file whose content is being written to the destination, for duplicates to link to"""
+    __slots__ = ('src', 'size', 'digest', 'dst', 'ready', 'lock')
+
+    def __init__(self, src: str, size: int):
+        self.src = src
+        self.size = size
+        self.digest = None
+        self.dst = None  # Set once written; stays None if the transfer failed
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+
+class DedupIndex:
+    """
+    Finds files with content already written during this transfer.
+
+    Files are grouped by size first; only when a size is seen a second time
+    are the files of that size hashed, so a tree without duplicates costs no
+    extra reads. The first file with a given content is transferred as usual
+    and the others wait for it, then link to its destination. Hashing runs on
+    the transfer threads that claim the files, so it happens in parallel.
+    """
+    MIN_SIZE = 4096  # Smaller files fit in a block; linking them saves little
+
+    def __init__(self, digest: Callable[[str], str]):
+        """
+        Args:
+            digest (Callable[[str], str]): Returns the content hash of a file
+        """
+        self._digest = digest
+        self._lock = threading.Lock()
+        self._by_size: Dict[int, DedupContent] = {}
+        self._by_digest: Dict[Tuple[int, str], DedupContent] = {}
+        self.linked_count = 0
+        self.bytes_saved = 0
+
+    def claim(self, src: str, size: int) -> Tuple[Optional[DedupContent], Optional[str]]:
+        """
+        Look for a file with the same content as src.
+
+        Returns ``(None, original)`` when src can be linked to the written file
+        ``original``. Otherwise src has to be transferred; if the first value
+        is not None, src now stands for its content and must be passed to
+        ``release`` once transferred (or failed).
+        """
+        if size < self.MIN_SIZE:
+            return None, None
+
+        content = DedupContent(src, size)
+        with self._lock:
+            first = self._by_size.setdefault(size, content)
+        if first is content:
+            return content, None  # First file of this size, nothing to compare with
+
+        # Same size as an earlier file: compare content
+        if self._hash(first) is not None:
+            with self._lock:
+                self._by_digest.setdefault((size, first.digest), first)
+        if self._hash(content) is None:
+            return None, None
+        with self._lock:
+            original = self._by_digest.setdefault((size, content.digest), content)
+        if original is content:
+            return content, None
+
+        original.ready.wait()
+        if original.dst is None:
+            return None, None
+        return None, original.dst
+
+    def release(self, content: DedupContent, dst: Optional[str]) -> None:
+        """Mark content as written to dst, or as failed when dst is None, and wake its duplicates"""
+        content.dst = dst
+        if dst is None:
+            # Let the next file with this content take over
+            with self._lock:
+                if self._by_size.get(content.size) is content:
+                    del self._by_size[content.size]
+                if self._by_digest.get((content.size, content.digest)) is content:
+                    del self._by_digest[(content.size, content.digest)]
+        content.ready.set()
+
+    def record_link(self, size: int) -> None:
+        with self._lock:
+            self.linked_count += 1
+            self.bytes_saved += size
+
+    def _hash(self, content: DedupContent) -> Optional[str]:
+        """Hash a file once, however many threads ask; None if it can't be read"""
+        with content.lock:
+            if content.digest is None:
+                try:
+                    content.digest = self._digest(content.src)
+                except OSError:
+                    return None
+            return content.digest
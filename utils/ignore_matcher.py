@@ -0,0 +1,103 @@
+import os
+import re
+import fnmatch
+from typing import Dict, Iterable, Optional
+
+_MAGIC_CHARS = frozenset('*?[')
+
+# fnmatch.fnmatch() normalises case (and separators) through os.path.normcase,
+# so the matcher has to do the same to give identical verdicts on Windows.
+_CASE_INSENSITIVE = os.path.normcase('A') == 'a'
+
+
+def _normalize(value: str) -> str:
+    if _CASE_INSENSITIVE:
+        return value.replace('\\', '/').lower()
+    return value
+
+
+def _is_literal(value: str) -> bool:
+    return bool(value) and not (_MAGIC_CHARS & set(value))
+
+
+class IgnoreMatcher:
+    """Compiled form of a set of ignore patterns.
+
+    Gives the same verdicts as matching every path prefix against every
+    pattern with fnmatch, but sorts the patterns into hash indexes where
+    possible so most lookups never touch the regex engine:
+
+    - ``name``          -> exact component/path lookup
+    - ``dir/*``         -> exact directory prefix lookup
+    - ``*.ext``         -> suffix test on the last component
+    - anything else     -> one combined, anchored regular expression
+
+    No filesystem calls are made; callers say whether the path is a
+    directory. Verdicts for directory prefixes are cached, so checking
+    every file in a directory costs one lookup for its parent.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._literals = set()
+        self._prefixes = set()
+        suffixes = set()
+        fallback = []
+
+        for pattern in patterns:
+            pattern = _normalize(pattern)
+            if _is_literal(pattern):
+                self._literals.add(pattern)
+            elif pattern.endswith('/*') and _is_literal(pattern[:-2]) and not pattern[:-2].endswith('/'):
+                self._prefixes.add(pattern[:-2])
+            elif pattern.startswith('*') and _is_literal(self._suffix_of(pattern)):
+                suffixes.add(self._suffix_of(pattern))
+            else:
+                fallback.append(fnmatch.translate(pattern))
+
+        self._suffixes = tuple(sorted(suffixes))
+        self._regex = re.compile('|'.join(fallback)) if fallback else None
+        self._dir_cache: Dict[str, bool] = {}
+
+    @staticmethod
+    def _suffix_of(pattern: str) -> Optional[str]:
+        """Return ``ext`` for ``*ext`` and ``*ext/*`` patterns, where ext has no '/'"""
+        suffix = pattern[1:-2] if pattern.endswith('/*') else pattern[1:]
+        if '/' in suffix:
+            return None
+        return suffix
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Check a '/'-separated path relative to the source directory."""
+        rel_path = _normalize(rel_path)
+        head, _, name = rel_path.rpartition('/')
+        if head and self._dir_ignored(head):
+            return True
+        return self._check(name, rel_path, is_dir)
+
+    def _dir_ignored(self, rel_dir: str) -> bool:
+        ignored = self._dir_cache.get(rel_dir)
+        if ignored is None:
+            head, _, name = rel_dir.rpartition('/')
+            ignored = bool(head) and self._dir_ignored(head)
+            ignored = ignored or self._check(name, rel_dir, True)
+            self._dir_cache[rel_dir] = ignored
+        return ignored
+
+    def _check(self, name: str, path: str, is_dir: bool) -> bool:
+        """Check a single path prefix whose last component is ``name``."""
+        literals = self._literals
+        if name in literals or path in literals or path in self._prefixes:
+            return True
+        if is_dir and path + '/' in literals:
+            return True
+        if self._suffixes and name.endswith(self._suffixes):
+            return True
+
+        regex = self._regex
+        if regex is not None:
+            match = regex.match
+            if match(name) or match(path) or match(path + '/*'):
+                return True
+            if is_dir and match(path + '/'):
+                return True
+        return False
@@ -0,0 +1,97 @@
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, Optional
+
+from constants.constants import BatchItem
+
+
+class ItemStore:
+    """
+    Compact, ordered store of scanned items for trees too large to hold as BatchItems.
+
+    Each directory's source and destination paths are stored once; a file is
+    a row of columns (directory index, interned name, size, mtime) kept in
+    arrays, so it costs a few dozen bytes instead of a dataclass and two
+    absolute paths. BatchItems, and their full paths, are rebuilt only when
+    the store is iterated or indexed, i.e. at transfer time.
+
+    Items must be appended in scan order: a directory before its files.
+    """
+
+    def __init__(self, items: Iterable[BatchItem] = ()):
+        # Directories, by index
+        self._dir_src = []
+        self._dir_dst = []
+        self._dir_index: Dict[str, int] = {}
+        self._dir_filtered = array('b')
+        # Items, in order: a directory row has no name
+        self._dirs = array('L')
+        self._names = []
+        self._sizes = array('q')
+        self._mtimes = array('q')
+        # The rare items that carry more than a row can hold (folded subtrees)
+        self._extra: Dict[int, BatchItem] = {}
+        self._last_dir = -1
+
+        for item in items:
+            self.append(item)
+
+    def append(self, item: BatchItem) -> None:
+        if item.children is not None:
+            self._extra[len(self._names)] = item
+            self._add_row(0, None, 0, 0)
+        elif item.is_directory:
+            index = self._intern_dir(item.src, item.dst, item.filtered)
+            self._add_row(index, None, 0, 0)
+        else:
+            src_dir, name = os.path.split(item.src)
+            index = self._last_dir
+            if index < 0 or self._dir_src[index] != src_dir:
+                index = self._dir_index.get(src_dir)
+                if index is None:
+                    index = self._intern_dir(src_dir, os.path.dirname(item.dst), False)
+            self._add_row(index, sys.intern(name), item.size, item.mtime_ns)
+
+    def _intern_dir(self, src: str, dst: str, filtered: bool) -> int:
+        index = self._dir_index.get(src)
+        if index is None:
+            index = len(self._dir_src)
+            self._dir_src.append(src)
+            self._dir_dst.append(dst)
+            self._dir_filtered.append(filtered)
+            self._dir_index[src] = index
+        elif filtered:
+            self._dir_filtered[index] = True
+        self._last_dir = index
+        return index
+
+    def _add_row(self, dir_index: int, name: Optional[str], size: int, mtime_ns: int) -> None:
+        self._dirs.append(dir_index)
+        self._names.append(name)
+        self._sizes.append(size)
+        self._mtimes.append(mtime_ns)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __getitem__(self, position: int) -> BatchItem:
+        if position < 0:
+            position += len(self)
+        extra = self._extra.get(position)
+        if extra is not None:
+            return extra
+
+        index = self._dirs[position]
+        name = self._names[position]
+        if name is None:
+            return BatchItem(self._dir_src[index], self._dir_dst[index], True,
+                             filtered=bool(self._dir_filtered[index]))
+        return BatchItem(
+            os.path.join(self._dir_src[index], name), os.path.join(self._dir_dst[index], name), False,
+            self._sizes[position], self._mtimes[position]
+        )
+
+    def __iter__(self) -> Iterator[BatchItem]:
+        for position in range(len(self)):
+            yield self[position]
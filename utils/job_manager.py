@@ -0,0 +1,233 @@
+import os
+import sys
+import itertools
+import threading
+from typing import Dict, FrozenSet, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
+
+from constants.constants import JobDefaults, ProgressSnapshot
+from utils.priority import lower_thread_priority
+from utils.transfer_engine import TransferEngine, TransferListener
+
+
+def physical_device(path: str) -> str:
+    """
+    Name of the disk a path lives on, e.g. 'sda' or 'nvme0n1'.
+
+    Partitions of one disk map to the same name on Linux (through sysfs);
+    elsewhere, and for paths sysfs can't resolve, the filesystem's st_dev is
+    used. A path that does not exist yet is looked up through its nearest
+    existing parent.
+    """
+    probe = os.path.abspath(path)
+    while not os.path.exists(probe):
+        parent = os.path.dirname(probe)
+        if parent == probe:
+            break
+        probe = parent
+    try:
+        dev = os.stat(probe).st_dev
+    except OSError:
+        return probe
+
+    if sys.platform.startswith('linux'):
+        block = os.path.realpath(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+        if os.path.exists(os.path.join(block, 'partition')):
+            block = os.path.dirname(block)
+        if os.path.isdir(block):
+            return os.path.basename(block)
+    return str(dev)
+
+
+class TransferJob:
+    """One source→destination transfer managed by a JobManager"""
+    QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+    def __init__(self, job_id: int, source_dir: str, dest_dir: str, ignore_patterns: Set[str],
+                 operation: str, options: dict):
+        self.id = job_id
+        self.source_dir = source_dir
+        self.dest_dir = dest_dir
+        self.ignore_patterns = ignore_patterns
+        self.operation = operation
+        self.options = options
+        self.state = self.QUEUED
+        self.devices: FrozenSet[str] = frozenset((physical_device(source_dir), physical_device(dest_dir)))
+        self.snapshot: Optional[ProgressSnapshot] = None
+        self.status = ''
+        self.errors: List[str] = []
+        self.engine: Optional[TransferEngine] = None
+        self.cancel_requested = False
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (self.DONE, self.FAILED, self.CANCELLED)
+
+
+class JobListener:
+    """Receives events for every job of a JobManager; called from the jobs' threads"""
+
+    def on_job_changed(self, job: TransferJob):
+        pass
+
+    def on_job_progress(self, job: TransferJob, snapshot: ProgressSnapshot):
+        pass
+
+
+class _JobEvents(TransferListener):
+    """Records one engine's events on its job and passes them on"""
+
+    def __init__(self, manager: 'JobManager', job: TransferJob):
+        self.manager = manager
+        self.job = job
+
+    def on_stats(self, snapshot: ProgressSnapshot):
+        self.job.snapshot = snapshot
+        self.manager.listener.on_job_progress(self.job, snapshot)
+
+    def on_status(self, message: str):
+        self.job.status = message
+        self.manager.listener.on_job_changed(self.job)
+
+    def on_error(self, message: str):
+        self.job.errors.append(message)
+        self.job.status = message
+        self.manager.listener.on_job_changed(self.job)
+
+
+class JobManager(JobDefaults):
+    """
+    Runs several transfer jobs under one concurrency budget.
+
+    At most ``max_jobs`` jobs run at a time, and never two that touch the
+    same physical device, since they would only fight over it; a job that
+    has to wait does not hold up later jobs on other devices. All running
+    jobs copy on one shared pair of thread pools (small and large files),
+    so the number of I/O threads stays fixed however many jobs run. Since
+    the pools outlive any one job, their priority is the manager's setting
+    rather than the jobs'.
+    """
+    WORKERS = TransferEngine.MAX_WORKERS
+    LARGE_FILE_WORKERS = TransferEngine.LARGE_FILE_WORKERS
+
+    def __init__(self, max_jobs: Optional[int] = None, workers: Optional[int] = None,
+                 large_file_workers: Optional[int] = None, low_priority: bool = False,
+                 listener: Optional[JobListener] = None):
+        """
+        Args:
+            max_jobs (Optional[int]): Jobs allowed to run at once. Defaults to MAX_JOBS
+            workers (Optional[int]): Threads in the shared small-file pool. Defaults to WORKERS
+            large_file_workers (Optional[int]): Threads in the shared large-file pool.
+                Defaults to LARGE_FILE_WORKERS
+            low_priority (bool): Run the pools' threads, and every job's own threads, at the
+                lowest CPU and I/O priority (Linux). Defaults to False
+            listener (Optional[JobListener]): Receives job state changes and progress
+        """
+        self.max_jobs = max_jobs or self.MAX_JOBS
+        self.listener = listener or JobListener()
+        self.low_priority = low_priority
+        initializer = lower_thread_priority if low_priority else None
+        self.pools = (
+            ThreadPoolExecutor(max_workers=workers or self.WORKERS, thread_name_prefix='fileporta-small',
+                               initializer=initializer),
+            ThreadPoolExecutor(max_workers=large_file_workers or self.LARGE_FILE_WORKERS,
+                               thread_name_prefix='fileporta-large', initializer=initializer),
+        )
+        self.jobs: Dict[int, TransferJob] = {}
+        self.lock = threading.Lock()
+        self._finished = threading.Condition(self.lock)
+        self._ids = itertools.count(1)
+
+    def add_job(self, source_dir: str, dest_dir: str, ignore_patterns: Set[str],
+                operation: str = 'copy', **options) -> TransferJob:
+        """Queue a job; options are TransferEngine tunables. It starts as soon as the budget allows"""
+        if options.setdefault('low_priority', self.low_priority) != self.low_priority:
+            raise ValueError("A job's priority is set by its JobManager, whose threads it shares")
+        job = TransferJob(next(self._ids), source_dir, dest_dir, ignore_patterns, operation, options)
+        # Build the engine now so invalid options are reported to the caller
+        job.engine = self._create_engine(job)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.listener.on_job_changed(job)
+        self._schedule()
+        return job
+
+    def _create_engine(self, job: TransferJob) -> TransferEngine:
+        return TransferEngine(
+            job.source_dir, job.dest_dir, job.ignore_patterns, job.operation,
+            shared_pools=self.pools, listener=_JobEvents(self, job), **job.options
+        )
+
+    def cancel(self, job_id: int):
+        """Cancel a job, whether it is waiting or running"""
+        with self.lock:
+            job = self.jobs[job_id]
+            job.cancel_requested = True
+            if job.state == TransferJob.QUEUED:
+                job.state = TransferJob.CANCELLED
+                self._finished.notify_all()
+            elif job.state == TransferJob.RUNNING:
+                job.engine.should_stop = True
+        self.listener.on_job_changed(job)
+        self._schedule()
+
+    def cancel_all(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def remove_finished(self) -> List[TransferJob]:
+        """Forget jobs that have finished, returning them"""
+        with self.lock:
+            finished = [job for job in self.jobs.values() if job.finished]
+            for job in finished:
+                del self.jobs[job.id]
+        return finished
+
+    def _schedule(self):
+        """Start every queued job the budget and device rule allow, oldest first"""
+        started = []
+        with self.lock:
+            running = [job for job in self.jobs.values() if job.state == TransferJob.RUNNING]
+            busy = set().union(*(job.devices for job in running))
+            for job in self.jobs.values():
+                if len(running) >= self.max_jobs:
+                    break
+                if job.state != TransferJob.QUEUED or job.devices & busy:
+                    continue
+                job.state = TransferJob.RUNNING
+                running.append(job)
+                busy |= job.devices
+                started.append(job)
+
+        for job in started:
+            self.listener.on_job_changed(job)
+            threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+
+    def _run_job(self, job: TransferJob):
+        try:
+            job.engine.run()
+        finally:
+            with self.lock:
+                if job.cancel_requested or job.engine.should_stop:
+                    job.state = TransferJob.CANCELLED
+                elif job.errors or job.engine.failed_count:
+                    job.state = TransferJob.FAILED
+                else:
+                    job.state = TransferJob.DONE
+                self._finished.notify_all()
+            self.listener.on_job_changed(job)
+            self._schedule()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every job has finished; False if the timeout ran out first"""
+        with self._finished:
+            return self._finished.wait_for(
+                lambda: all(job.finished for job in self.jobs.values()), timeout
+            )
+
+    def shutdown(self):
+        """Cancel everything and stop the shared pools"""
+        self.cancel_all()
+        self.wait()
+        for pool in self.pools:
+            pool.shutdown(wait=True)
@@ -0,0 +1,113 @@
+import os
+import json
+import threading
+from typing import Dict, Tuple
+
+from constants.constants import STATE_DIRNAME
+
+
+class TransferJournal:
+    """
+    Append-only checkpoint log kept under the destination while a transfer runs.
+
+    Records the files that were fully written and, for large files, the last
+    byte offset known to be on disk. A later transfer of the same source into
+    the same destination with the same operation replays it to skip finished
+    files and continue partial ones; a journal left by a different source or
+    operation is started over. The journal is discarded once a transfer
+    completes cleanly.
+    """
+    FILENAME = 'journal.jsonl'
+    SYNC_EVERY = 200  # Completed-file records between fsyncs
+
+    def __init__(self, dest_dir: str, source_dir: str, operation: str = 'copy'):
+        self.state_dir = os.path.join(dest_dir, STATE_DIRNAME)
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.path = os.path.join(self.state_dir, self.FILENAME)
+        self.lock = threading.Lock()
+        self.completed: Dict[str, Tuple[int, int]] = {}
+        self.partial: Dict[str, Tuple[int, int, int]] = {}
+        self.unsynced = 0
+
+        resumable = self._load(source_dir, operation)
+        self.file = open(self.path, 'a' if resumable else 'w', encoding='utf-8')
+        if not resumable:
+            self._append({'source': source_dir, 'operation': operation}, sync=True)
+
+    def _load(self, source_dir: str, operation: str) -> bool:
+        """
+        Replay an existing journal written for the same source and operation; False if
+        there is none. A move must not skip files a copy finished: their sources are
+        still there to be removed.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return False
+
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return False
+        # Journals from before operations were recorded were all written by copies
+        if header.get('source') != source_dir or header.get('operation', 'copy') != operation:
+            return False
+
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn final line from a crash
+            key = record['path']
+            if 'offset' in record:
+                self.partial[key] = (record['size'], record['mtime_ns'], record['offset'])
+            else:
+                self.completed[key] = (record['size'], record['mtime_ns'])
+                self.partial.pop(key, None)
+        return True
+
+    @property
+    def resuming(self) -> bool:
+        return bool(self.completed or self.partial)
+
+    def is_complete(self, key: str, size: int, mtime_ns: int) -> bool:
+        """Whether this exact version of the file was already written in full"""
+        return self.completed.get(key) == (size, mtime_ns)
+
+    def partial_offset(self, key: str, size: int, mtime_ns: int) -> int:
+        """Bytes of this version of the file already confirmed at the destination"""
+        entry = self.partial.get(key)
+        if entry is None or entry[:2] != (size, mtime_ns):
+            return 0
+        return entry[2]
+
+    def mark_partial(self, key: str, size: int, mtime_ns: int, offset: int):
+        """Record an offset; the caller must have synced the data up to it"""
+        self._append({'path': key, 'size': size, 'mtime_ns': mtime_ns, 'offset': offset}, sync=True)
+
+    def mark_complete(self, key: str, size: int, mtime_ns: int):
+        self._append({'path': key, 'size': size, 'mtime_ns': mtime_ns})
+
+    def _append(self, record: dict, sync: bool = False):
+        with self.lock:
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+            self.unsynced += 1
+            if sync or self.unsynced >= self.SYNC_EVERY:
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def discard(self):
+        """Remove the journal after a clean run, and the state directory if nothing else uses it"""
+        self.close()
+        try:
+            os.remove(self.path)
+            os.rmdir(self.state_dir)
+        except OSError:
+            pass
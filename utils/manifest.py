@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import threading
+from typing import NamedTuple, Optional
+
+from constants.constants import STATE_DIRNAME
+
+
+class ManifestEntry(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: Optional[str]
+
+
+class TransferManifest:
+    """
+    Record of the files already copied to a destination, kept in SQLite under it.
+
+    Each entry stores the size and mtime the source file had when it was
+    copied, so an incremental run can decide a file is unchanged without
+    touching the destination tree. Writes are buffered and committed in
+    batches; the connection is shared by the transfer threads behind a lock.
+    """
+    FILENAME = 'manifest.sqlite'
+    FLUSH_EVERY = 500  # Pending records written per transaction
+
+    def __init__(self, dest_dir: str):
+        manifest_dir = os.path.join(dest_dir, STATE_DIRNAME)
+        os.makedirs(manifest_dir, exist_ok=True)
+        self.path = os.path.join(manifest_dir, self.FILENAME)
+        self.lock = threading.Lock()
+        self.pending = []
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " digest TEXT)"
+        )
+        self.conn.commit()
+
+    def get(self, path: str) -> Optional[ManifestEntry]:
+        """Look up a destination-relative path"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, digest FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def record(self, path: str, size: int, mtime_ns: int, digest: Optional[str] = None):
+        """Remember that the source file at this size/mtime is now at the destination"""
+        with self.lock:
+            self.pending.append((path, size, mtime_ns, digest))
+            if len(self.pending) >= self.FLUSH_EVERY:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                self.pending
+            )
+            self.conn.commit()
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
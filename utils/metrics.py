@@ -0,0 +1,246 @@
+import os
+import sys
+import json
+import time
+import bisect
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from utils.ignore_matcher import IgnoreMatcher
+
+
+class LatencyHistogram:
+    """Counts of durations in fixed buckets, from which percentiles are estimated"""
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)  # The last bucket is open-ended
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, seconds * 1000)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound, in ms, of the bucket holding the given fraction of durations"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.max * 1000, 3)
+
+    def to_dict(self) -> dict:
+        buckets = {f"<={bound}ms": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+        buckets[f">{self.BUCKETS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _TimedMatcher:
+    """Stands in for an IgnoreMatcher, adding the time spent matching to the metrics"""
+
+    def __init__(self, matcher: IgnoreMatcher, metrics: 'TransferMetrics'):
+        self._matcher = matcher
+        self._metrics = metrics
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        start = time.perf_counter()
+        try:
+            return self._matcher.matches(rel_path, is_dir)
+        finally:
+            self._metrics.add_ignore_time(time.perf_counter() - start)
+
+
+class TransferMetrics:
+    """
+    Structured metrics for one transfer run.
+
+    Collects time spent per phase, ignore-matching time (only when matches
+    are timed, see TransferEngine.time_ignores; the summary leaves it out
+    otherwise), per-file latency,
+    retry and other counters, and samples of queue depths. ``summary``
+    turns them into a JSON-serialisable dict; ``stream_to`` also writes a
+    JSON line each time ``emit`` is called during the run. Shared by the
+    scan and transfer threads behind a lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.latency = LatencyHistogram()
+        self.queues: Dict[str, List[float]] = {}  # name -> [samples, total depth, max depth]
+        self.ignore_seconds = 0.0
+        self.ignore_calls = 0
+        self.ignores_timed = False  # Whether a timed matcher was handed out
+        self._stream = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the time spent in the with block to the named phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_latency(self, seconds: float) -> None:
+        with self.lock:
+            self.latency.record(seconds)
+
+    def sample_queue(self, name: str, depth: int) -> None:
+        with self.lock:
+            stats = self.queues.get(name)
+            if stats is None:
+                stats = self.queues[name] = [0, 0, 0]
+            stats[0] += 1
+            stats[1] += depth
+            stats[2] = max(stats[2], depth)
+
+    def add_ignore_time(self, seconds: float) -> None:
+        with self.lock:
+            self.ignore_seconds += seconds
+            self.ignore_calls += 1
+
+    def timed_matcher(self, matcher: IgnoreMatcher) -> _TimedMatcher:
+        self.ignores_timed = True
+        return _TimedMatcher(matcher, self)
+
+    def stream_to(self, path: str) -> None:
+        """Append a JSON line to path on every ``emit``"""
+        self._stream = open(path, 'a')
+
+    def emit(self, **fields) -> None:
+        if self._stream is None:
+            return
+        line = json.dumps({"time": time.time(), "elapsed": round(time.perf_counter() - self.started, 3), **fields})
+        with self.lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def summary(self, **extra) -> dict:
+        """Everything collected so far, plus the given fields"""
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            summary = {
+                "elapsed_seconds": round(elapsed, 3),
+                "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "counters": dict(self.counters),
+                "latency": self.latency.to_dict(),
+                "queues": {
+                    name: {"samples": samples, "mean": round(total / samples, 2) if samples else 0, "max": peak}
+                    for name, (samples, total, peak) in self.queues.items()
+                },
+            }
+            # Left out, rather than reported as zero, when matches were not timed
+            if self.ignores_timed:
+                summary["ignore_matching"] = {"seconds": round(self.ignore_seconds, 3), "calls": self.ignore_calls}
+        summary.update(extra)
+        return summary
+
+
+class Profiler:
+    """
+    Opt-in cProfile and tracemalloc hook for a transfer run.
+
+    cProfile only sees the thread that enabled it before Python 3.12, so
+    every worker thread calls ``profile_thread`` when it starts and the
+    per-thread profiles are merged into one pstats file at the end.
+    """
+    MODES = ('cpu', 'memory')
+    TOP_ALLOCATIONS = 50  # Lines listed in the memory report
+
+    def __init__(self, modes: Iterable[str], output_dir: str):
+        """
+        Args:
+            modes (Iterable[str]): 'cpu' for cProfile, 'memory' for tracemalloc
+            output_dir (str): Where transfer.prof and memory.txt are written
+        """
+        self.modes = set(modes)
+        unknown = self.modes - set(self.MODES)
+        if unknown:
+            raise ValueError(f"Unknown profile modes: {', '.join(sorted(unknown))}")
+        self.output_dir = output_dir
+        self._profiles = []
+        self._lock = threading.Lock()
+        # Whether each thread has to enable its own profile (see profile_thread)
+        self.per_thread = sys.version_info < (3, 12)
+
+    def start(self) -> None:
+        if 'memory' in self.modes:
+            tracemalloc.start(25)
+        if 'cpu' in self.modes:
+            self._enable()
+
+    def profile_thread(self) -> None:
+        """Initializer for worker threads"""
+        if 'cpu' in self.modes and self.per_thread:
+            self._enable()
+
+    def _enable(self) -> None:
+        profile = cProfile.Profile()
+        profile.enable()
+        with self._lock:
+            self._profiles.append(profile)
+
+    def stop(self) -> dict:
+        """Stop profiling, write the reports and return where they are"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        results = {}
+
+        if self._profiles:
+            path = os.path.join(self.output_dir, 'transfer.prof')
+            with self._lock:
+                profiles, self._profiles = self._profiles, []
+            for profile in profiles:
+                profile.disable()
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(path)
+            results["cpu_profile"] = path
+
+        if tracemalloc.is_tracing():
+            path = os.path.join(self.output_dir, 'memory.txt')
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(path, 'w') as f:
+                f.write(f"Traced memory: current {current} bytes, peak {peak} bytes\n\n")
+                for stat in snapshot.statistics('lineno')[:self.TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            results["memory_report"] = path
+            results["peak_traced_bytes"] = peak
+
+        return results
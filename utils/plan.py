@@ -0,0 +1,256 @@
+import os
+import time
+import random
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from constants.constants import BatchItem
+from utils.copy_engine import CopyEngine
+from utils.transfer_engine import TransferEngine
+from utils.utils import format_bytes, format_duration
+
+TOP_LEVEL_FILES = '.'  # Key for files directly in the source directory
+
+
+@dataclass
+class DirectoryTotals:
+    name: str  # Top-level directory of the source, or TOP_LEVEL_FILES
+    files: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class TransferPlan:
+    """
+    What a transfer will do, worked out before it writes anything.
+
+    Sizes are upper bounds: files an incremental or resumed transfer skips
+    are counted like any other.
+    """
+    source_dir: str
+    dest_dir: str
+    operation: str
+    renames: bool = False  # A move within one filesystem, which writes no data
+    directories: List[DirectoryTotals] = field(default_factory=list)  # Largest first
+    files: int = 0
+    bytes: int = 0
+    needed_bytes: int = 0  # Space taken on the destination, in whole blocks; 0 for renames
+    free_bytes: Optional[int] = None  # None if the destination's disk could not be checked
+    seconds_per_file: Optional[float] = None  # Measured by the probe
+    bytes_per_second: Optional[float] = None
+    estimated_seconds: Optional[float] = None  # None if the probe did not run
+    scan_seconds: float = 0.0
+
+    @property
+    def fits(self) -> bool:
+        return self.free_bytes is None or self.needed_bytes <= self.free_bytes
+
+    def to_dict(self) -> dict:
+        return dict(asdict(self), fits=self.fits)
+
+    def summary(self) -> List[str]:
+        """The plan as lines of text, for the dialog and the command line"""
+        lines = [f"{self.files} files, {format_bytes(self.bytes)} to {self.operation}"]
+        if self.free_bytes is not None:
+            lines.append(
+                f"Needs {format_bytes(self.needed_bytes)} of {format_bytes(self.free_bytes)} free on the destination"
+                + ("" if self.fits else f": {format_bytes(self.needed_bytes - self.free_bytes)} short")
+            )
+        if self.estimated_seconds is not None:
+            measured = f" ({format_bytes(self.bytes_per_second)}/s measured)" if self.bytes_per_second else ""
+            lines.append(f"Estimated time: about {format_duration(self.estimated_seconds)}{measured}")
+        elif self.renames and self.files:
+            lines.append("Files are renamed in place, which takes little time")
+        return lines
+
+
+class TransferPlanner:
+    """
+    Pre-flight check for a transfer engine's job: one scan with the engine's
+    own scanner and ignore patterns, totals per top-level directory, the
+    destination's free space and a duration estimate.
+
+    The estimate comes from a short probe that copies a sample of small files,
+    which prices the per-file overhead, and streams the start of the largest
+    file, which gives the bandwidth. Both are written to a temporary
+    .fileporta-probe-* directory inside the destination (or, if it doesn't
+    exist yet, its closest existing parent), so they land on the same disk,
+    and removed again. Without the probe (the default for dry runs, which
+    must not touch the destination) the plan only scans and checks free
+    space, and writes nothing.
+    """
+    PROBE_SECONDS = 2.0  # Time the probe may take in all
+    PROBE_FILES = 50  # Small files sampled for the per-file cost
+    PROBE_BYTES = 64 * 1024 * 1024  # Most bytes streamed for the bandwidth
+    SMALL_FILE = 64 * 1024  # Files up to this size price the per-file cost
+    BLOCK_SIZE = 4096  # Allocation unit where the filesystem doesn't report one
+
+    def __init__(self, engine: TransferEngine, probe: bool = True):
+        """
+        Args:
+            engine (TransferEngine): The engine that will run the transfer; its
+                scanner, limits and worker count shape the plan
+            probe (bool): Measure throughput to estimate the duration, writing a
+                few files to the destination. Defaults to True
+        """
+        self.engine = engine
+        self.probe = probe
+        self._random = random.Random(0)
+
+    def plan(self) -> TransferPlan:
+        engine = self.engine
+        plan = TransferPlan(engine.source_dir, engine.dest_dir, engine.operation)
+        anchor = _existing_ancestor(engine.dest_dir)
+        plan.renames = renames = engine.operation == 'move' and _same_device(engine.source_dir, anchor)
+        block = self._block_size(anchor)
+        totals: Dict[str, DirectoryTotals] = {}
+        small: List[BatchItem] = []
+        small_seen = 0
+        largest: Optional[BatchItem] = None
+
+        start = time.perf_counter()
+        items = engine.iter_scan() if engine.paths is None else engine.iter_paths(engine.paths)
+        for item in items:
+            rel_path = os.path.relpath(item.src, engine.source_dir)
+            parts = rel_path.split(os.sep)
+            if item.is_directory:
+                # Listed even if empty, so the plan shows every directory the transfer creates
+                if rel_path != os.curdir and parts[0] not in totals:
+                    totals[parts[0]] = DirectoryTotals(parts[0])
+                continue
+            top = parts[0] if len(parts) > 1 else TOP_LEVEL_FILES
+            directory = totals.get(top)
+            if directory is None:
+                directory = totals[top] = DirectoryTotals(top)
+            directory.files += 1
+            directory.bytes += item.size
+            plan.files += 1
+            plan.bytes += item.size
+            if not renames:
+                plan.needed_bytes += -(-item.size // block) * block
+            if item.size <= self.SMALL_FILE:
+                small_seen += 1
+                self._sample(small, item, small_seen)
+            if largest is None or item.size > largest.size:
+                largest = item
+        plan.scan_seconds = time.perf_counter() - start
+        plan.directories = sorted(totals.values(), key=lambda directory: directory.bytes, reverse=True)
+
+        try:
+            plan.free_bytes = shutil.disk_usage(anchor).free
+        except OSError:
+            pass
+        if self.probe and not renames and plan.files and not engine.should_stop:
+            self._measure(plan, anchor, small, largest)
+        return plan
+
+    def _sample(self, sample: List[BatchItem], item: BatchItem, seen: int) -> None:
+        """Reservoir sampling, so the probed small files come from the whole tree"""
+        if len(sample) < self.PROBE_FILES:
+            sample.append(item)
+        else:
+            index = self._random.randrange(seen)
+            if index < self.PROBE_FILES:
+                sample[index] = item
+
+    def _block_size(self, path: str) -> int:
+        try:
+            return os.statvfs(path).f_frsize or self.BLOCK_SIZE
+        except (AttributeError, OSError):  # No statvfs on Windows
+            return self.BLOCK_SIZE
+
+    def _measure(self, plan: TransferPlan, anchor: str, small: List[BatchItem], largest: BatchItem) -> None:
+        """Run the probe and estimate the transfer's duration from it"""
+        engine = self.engine
+        deadline = time.monotonic() + self.PROBE_SECONDS
+        try:
+            probe_dir = tempfile.mkdtemp(prefix='.fileporta-probe-', dir=anchor)
+        except OSError:
+            return  # Read-only or missing destination; the transfer will report it
+        try:
+            # Half the time for each part, unless there are no large files to stream
+            halfway = deadline - self.PROBE_SECONDS / 2 if largest.size > self.SMALL_FILE else deadline
+            plan.seconds_per_file = self._probe_files(probe_dir, small, halfway)
+            if largest.size > self.SMALL_FILE:
+                plan.bytes_per_second = self._probe_stream(probe_dir, largest, deadline)
+        except OSError:
+            pass  # A source file changed or the destination filled up; estimate with what was measured
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+
+        if plan.bytes_per_second is None and plan.seconds_per_file is None:
+            return
+        # With only small files, the time per file already includes their bytes
+        byte_seconds = 0.0
+        if plan.bytes_per_second is not None:
+            bandwidth = plan.bytes_per_second
+            limit = engine.bandwidth_limiter.rate
+            if limit:
+                bandwidth = min(bandwidth, limit)
+            byte_seconds = plan.bytes / bandwidth
+        file_seconds = 0.0
+        if plan.seconds_per_file is not None:
+            # Per-file costs overlap across the transfer threads; bandwidth doesn't
+            file_seconds = plan.files * plan.seconds_per_file / engine.max_workers
+            files_per_second = engine.file_limiter.rate
+            if files_per_second:
+                file_seconds = max(file_seconds, plan.files / files_per_second)
+        plan.estimated_seconds = file_seconds + byte_seconds
+
+    def _probe_files(self, probe_dir: str, sample: List[BatchItem], deadline: float) -> Optional[float]:
+        """Average seconds to copy a small file the way the engine does, through a part file and a rename"""
+        copy_engine = CopyEngine(self.engine.copy_engine.chunk_size)
+        copied = 0
+        start = time.perf_counter()
+        for i, item in enumerate(sample):
+            if time.monotonic() > deadline or self.engine.should_stop:
+                break
+            dst = os.path.join(probe_dir, str(i))
+            copy_engine.copy(item.src, dst + TransferEngine.PART_SUFFIX)
+            os.replace(dst + TransferEngine.PART_SUFFIX, dst)
+            copied += 1
+        if not copied:
+            return None
+        return (time.perf_counter() - start) / copied
+
+    def _probe_stream(self, probe_dir: str, item: BatchItem, deadline: float) -> Optional[float]:
+        """
+        Bytes per second streaming the start of a large file to the destination.
+        The data is synced to the device, as a write cache would otherwise make
+        a short probe look much faster than a long transfer.
+        """
+        chunk_size = self.engine.copy_engine.chunk_size
+        view = memoryview(bytearray(chunk_size))
+        written = 0
+        start = time.perf_counter()
+        with open(item.src, 'rb', buffering=0) as fsrc, \
+                open(os.path.join(probe_dir, 'stream'), 'wb', buffering=0) as fdst:
+            while written < self.PROBE_BYTES and time.monotonic() < deadline and not self.engine.should_stop:
+                count = fsrc.readinto(view)
+                if not count:
+                    break
+                fdst.write(view[:count])
+                written += count
+            os.fsync(fdst.fileno())
+        seconds = time.perf_counter() - start
+        return written / seconds if written and seconds > 0 else None
+
+
+def _existing_ancestor(path: str) -> str:
+    """path, or its closest parent that exists: the disk a new destination will be created on"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def _same_device(source_dir: str, path: str) -> bool:
+    try:
+        return os.stat(source_dir).st_dev == os.stat(path).st_dev
+    except OSError:
+        return False
@@ -0,0 +1,43 @@
+import os
+import sys
+import ctypes
+import logging
+import platform
+import threading
+
+# ioprio_set(2) syscall numbers, which glibc does not wrap
+_IOPRIO_SET = {
+    'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'riscv64': 30,
+    'armv7l': 314, 'ppc64le': 273, 's390x': 282,
+}
+_IOPRIO_WHO_PROCESS = 1  # With id 0: the calling thread
+_IOPRIO_CLASS_BE = 2
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_LOWEST_BE = (_IOPRIO_CLASS_BE << _IOPRIO_CLASS_SHIFT) | 7
+_LOWEST_NICE = 19
+
+
+def lower_thread_priority() -> bool:
+    """
+    Give the calling thread the lowest CPU priority and the lowest best-effort
+    I/O priority, so a transfer yields the disk to other work.
+
+    Linux applies both per thread, so only the threads that call this are
+    affected (not the GUI). Returns False where that is not supported.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), _LOWEST_NICE)
+    except OSError as e:
+        logging.warning(f"Could not lower CPU priority: {e}")
+
+    number = _IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, _IOPRIO_LOWEST_BE) != 0:
+        logging.warning(f"Could not lower I/O priority: {os.strerror(ctypes.get_errno())}")
+        return False
+    return True
@@ -0,0 +1,99 @@
+import time
+import threading
+from typing import Callable, Optional
+
+from constants.constants import ProgressSnapshot
+
+
+class ProgressTracker:
+    """
+    Byte-weighted progress with throughput and ETA, reported at a fixed rate.
+
+    Totals grow while the scan is still running. Bytes that were not actually
+    moved (files skipped as unchanged or finished by an earlier run) count
+    towards completion but not towards throughput, so they don't inflate the
+    rate or shorten the ETA.
+    """
+    SMOOTHING = 0.3  # Weight of the newest sample in the moving average
+
+    def __init__(self, interval: float = 0.25, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            interval (float): Minimum seconds between snapshots
+            clock (Callable[[], float]): Monotonic time source
+        """
+        self.interval = interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.bytes_total = 0
+        self.files_total = 0
+        self.bytes_done = 0
+        self.files_done = 0
+        self.bytes_moved = 0
+        self.average_bps = 0.0
+        self._sampled = False
+        self._last_time = clock()
+        self._last_moved = 0
+
+    def add_total(self, size: int):
+        """Account for one more file found by the scanner"""
+        with self.lock:
+            self.files_total += 1
+            self.bytes_total += size
+
+    def add_bytes(self, count: int, moved: bool = True) -> Optional[ProgressSnapshot]:
+        """Account for bytes written; returns a snapshot if one is due"""
+        with self.lock:
+            self.bytes_done += count
+            if moved:
+                self.bytes_moved += count
+            return self._snapshot_if_due()
+
+    def add_file(self, count: int = 1) -> Optional[ProgressSnapshot]:
+        """Account for files that are finished with; returns a snapshot if one is due"""
+        with self.lock:
+            self.files_done += count
+            return self._snapshot_if_due()
+
+    def snapshot(self) -> ProgressSnapshot:
+        """Take a snapshot now, regardless of the report interval"""
+        with self.lock:
+            return self._snapshot(self.clock())
+
+    def _snapshot_if_due(self) -> Optional[ProgressSnapshot]:
+        now = self.clock()
+        if now - self._last_time < self.interval:
+            return None
+        return self._snapshot(now)
+
+    def _snapshot(self, now: float) -> ProgressSnapshot:
+        elapsed = now - self._last_time
+        current_bps = (self.bytes_moved - self._last_moved) / elapsed if elapsed > 0 else 0.0
+        if self._sampled:
+            self.average_bps += self.SMOOTHING * (current_bps - self.average_bps)
+        else:
+            self.average_bps = current_bps
+            self._sampled = True
+        self._last_time = now
+        self._last_moved = self.bytes_moved
+
+        if self.bytes_total:
+            percent = int(self.bytes_done / self.bytes_total * 100)
+        elif self.files_total:
+            percent = int(self.files_done / self.files_total * 100)
+        else:
+            percent = 0
+
+        remaining = self.bytes_total - self.bytes_done
+        eta = remaining / self.average_bps if self.average_bps > 0 else None
+
+        return ProgressSnapshot(
+            bytes_done=self.bytes_done,
+            bytes_total=self.bytes_total,
+            files_done=self.files_done,
+            files_total=self.files_total,
+            percent=min(percent, 100),
+            current_bps=current_bps,
+            average_bps=self.average_bps,
+            eta_seconds=max(eta, 0.0) if eta is not None else None
+        )
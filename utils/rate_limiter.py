@@ -0,0 +1,72 @@
+import time
+import threading
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared by the transfer threads.
+
+    ``acquire`` takes tokens (bytes, files, ...) and waits while the bucket
+    is in debt, so the combined rate of all callers stays at ``rate`` per
+    second with bursts of up to ``burst_seconds`` worth of tokens. A request
+    larger than the bucket is allowed and paid back by the waits that follow.
+    The rate can be changed while threads are waiting; None means unlimited.
+    """
+    MAX_WAIT = 0.1  # Seconds slept at a time, so rate changes and cancellation apply quickly
+    # Debt left by float rounding; waiting it off would spin on sleeps too short to move the clock
+    TOLERANCE = 1e-6
+
+    def __init__(self, rate: Optional[float] = None, burst_seconds: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate (Optional[float]): Tokens per second; None or 0 for no limit
+            burst_seconds (float): Seconds of unused rate the bucket can save up. Defaults to 1
+            clock (Callable[[], float]): Monotonic time source, replaceable in tests
+            sleep (Callable[[float], None]): Wait function, replaceable in tests
+        """
+        self.burst_seconds = burst_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = None
+        self._tokens = 0.0
+        self._updated = clock()
+        self.set_rate(rate)
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        with self._lock:
+            self._refill()
+            self._rate = rate if rate and rate > 0 else None
+            if self._rate is not None:
+                self._tokens = min(self._tokens, self._rate * self.burst_seconds)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self._rate is not None:
+            self._tokens = min(self._tokens + (now - self._updated) * self._rate, self._rate * self.burst_seconds)
+        self._updated = now
+
+    def acquire(self, amount: float, should_stop: Optional[Callable[[], bool]] = None) -> None:
+        """Take amount tokens, returning once the bucket is out of debt (or should_stop says so)"""
+        with self._lock:
+            if self._rate is None:
+                return
+            self._refill()
+            self._tokens -= amount
+
+        while True:
+            with self._lock:
+                if self._rate is None:
+                    return  # Limit lifted while waiting
+                self._refill()
+                deficit = -self._tokens
+                rate = self._rate
+            if deficit <= self.TOLERANCE or (should_stop is not None and should_stop()):
+                return
+            self._sleep(min(deficit / rate, self.MAX_WAIT))
@@ -0,0 +1,115 @@
+import errno
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from utils.verify import VerificationError
+
+# errno values that say "not now" rather than "never": a busy or locked file,
+# a dropped or slow network connection, an interrupted call
+TRANSIENT_ERRNOS = {
+    errno.EAGAIN, errno.EWOULDBLOCK, errno.EBUSY, errno.EINTR, errno.ETXTBSY, errno.EDEADLK,
+    errno.ETIMEDOUT, errno.ECONNRESET, errno.ECONNABORTED, errno.ECONNREFUSED, errno.ENETDOWN,
+    errno.ENETUNREACH, errno.ENETRESET, errno.EHOSTUNREACH, errno.EHOSTDOWN, errno.EPIPE,
+    errno.EIO, errno.ENOLCK,
+} | {getattr(errno, name) for name in ('ESTALE', 'EREMOTEIO') if hasattr(errno, name)}
+
+# Windows: ERROR_SHARING_VIOLATION and ERROR_LOCK_VIOLATION, a file open in another program
+TRANSIENT_WINERRORS = {32, 33}
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed transfer may succeed if tried again.
+
+    Busy or locked files, timeouts and network errors are transient, and so is a
+    copy that failed verification. Missing files, denied permissions, a full disk
+    and anything that isn't an OS error are permanent.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError, VerificationError)):
+        return True
+    if not isinstance(error, OSError):
+        return False
+    if getattr(error, 'winerror', None) in TRANSIENT_WINERRORS:
+        return True
+    return error.errno in TRANSIENT_ERRNOS
+
+
+class FailedTransfer(NamedTuple):
+    """A file that could not be transferred, for the end-of-run report"""
+    path: str  # Relative to the destination
+    error: str
+    errno: Optional[int]
+    transient: bool
+    attempts: int
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class RetryScheduler:
+    """
+    Runs callbacks after a delay, all from one timer thread.
+
+    Used to put failed transfers back in a lane once their backoff is over, so
+    no worker thread sleeps while a file waits for its next attempt.
+    """
+
+    def __init__(self):
+        self._due = []  # Heap of (time, sequence, callback, args)
+        self._sequence = itertools.count()
+        self._running = 0  # Callbacks taken off the heap and not returned yet
+        self._changed = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def pending(self) -> int:
+        """Callbacks scheduled or running"""
+        with self._changed:
+            return len(self._due) + self._running
+
+    def start(self):
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name='fileporta-retry')
+        self._thread.start()
+
+    def schedule(self, delay: float, callback: Callable, *args) -> None:
+        with self._changed:
+            heapq.heappush(self._due, (time.monotonic() + delay, next(self._sequence), callback, args))
+            self._changed.notify_all()
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Wait until nothing is scheduled or running; False on timeout"""
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._due and not self._running, timeout)
+
+    def shutdown(self) -> None:
+        """Stop the timer thread, dropping callbacks that are not due yet"""
+        with self._changed:
+            self._stopped = True
+            self._due.clear()
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while not self._stopped:
+                    if self._due and self._due[0][0] <= time.monotonic():
+                        break
+                    self._changed.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                if self._stopped:
+                    return
+                _, _, callback, args = heapq.heappop(self._due)
+                self._running += 1
+            try:
+                callback(*args)
+            finally:
+                with self._changed:
+                    self._running -= 1
+                    self._changed.notify_all()
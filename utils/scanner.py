@@ -0,0 +1,140 @@
+import os
+from typing import Callable, Iterator, List, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from constants.constants import STATE_DIRNAME, BatchItem
+from utils.ignore_matcher import IgnoreMatcher
+
+
+class _Listing(NamedTuple):
+    dirs: List[os.DirEntry]   # Subdirectories kept after ignore patterns
+    files: List[BatchItem]    # Files kept after ignore patterns, with size and mtime
+    filtered: bool            # Whether any entry was ignored
+
+
+class _PendingDir(NamedTuple):
+    path: str
+    rel_path: str
+    dest_path: str
+    depth: int
+
+
+class DirectoryScanner:
+    """
+    Walks a source tree with os.scandir, listing directories on a thread pool.
+
+    Items come out in the same order os.walk would give: each directory,
+    then its files, then its subdirectories' subtrees. Listing the next few
+    directories on the stack (and stat-ing their files) happens ahead of time
+    on the pool, which hides per-directory latency on network shares and USB
+    drives. DirEntry type information is reused, so classifying an entry
+    costs no extra syscall.
+    """
+    PREFETCH = 32  # Directories listed ahead of the one being yielded
+
+    def __init__(self, source_dir: str, dest_dir: str, matcher: IgnoreMatcher, workers: int = 8,
+                 max_depth: Optional[int] = 5, should_stop: Optional[Callable[[], bool]] = None,
+                 initializer: Optional[Callable[[], None]] = None, rel_root: str = ''):
+        """
+        Args:
+            source_dir (str): Directory to scan
+            dest_dir (str): Directory the scanned items are transferred to
+            matcher (IgnoreMatcher): Compiled ignore patterns
+            workers (int): Threads listing directories. Defaults to 8
+            max_depth (Optional[int]): Directories at this depth or deeper are not
+                transferred; None for no limit. Defaults to 5
+            should_stop (Optional[Callable[[], bool]]): Polled to end the scan early
+            initializer (Optional[Callable[[], None]]): Run by each listing thread when it starts
+            rel_root (str): Where source_dir is in the tree the ignore patterns are relative
+                to, '/'-separated, when scanning a subtree of it. Defaults to '' (the root)
+        """
+        self.source_dir = source_dir
+        self.dest_dir = dest_dir
+        self.matcher = matcher
+        self.workers = workers
+        self.max_depth = max_depth
+        self.should_stop = should_stop or (lambda: False)
+        self.initializer = initializer
+        self.rel_root = rel_root
+
+    def scan(self) -> Iterator[BatchItem]:
+        """Yield directory and file items to transfer, as they are found"""
+        if self.max_depth is not None and self.max_depth <= 0:
+            return
+        if self.matcher.matches(self.rel_root or '.', True):
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+        with pool:
+            stack = [_PendingDir(self.source_dir, self.rel_root, self.dest_dir, 0)]
+            listings = {}
+
+            try:
+                while stack:
+                    if self.should_stop():
+                        return
+
+                    # Keep the directories about to be visited listing in the background
+                    for pending in stack[-self.PREFETCH:]:
+                        if pending.path not in listings:
+                            listings[pending.path] = pool.submit(self._list, pending)
+
+                    pending = stack.pop()
+                    listing = listings.pop(pending.path).result()
+                    if listing is None:
+                        continue  # Unreadable, skipped like os.walk does
+
+                    # Subdirectories past max_depth are not transferred
+                    descend = self.max_depth is None or pending.depth + 1 < self.max_depth
+                    filtered = listing.filtered or (not descend and bool(listing.dirs))
+                    # Symlinked directories are not followed
+                    filtered = filtered or any(entry.is_symlink() for entry in listing.dirs)
+
+                    yield BatchItem(pending.path, pending.dest_path, True, filtered=filtered)
+                    yield from listing.files
+
+                    if descend:
+                        rel_prefix = pending.rel_path + '/' if pending.rel_path else ''
+                        children = [
+                            _PendingDir(entry.path, rel_prefix + entry.name,
+                                        os.path.join(pending.dest_path, entry.name), pending.depth + 1)
+                            for entry in listing.dirs if not entry.is_symlink()
+                        ]
+                        stack.extend(reversed(children))
+            finally:
+                for future in listings.values():
+                    future.cancel()
+
+    def _list(self, pending: _PendingDir) -> Optional[_Listing]:
+        """List one directory, apply ignore patterns and stat the files that are kept"""
+        rel_prefix = pending.rel_path + '/' if pending.rel_path else ''
+        dirs, files = [], []
+        filtered = False
+
+        try:
+            with os.scandir(pending.path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if self.matcher.matches(rel_prefix + entry.name, is_dir):
+                        filtered = True
+                    elif not rel_prefix and entry.name == STATE_DIRNAME:
+                        filtered = True  # FilePorta's own state, e.g. left by a transfer into this source
+                    elif is_dir:
+                        dirs.append(entry)
+                    else:
+                        try:
+                            stat = entry.stat()
+                            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+                        except OSError:
+                            size, mtime_ns = 0, 0  # Let the transfer report the problem
+                        files.append(BatchItem(
+                            entry.path, os.path.join(pending.dest_path, entry.name), False, size, mtime_ns
+                        ))
+        except OSError:
+            return None
+
+        return _Listing(dirs, files, filtered)
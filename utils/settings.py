@@ -0,0 +1,253 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Any, Dict, Optional, Set, Tuple
+
+from constants.constants import EngineDefaults, JobDefaults, WatchDefaults
+from utils.copy_engine import CopyEngine
+
+SETTINGS_FILE = 'settings.json'
+
+KB = 1024
+MB = 1024 * 1024
+
+def _setting(default, minimum=None, choices=None):
+    return field(default=default, metadata={'min': minimum, 'choices': choices})
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Everything settings.json holds, typed and checked.
+
+    Keys match the file's; a key missing from the file gets the default here,
+    which is the engine's, the watcher's or the job manager's (see
+    constants.constants). Instances are immutable, so one loaded copy is
+    shared by every page; derive changed settings with dataclasses.replace or
+    with_preset.
+    """
+    ignore_patterns: str = "node_modules/\n.git/\nenv/\n.next/"
+
+    # Transfer engine
+    max_workers: int = _setting(EngineDefaults.MAX_WORKERS, minimum=1)
+    large_file_workers: int = _setting(EngineDefaults.LARGE_FILE_WORKERS, minimum=1)
+    large_file_threshold: int = _setting(EngineDefaults.LARGE_FILE_THRESHOLD, minimum=1)
+    chunk_size: int = _setting(CopyEngine.DEFAULT_CHUNK_SIZE, minimum=4 * KB)
+    queue_size: int = _setting(EngineDefaults.QUEUE_SIZE, minimum=1)
+    batch_size: int = _setting(EngineDefaults.BATCH_SIZE, minimum=1)
+    scan_workers: int = _setting(EngineDefaults.SCAN_WORKERS, minimum=1)
+    scan_depth: int = _setting(EngineDefaults.MAX_DEPTH, minimum=0)  # 0 for no limit
+    max_retries: int = _setting(EngineDefaults.MAX_RETRIES, minimum=1)
+    retry_delay: float = _setting(EngineDefaults.RETRY_DELAY, minimum=0)
+
+    # Limits; 0 is unlimited
+    bandwidth_limit: int = _setting(0, minimum=0)
+    files_per_second: float = _setting(0.0, minimum=0)
+    low_priority: bool = False
+
+    compare_hashes: bool = False
+    dedup: str = _setting('off', choices=('off', 'hardlink', 'reflink'))
+    verify_workers: int = _setting(EngineDefaults.VERIFY_WORKERS, minimum=1)
+    aggregate_below: int = _setting(0, minimum=0)  # 0 copies every file on its own
+    aggregate_compression: str = _setting('none', choices=('none', 'gzip', 'zstd'))
+    max_jobs: int = _setting(JobDefaults.MAX_JOBS, minimum=1)
+    plan_probe: bool = True  # Measure throughput for the plan's time estimate
+
+    metrics_path: Optional[str] = None
+    metrics_stream: Optional[str] = None
+    profile: Tuple[str, ...] = _setting((), choices=('cpu', 'memory'))
+    profile_dir: Optional[str] = None
+
+    # Watch mode
+    watch_backend: str = _setting('auto', choices=WatchDefaults.BACKENDS)
+    watch_debounce: float = _setting(WatchDefaults.DEBOUNCE, minimum=0)
+    watch_max_delay: float = _setting(WatchDefaults.MAX_DELAY, minimum=0)
+    watch_poll_interval: float = _setting(WatchDefaults.POLL_INTERVAL, minimum=0.1)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], strict: bool = False) -> 'Settings':
+        """
+        Settings from a dict as stored in settings.json; unknown keys are left out.
+
+        Args:
+            data (Dict[str, Any]): Values by key
+            strict (bool): Raise ValueError for a bad value. Otherwise it is logged
+                and the default used, so one typo doesn't stop the app. Defaults to False
+        """
+        values = {}
+        for setting in fields(cls):
+            if setting.name not in data:
+                continue
+            try:
+                values[setting.name] = _check(setting, data[setting.name])
+            except ValueError as e:
+                if strict:
+                    raise
+                logging.warning(f"Ignoring setting {e}; using {setting.default!r}")
+        return cls(**values)
+
+    @classmethod
+    def limits(cls, name: str) -> Tuple[Any, Optional[Tuple[str, ...]]]:
+        """(minimum, choices) a setting allows; None where it has none"""
+        metadata = next(setting.metadata for setting in fields(cls) if setting.name == name)
+        return metadata.get('min'), metadata.get('choices')
+
+    def to_dict(self) -> Dict[str, Any]:
+        settings = asdict(self)
+        settings['profile'] = list(self.profile)
+        return settings
+
+    def with_preset(self, name: str) -> 'Settings':
+        """These settings with a preset's tunables applied"""
+        return replace(self, **PRESETS[name])
+
+    def patterns(self) -> Set[str]:
+        """The ignore patterns, one per line"""
+        return {pattern.strip() for pattern in self.ignore_patterns.split('\n') if pattern.strip()}
+
+    def engine_options(self) -> Dict[str, Any]:
+        """Keyword arguments for TransferEngine that come from settings"""
+        return dict(
+            max_workers=self.max_workers,
+            queue_size=self.queue_size,
+            large_file_workers=self.large_file_workers,
+            large_file_threshold=self.large_file_threshold,
+            compare_hashes=self.compare_hashes,
+            chunk_size=self.chunk_size,
+            scan_workers=self.scan_workers,
+            batch_size=self.batch_size,
+            max_depth=self.scan_depth,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+            dedup=self.dedup,
+            verify_workers=self.verify_workers,
+            metrics_path=self.metrics_path,
+            metrics_stream=self.metrics_stream,
+            profile=self.profile,
+            profile_dir=self.profile_dir,
+            bandwidth_limit=self.bandwidth_limit,
+            files_per_second=self.files_per_second,
+            low_priority=self.low_priority,
+            aggregate_below=self.aggregate_below,
+            aggregate_compression=self.aggregate_compression
+        )
+
+
+# Tunables for common kinds of destination, offered on the Settings page
+PRESETS: Dict[str, Dict[str, Any]] = {
+    # One spindle: parallel writers only make the head seek, so keep a few deep sequential streams
+    'USB HDD': dict(
+        max_workers=2, large_file_workers=1, scan_workers=2,
+        chunk_size=4 * MB, queue_size=1000
+    ),
+    # Deep device queues: many threads keep them full
+    'NVMe SSD': dict(
+        max_workers=16, large_file_workers=4, scan_workers=16,
+        chunk_size=8 * MB, queue_size=5000
+    ),
+    # Every file costs round trips: keep many in flight and ride out dropped connections
+    'Network share': dict(
+        max_workers=128, large_file_workers=4,
+        scan_workers=32, chunk_size=4 * MB, queue_size=5000, max_retries=5, retry_delay=2.0
+    ),
+}
+
+
+_cache: Dict[str, Tuple[Tuple[int, int], Settings]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_settings(path: str = SETTINGS_FILE) -> Settings:
+    """
+    Settings from a JSON file, or the defaults if there is none.
+
+    The file is parsed again only when its mtime or size changes, so callers
+    can load settings whenever they need a value.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return Settings()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    try:
+        settings = Settings.from_dict(_read(path))
+    except ValueError as e:  # Includes malformed JSON
+        logging.warning(f"Could not read {path}, using default settings: {e}")
+        settings = Settings()
+    with _cache_lock:
+        _cache[path] = (signature, settings)
+    return settings
+
+
+def save_settings(settings: Settings, path: str = SETTINGS_FILE) -> None:
+    """
+    Write settings to a JSON file, keeping any keys the file has that Settings
+    doesn't know. The file is replaced in one rename, so a crash leaves either
+    the old settings or the new ones.
+    """
+    try:
+        data = _read(path)
+    except (FileNotFoundError, ValueError):
+        data = {}
+    data.update(settings.to_dict())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.settings-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    with _cache_lock:
+        _cache.pop(path, None)
+
+
+def _read(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("settings must be a JSON object")
+    return data
+
+
+def _check(setting, value):
+    """value converted to the setting's type, or ValueError"""
+    name, default = setting.name, setting.default
+    minimum, choices = setting.metadata.get('min'), setting.metadata.get('choices')
+    if setting.type == Optional[str]:
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{name}: expected a string or null, got {value!r}")
+        return value or None
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{name}: expected true or false, got {value!r}")
+        return value
+    if isinstance(default, tuple):
+        if not isinstance(value, (list, tuple)) or any(item not in choices for item in value):
+            raise ValueError(f"{name}: expected a list of {', '.join(choices)}, got {value!r}")
+        return tuple(value)
+    if isinstance(default, (int, float)):
+        if value is None:
+            return default  # Older files store null for "use the default"
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or \
+                (isinstance(default, int) and value != int(value)):
+            raise ValueError(f"{name}: expected a number, got {value!r}")
+        value = type(default)(value)
+        if minimum is not None and value < minimum:
+            raise ValueError(f"{name}: must be at least {minimum}, got {value!r}")
+        return value
+    if not isinstance(value, str) or (choices and value not in choices):
+        expected = f"one of {', '.join(choices)}" if choices else "a string"
+        raise ValueError(f"{name}: expected {expected}, got {value!r}")
+    return value
@@ -0,0 +1,1234 @@
+import os 
+import json
+import stat
+import time 
+import errno
+import shutil 
+import hashlib
+import logging
+import threading
+import multiprocessing
+from contextlib import closing
+from queue import Queue, Empty, Full
+from typing import Set, List, Optional, Iterable, Iterator, Callable, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait
+
+from constants.constants import BatchItem, EngineDefaults, ProgressSnapshot, STATE_DIRNAME
+from utils.ignore_matcher import IgnoreMatcher
+from utils.scanner import DirectoryScanner
+from utils.item_store import ItemStore
+from utils.manifest import TransferManifest
+from utils.journal import TransferJournal
+from utils.copy_engine import CopyEngine, TransferCancelled
+from utils.progress import ProgressTracker
+from utils.dedup import DedupIndex
+from utils.verify import VerificationError, VerifyReport, read_back_digest
+from utils.metrics import TransferMetrics, Profiler
+from utils.rate_limiter import TokenBucket
+from utils.aggregator import PackedFile, TarStream, unpack_member
+from utils.priority import lower_thread_priority
+from utils.retry import FailedTransfer, RetryScheduler, is_transient
+from utils.utils import format_bytes
+
+class TransferListener:
+    """Receives a TransferEngine's events; override the ones you need"""
+    
+    def on_progress(self, percent: int):
+        pass
+    
+    def on_stats(self, snapshot: ProgressSnapshot):
+        pass
+    
+    def on_status(self, message: str):
+        pass
+    
+    def on_error(self, message: str):
+        pass
+    
+    def on_metrics(self, summary: dict):
+        pass
+    
+    def on_finished(self):
+        pass
+
+class _TransferLane:
+    """
+    A pool of transfer threads with its own bound on queued and in-flight transfers.
+    
+    The threads may belong to an executor shared with other engines; the lane
+    then waits for, or cancels, only the transfers it submitted.
+    """
+    
+    def __init__(self, workers: int, capacity: int, executor: Optional[ThreadPoolExecutor] = None):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(capacity)
+        self.shared = executor is not None
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.futures = set()  # Submitted transfers not finished yet
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self.futures)
+    
+    def start(self, initializer: Optional[Callable[[], None]] = None):
+        """Start the lane's own threads; a shared executor's threads are set up by its owner"""
+        if not self.shared:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, initializer=initializer)
+    
+    def submit(self, fn, *args) -> Future:
+        future = self.executor.submit(fn, *args)
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+    
+    def _discard(self, future: Future):
+        with self.lock:
+            self.futures.discard(future)
+    
+    def shutdown(self, cancel: bool):
+        if self.shared:
+            with self.lock:
+                futures = list(self.futures)
+            if cancel:
+                for future in futures:
+                    future.cancel()
+            wait(futures)
+        elif self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=cancel)
+
+class _OpenSubtree:
+    """A directory still being scanned, whose items are held back while it may be moved whole"""
+    
+    def __init__(self, item: BatchItem, buffering: bool):
+        self.item = item
+        self.buffer = [] if buffering else None
+
+class TransferEngine(EngineDefaults):
+    """Scans a source directory and copies or moves it to a destination, reporting to a listener"""
+    
+    # Worker counts, queue and batch sizes, depth and retries default to EngineDefaults
+    IN_FLIGHT_PER_WORKER = 2  # Small-file transfers submitted ahead of each worker thread
+    
+    # FAT/exFAT targets store mtimes with 2 second resolution
+    MTIME_TOLERANCE_NS = 2 * 10**9
+    
+    # Files are written under a temporary name and renamed into place when complete
+    PART_SUFFIX = '.fileporta-part'
+    CHECKPOINT_BYTES = 64 * 1024 * 1024  # Bytes synced between journal checkpoints
+    
+    PROGRESS_INTERVAL = 0.25  # Seconds between progress reports
+    
+    # Transient errors are retried after a backoff, without holding a worker thread;
+    # permanent ones, and files out of attempts, go into the failure report (see
+    # EngineDefaults for the attempts and the backoff)
+    FAILURE_REPORT = 'failures.json'  # Written under the destination's state directory
+    FAILURES_LISTED = 10  # Failures named in the end-of-run error; the report has them all
+    
+    SUBTREE_BUFFER_LIMIT = 10000  # Items held back while waiting to move a directory in one rename
+    
+    # With aggregate_below set, small files are carried in groups through one tar stream
+    AGGREGATE_FILES = 1000  # Files per stream
+    AGGREGATE_BYTES = 32 * 1024 * 1024  # Bytes per stream
+    
+    VERIFY_REPORT = 'verify-report.json'  # Written under the destination's state directory by default
+    
+    # Marks the end of the scan in the transfer queue
+    _SCAN_DONE = object()
+    
+    def __init__(self, source_dir: str, dest_dir: str, ignore_patterns: Set[str], operation: str = 'copy',
+                 streaming: bool = True, max_workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 large_file_workers: Optional[int] = None, large_file_threshold: Optional[int] = None,
+                 incremental: bool = False, compare_hashes: bool = False, chunk_size: Optional[int] = None,
+                 scan_workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_depth: Optional[int] = None, max_retries: Optional[int] = None,
+                 retry_delay: Optional[float] = None, dedup: Optional[str] = None,
+                 verify: bool = False, verify_workers: Optional[int] = None,
+                 verify_report: Optional[str] = None, metrics_path: Optional[str] = None,
+                 metrics_stream: Optional[str] = None, profile: Sequence[str] = (),
+                 profile_dir: Optional[str] = None, bandwidth_limit: Optional[int] = None,
+                 files_per_second: Optional[float] = None, low_priority: bool = False,
+                 aggregate_below: Optional[int] = None, aggregate_compression: Optional[str] = None,
+                 paths: Optional[Iterable[str]] = None,
+                 shared_pools: Optional[Tuple[ThreadPoolExecutor, ThreadPoolExecutor]] = None,
+                 listener: Optional[TransferListener] = None):
+        """
+        Initialize the engine with batch processing capabilities.
+        
+        Args:
+            source_dir (str): Source directory path
+            dest_dir (str): Destination directory path
+            ignore_patterns (Set[str]): Set of patterns to ignore
+            operation (str): 'copy' or 'move'. Defaults to 'copy'
+            streaming (bool): Start transferring while the scan is still running.
+                When False the whole tree is scanned first. Defaults to True
+            max_workers (Optional[int]): Number of threads copying small files. Defaults to MAX_WORKERS
+            queue_size (Optional[int]): Depth of the transfer queue. Defaults to QUEUE_SIZE
+            large_file_workers (Optional[int]): Number of threads copying large files.
+                Defaults to LARGE_FILE_WORKERS
+            large_file_threshold (Optional[int]): Size in bytes from which a file goes to the
+                large-file lane. Defaults to LARGE_FILE_THRESHOLD
+            incremental (bool): Only copy files that are new or changed since they were last
+                copied, tracked in a manifest under the destination. Defaults to False
+            compare_hashes (bool): In incremental mode, compare file content when the size
+                matches but the mtime does not. Defaults to False
+            chunk_size (Optional[int]): Bytes copied per chunk. Defaults to CopyEngine.DEFAULT_CHUNK_SIZE
+            scan_workers (Optional[int]): Number of threads listing source directories.
+                Defaults to SCAN_WORKERS
+            batch_size (Optional[int]): Most files handed to the transfer lanes at a time.
+                Defaults to BATCH_SIZE
+            max_depth (Optional[int]): Directories at this depth or deeper are not
+                transferred; 0 for no limit. Defaults to MAX_DEPTH
+            max_retries (Optional[int]): Attempts per file; only transient errors (see
+                utils.retry.is_transient) are retried. Defaults to MAX_RETRIES
+            retry_delay (Optional[float]): Seconds before the first retry, doubled for each
+                one after. Defaults to RETRY_DELAY
+            dedup (Optional[str]): 'hardlink' or 'reflink' to write identical files once and
+                link the duplicates to it; None or 'off' copies every file. Hardlinked
+                duplicates share one set of timestamps and permissions. Defaults to None
+            verify (bool): Hash each file while copying it, read the copy back from the
+                destination and compare before putting it in place; a mismatch is
+                retried. Defaults to False
+            verify_workers (Optional[int]): Number of processes reading copies back.
+                Defaults to VERIFY_WORKERS
+            verify_report (Optional[str]): Where to write the JSON verification report.
+                Defaults to VERIFY_REPORT in the destination's state directory
+            metrics_path (Optional[str]): File the JSON metrics summary is written to when
+                the run ends; it is always passed to the listener's on_metrics
+            metrics_stream (Optional[str]): File that gets a JSON line of live metrics
+                with every progress report
+            profile (Sequence[str]): 'cpu' to run cProfile, 'memory' to run tracemalloc.
+                Profiling also times every ignore-pattern match into the metrics
+            profile_dir (Optional[str]): Where profiling output goes. Defaults to the
+                current directory
+            bandwidth_limit (Optional[int]): Bytes per second copied by all threads together;
+                None or 0 for no limit. Can be changed during the run
+            files_per_second (Optional[float]): Files started per second; None or 0 for no
+                limit. Can be changed during the run
+            low_priority (bool): Run the engine's threads at the lowest CPU and I/O
+                priority (Linux). Defaults to False
+            aggregate_below (Optional[int]): Size in bytes under which files are copied in
+                groups through a tar stream rather than one by one; None or 0 for never
+            aggregate_compression (Optional[str]): 'none', 'gzip' or 'zstd' for the tar
+                streams. Defaults to 'none'
+            paths (Optional[Iterable[str]]): Transfer only these '/'-separated paths relative
+                to the source (files, and directories with everything in them) instead of
+                scanning the whole source. Used to pass on changes seen by a watcher
+            shared_pools (Optional[Tuple[ThreadPoolExecutor, ThreadPoolExecutor]]): Small-file
+                and large-file executors shared with other engines (see JobManager), used
+                instead of threads of this engine's own. Their owner sets up their threads,
+                e.g. lowers their priority; CPU profiling them is not supported before Python 3.12
+            listener (Optional[TransferListener]): Receives progress, status and errors
+        """
+        self.listener = listener or TransferListener()
+        self.source_dir = source_dir
+        self.dest_dir = dest_dir
+        self._dest_prefix = os.path.join(dest_dir, '')
+        self.ignore_patterns = self._process_patterns(ignore_patterns)
+        self.should_stop = False
+        self.operation = operation.lower()
+        self.streaming = streaming
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.queue_size = queue_size or self.QUEUE_SIZE
+        self.scan_workers = scan_workers or self.SCAN_WORKERS
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.max_depth = self.MAX_DEPTH if max_depth is None else max_depth
+        self.max_retries = max_retries or self.MAX_RETRIES
+        self.retry_delay = self.RETRY_DELAY if retry_delay is None else retry_delay
+        self.transfer_queue = Queue(maxsize=self.queue_size)
+        self.large_file_threshold = large_file_threshold or self.LARGE_FILE_THRESHOLD
+        # A large file waiting for its lane costs only a BatchItem, so the large lane can
+        # hold a deep backlog and small files keep flowing past it
+        small_pool, large_pool = shared_pools or (None, None)
+        self.small_lane = _TransferLane(
+            self.max_workers, self.max_workers * self.IN_FLIGHT_PER_WORKER, small_pool
+        )
+        self.large_lane = _TransferLane(large_file_workers or self.LARGE_FILE_WORKERS, self.queue_size, large_pool)
+        self.progress_lock = threading.Lock()
+        self.processed_count = 0
+        self.total_items = 0
+        self.scan_complete = False
+        self.scan_error = None
+        self.incremental = incremental
+        self.compare_hashes = compare_hashes
+        self.manifest = None
+        self.journal = None
+        self.skipped_count = 0
+        self.resumed_count = 0
+        self.failed_count = 0
+        self.failures: List[FailedTransfer] = []
+        self.failure_report_path = os.path.join(dest_dir, STATE_DIRNAME, self.FAILURE_REPORT)
+        self.retries = RetryScheduler()
+        self.tracker = ProgressTracker(self.PROGRESS_INTERVAL)
+        self.emptied_dirs = []
+        self.bandwidth_limiter = TokenBucket(bandwidth_limit)
+        self.file_limiter = TokenBucket(files_per_second)
+        self.low_priority = low_priority
+        self.aggregate_below = aggregate_below or 0
+        self.tar_stream = TarStream(aggregate_compression) if self.aggregate_below else None
+        self._pack = []  # Small files waiting to fill a tar stream
+        self._pack_bytes = 0
+        self.paths = None if paths is None else set(paths)
+        self.copy_engine = CopyEngine(
+            chunk_size, should_stop=lambda: self.should_stop, rate_limiter=self.bandwidth_limiter
+        )
+        self.dedup_mode = None if dedup in (None, 'off') else dedup
+        self.dedup = None
+        self.verify = verify
+        self.verify_workers = verify_workers or self.VERIFY_WORKERS
+        self.verify_report_path = verify_report or os.path.join(dest_dir, STATE_DIRNAME, self.VERIFY_REPORT)
+        self.verify_report = None
+        self.verify_pool = None
+        self.metrics = TransferMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_stream = metrics_stream
+        self.metrics_summary = None
+        self.profiler = Profiler(profile, profile_dir or '.') if profile else None
+        # Timing each match costs a lock and two clock reads on the scan's hot path,
+        # so it is only done when the metrics are written out or profiled
+        self.time_ignores = bool(metrics_path or metrics_stream) or self.profiler is not None
+        
+        if self.operation not in ['copy', 'move']:
+            raise ValueError("Operation must be either 'copy' or 'move'")
+        if self.incremental and self.operation != 'copy':
+            raise ValueError("Incremental transfers are only supported for the 'copy' operation")
+        if self.dedup_mode not in (None, 'hardlink', 'reflink'):
+            raise ValueError("Dedup must be 'off', 'hardlink' or 'reflink'")
+        if self.dedup_mode and self.operation != 'copy':
+            raise ValueError("Deduplication is only supported for the 'copy' operation")
+        if self.aggregate_below and self.operation != 'copy':
+            raise ValueError("Small-file aggregation is only supported for the 'copy' operation")
+        if self.aggregate_below and (self.dedup_mode or self.verify):
+            raise ValueError("Small-file aggregation can't be combined with dedup or verify")
+        if shared_pools and self.profiler is not None and 'cpu' in self.profiler.modes and self.profiler.per_thread:
+            raise ValueError("CPU profiling needs the engine's own threads, so it can't be used with shared pools")
+    
+    def _process_patterns(self, patterns: Set[str]) -> Set[str]:
+        """Process the ignore patterns to handle different formats and compile the matcher"""
+        processed = set()
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if pattern and not pattern.startswith('#'):
+                if pattern.endswith('/'):
+                    pattern = pattern[:-1]
+                if not pattern.endswith('/*'):
+                    processed.add(pattern)
+                    processed.add(f"{pattern}/*")
+                else:
+                    processed.add(pattern)
+        
+        self.ignore_matcher = IgnoreMatcher(processed)
+        return processed
+
+    def _relative_path(self, path: str) -> str:
+        rel_path = os.path.relpath(path, self.source_dir)
+        return rel_path.replace(os.sep, '/')
+
+    def should_ignore(self, path: str, is_dir: Optional[bool] = None) -> bool:
+        """
+        Check if a path should be ignored based on ignore patterns.
+
+        Args:
+            path (str): Path inside the source directory
+            is_dir (Optional[bool]): Whether the path is a directory. Looked up
+                on disk when not given; every parent is assumed to be a directory.
+        """
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        return self.ignore_matcher.matches(self._relative_path(path), is_dir)
+
+    def scan_directory(self, max_depth: Optional[int] = None) -> ItemStore:
+        """Scan directory and return the items to transfer, with an optional depth limit"""
+        return ItemStore(self.iter_scan(max_depth))
+
+    def _scan_matcher(self):
+        """The ignore matcher for scans, timed into the metrics if time_ignores is set"""
+        if self.time_ignores:
+            return self.metrics.timed_matcher(self.ignore_matcher)
+        return self.ignore_matcher
+
+    def _depth_limit(self, max_depth: Optional[int]) -> Optional[int]:
+        """The scanner's depth limit for a max_depth argument: None is the engine's, 0 no limit"""
+        if max_depth is None:
+            max_depth = self.max_depth
+        return max_depth or None
+
+    def iter_scan(self, max_depth: Optional[int] = None) -> Iterator[BatchItem]:
+        """Walk the source directory and yield items to transfer as they are found"""
+        scanner = DirectoryScanner(
+            self.source_dir, self.dest_dir, self._scan_matcher(),
+            self.scan_workers, self._depth_limit(max_depth), should_stop=lambda: self.should_stop,
+            initializer=self._thread_started
+        )
+        return scanner.scan()
+
+    def iter_paths(self, rel_paths: Iterable[str], max_depth: Optional[int] = None) -> Iterator[BatchItem]:
+        """
+        Items for some paths in the source: files, and directories scanned in full,
+        each preceded by its parent directory. Paths that are gone, ignored or deeper
+        than a scan would go are dropped, and so are paths inside a listed directory.
+        """
+        max_depth = self._depth_limit(max_depth)
+        matcher = self._scan_matcher()
+        scanned, parents = set(), set()
+        for rel_path in sorted(rel_paths):
+            if self.should_stop:
+                return
+            parts = rel_path.split('/')
+            if parts[0] == STATE_DIRNAME:
+                continue  # FilePorta's own state, as in a full scan
+            if any('/'.join(parts[:i]) in scanned for i in range(1, len(parts))):
+                continue
+            src = os.path.join(self.source_dir, *parts)
+            dst = os.path.join(self.dest_dir, *parts)
+            try:
+                st = os.stat(src)
+            except OSError:
+                continue  # Removed again since it changed
+            is_dir = stat.S_ISDIR(st.st_mode)
+            depth = len(parts) if is_dir else len(parts) - 1
+            if (max_depth is not None and depth >= max_depth) or matcher.matches(rel_path, is_dir):
+                continue
+            if is_dir and os.path.islink(src):
+                continue  # Symlinked directories are not followed
+            
+            parent = os.path.dirname(src)
+            if parent not in parents:
+                parents.add(parent)
+                # Only some of its entries follow, so a move must not rename it whole
+                yield BatchItem(parent, os.path.dirname(dst), True, filtered=True)
+            if is_dir:
+                scanned.add(rel_path)
+                yield from DirectoryScanner(
+                    src, dst, matcher, self.scan_workers, None if max_depth is None else max_depth - depth,
+                    should_stop=lambda: self.should_stop, initializer=self._thread_started, rel_root=rel_path
+                ).scan()
+            else:
+                yield BatchItem(src, dst, False, st.st_size, st.st_mtime_ns)
+
+    def _iter_items(self) -> Iterator[BatchItem]:
+        """Scanned items, with whole directories folded into renames for same-filesystem moves"""
+        items = self.iter_scan() if self.paths is None else self.iter_paths(self.paths)
+        if self.operation == 'move' and self._same_device():
+            items = self._fold_subtrees(items)
+        return items
+
+    def _same_device(self) -> bool:
+        """Whether the destination is on the same filesystem as the source (st_dev)"""
+        probe = os.path.abspath(self.dest_dir)
+        while not os.path.exists(probe):
+            parent = os.path.dirname(probe)
+            if parent == probe:
+                return False
+            probe = parent
+        return os.stat(probe).st_dev == os.stat(self.source_dir).st_dev
+
+    def _fold_subtrees(self, items: Iterator[BatchItem]) -> Iterator[BatchItem]:
+        """
+        Replace directories whose whole subtree is transferred with single rename items.
+
+        A directory's items are held back until its subtree has been scanned. If
+        nothing in it was left out they become the children of one item that moves
+        the directory with a single rename. Once SUBTREE_BUFFER_LIMIT items are
+        held back they are released as they are, so the scan keeps streaming.
+        """
+        stack: List[_OpenSubtree] = []
+        buffered = 0
+        
+        def close_subtree() -> Optional[BatchItem]:
+            """Pop the innermost subtree; returns its folded item if its parent isn't holding items back"""
+            nonlocal buffered
+            closed = stack.pop()
+            if closed.buffer is None:
+                return None
+            buffered -= len(closed.buffer)
+            folded = BatchItem(
+                closed.item.src, closed.item.dst, True,
+                size=sum(child.size for child in closed.buffer),
+                children=[closed.item] + closed.buffer
+            )
+            if stack and stack[-1].buffer is not None:
+                stack[-1].buffer.append(folded)
+                buffered += 1
+                return None
+            return folded
+        
+        def release() -> Iterator[BatchItem]:
+            """Give up on renaming any open subtree and pass their items on in scan order"""
+            nonlocal buffered
+            for subtree in stack:
+                if subtree.buffer is not None:
+                    yield subtree.item
+                    yield from subtree.buffer
+                    subtree.buffer = None
+            buffered = 0
+        
+        for item in items:
+            if item.is_directory:
+                while stack and not item.src.startswith(os.path.join(stack[-1].item.src, '')):
+                    folded = close_subtree()
+                    if folded is not None:
+                        yield folded
+                
+                if stack and not item.filtered:
+                    stack.append(_OpenSubtree(item, buffering=True))
+                else:
+                    # The source root, and anything with entries left behind, is never renamed
+                    yield from release()
+                    stack.append(_OpenSubtree(item, buffering=False))
+                    yield item
+            elif stack[-1].buffer is None:
+                yield item
+            else:
+                stack[-1].buffer.append(item)
+                buffered += 1
+            
+            if buffered > self.SUBTREE_BUFFER_LIMIT:
+                yield from release()
+        
+        while stack:
+            folded = close_subtree()
+            if folded is not None:
+                yield folded
+
+    def process_batch(self, batch: List[BatchItem]) -> None:
+        """Hand a batch of transfers to the worker pool without waiting for it to finish"""
+        for item in batch:
+            if self.should_stop:
+                break
+            
+            if item.children is not None:
+                # A whole directory on the same filesystem: one rename, else its items one by one
+                if not self._rename_subtree(item):
+                    self.process_batch(item.children)
+            elif item.is_directory:
+                try:
+                    os.makedirs(item.dst, exist_ok=True)
+                except Exception as e:
+                    self._add_failure(item, e, 1)
+                    continue
+                if self.operation == 'move':
+                    self.emptied_dirs.append(item.src)
+            elif item.size < self.aggregate_below:
+                self._add_to_pack(item)
+            else:
+                self._submit_transfer(item)
+
+    def _rename_subtree(self, item: BatchItem) -> bool:
+        """Move a folded directory with a single rename; False if the caller should move its items instead"""
+        try:
+            os.rename(item.src, item.dst)
+        except OSError:
+            return False  # e.g. the destination already exists
+        
+        files = self._count_files(item)
+        with self.progress_lock:
+            self.processed_count += files
+        # A rename moves no data, so it must not count towards the byte rate or the ETA
+        self._report(self.tracker.add_bytes(item.size, moved=False))
+        self._report(self.tracker.add_file(files))
+        return True
+
+    @classmethod
+    def _count_files(cls, item: BatchItem) -> int:
+        if item.children is None:
+            return 0 if item.is_directory else 1
+        return sum(cls._count_files(child) for child in item.children)
+
+    def _add_to_total(self, item: BatchItem) -> None:
+        """Count the files in a scanned item towards the running totals"""
+        if item.children is not None:
+            for child in item.children:
+                self._add_to_total(child)
+        elif not item.is_directory:
+            self.total_items += 1
+            self.tracker.add_total(item.size)
+
+    def _acquire_slot(self, lane: _TransferLane) -> bool:
+        """Wait for a free slot in a lane; False if the transfer was stopped first"""
+        while not lane.slots.acquire(timeout=0.1):
+            if self.should_stop:
+                return False
+        return True
+
+    def _submit_transfer(self, item: BatchItem, attempt: int = 1) -> None:
+        """Submit a file transfer to its size lane as soon as the lane has a free slot"""
+        large = item.size >= self.large_file_threshold
+        lane = self.large_lane if large else self.small_lane
+        if not self._acquire_slot(lane):
+            return
+        
+        future = lane.submit(self._transfer_item, item, attempt)
+        self.metrics.sample_queue('large_lane' if large else 'small_lane', lane.in_flight)
+        future.add_done_callback(lambda f: self._transfer_done(lane, item, attempt, f))
+
+    def _transfer_done(self, lane: _TransferLane, item: BatchItem, attempt: int, future) -> None:
+        """Record a finished transfer and release its lane slot"""
+        lane.slots.release()
+        if future.cancelled():
+            return
+        
+        try:
+            transferred = future.result()
+        except TransferCancelled:
+            return
+        except Exception as e:
+            self._file_failed(item, e, attempt)
+            return
+        if transferred is not None:  # None: it failed and is waiting for a retry
+            self._file_done(transferred)
+
+    def _retry_later(self, item: BatchItem, attempt: int, error: Exception) -> bool:
+        """Schedule another attempt at a file if its error may pass; False if it has failed for good"""
+        if self.should_stop or attempt >= self.max_retries or not is_transient(error):
+            return False
+        self.metrics.count('retries')
+        delay = self.retry_delay * 2 ** (attempt - 1)  # Exponential backoff
+        self.retries.schedule(delay, self._resubmit, item, attempt + 1)
+        return True
+
+    def _resubmit(self, item: BatchItem, attempt: int) -> None:
+        """Put a file whose backoff is over back in its lane (runs on the retry timer thread)"""
+        try:
+            self._submit_transfer(item, attempt)
+        except Exception as e:
+            self._file_failed(item, e, attempt)
+
+    def _wait_for_retries(self) -> None:
+        """Wait until no file is being transferred or waiting for a retry, as any running one may fail and be retried"""
+        while not self.should_stop:
+            with self.small_lane.lock, self.large_lane.lock:
+                running = self.small_lane.futures | self.large_lane.futures
+            if running:
+                wait(running, timeout=0.1)
+            elif not self.retries.pending:
+                return
+            else:
+                self.retries.wait_idle(timeout=0.1)
+
+    def _file_done(self, transferred: bool) -> None:
+        with self.progress_lock:
+            self.processed_count += 1
+            if not transferred:
+                self.skipped_count += 1
+        self._report(self.tracker.add_file())
+
+    def _file_failed(self, item: BatchItem, error: Exception, attempts: int) -> None:
+        with self.progress_lock:
+            self.failed_count += 1
+        self.metrics.count('failed')
+        if self.verify_report is not None:
+            self.verify_report.record_failed(self._dest_key(item.dst), str(error))
+        self._add_failure(item, error, attempts)
+
+    def _add_failure(self, item: BatchItem, error: Exception, attempts: int) -> None:
+        """Note a file or directory that failed, for the report at the end of the run"""
+        failure = FailedTransfer(
+            self._dest_key(item.dst), str(error), getattr(error, 'errno', None), is_transient(error), attempts
+        )
+        with self.progress_lock:
+            self.failures.append(failure)
+
+    def _add_to_pack(self, item: BatchItem) -> None:
+        """Hold a small file for the next tar stream, sending the stream off once it is full"""
+        self._pack.append(item)
+        self._pack_bytes += item.size
+        if len(self._pack) >= self.AGGREGATE_FILES or self._pack_bytes >= self.AGGREGATE_BYTES:
+            self._flush_pack()
+
+    def _flush_pack(self) -> None:
+        """Submit the held small files to the small-file lane as one tar stream"""
+        if not self._pack or not self._acquire_slot(self.small_lane):
+            return
+        items, self._pack, self._pack_bytes = self._pack, [], 0
+        settled = set()
+        future = self.small_lane.submit(self._transfer_pack, items, settled)
+        future.add_done_callback(lambda f: self._pack_done(items, settled, f))
+
+    def _pack_done(self, items: List[BatchItem], settled: Set[int], future) -> None:
+        """Release a tar stream's lane slot; files it left unaccounted for on an error have failed"""
+        self.small_lane.slots.release()
+        if future.cancelled():
+            return
+        try:
+            future.result()
+        except TransferCancelled:
+            return
+        except Exception as e:
+            for index, item in enumerate(items):
+                if index not in settled:
+                    self._file_failed(item, e, 1)
+
+    def _transfer_pack(self, items: List[BatchItem], settled: Set[int]) -> None:
+        """
+        Copy small files through one tar stream; any it doesn't carry are transferred one
+        by one. The index of each file accounted for, done, skipped or failed, goes in settled.
+        """
+        pending = []
+        for index, item in enumerate(items):
+            try:
+                skipped = self._check_skip(item)
+            except Exception:
+                skipped = None  # Checked again, and reported, when transferred on its own
+            if skipped is None:
+                pending.append(index)
+            else:
+                settled.add(index)
+                self._file_done(skipped)
+        if not pending:
+            return
+        
+        packed = 0
+        try:
+            members = self.tar_stream.members([items[index].src for index in pending], lambda: self.should_stop)
+            with closing(members):
+                for member in members:
+                    index = pending[member.index]
+                    self.file_limiter.acquire(1, lambda: self.should_stop)
+                    try:
+                        self._unpack_atomic(items[index], member)
+                    except OSError:
+                        continue  # Transferred on its own below
+                    settled.add(index)
+                    packed += 1
+                    self._add_bytes(len(member.data))
+                    self.bandwidth_limiter.acquire(len(member.data), lambda: self.should_stop)
+                    self._file_done(True)
+        except Exception as e:
+            # The files the stream didn't deliver are transferred on their own below
+            self.metrics.count('stream_errors')
+            logging.warning(f"Tar stream broke off after {packed} of {len(pending)} files: {e}")
+        self.metrics.count('packed', packed)
+        
+        for index in pending:
+            if index in settled:
+                continue
+            item = items[index]
+            if self.should_stop:
+                raise TransferCancelled(item.src)
+            try:
+                transferred = self._transfer_item(item)
+            except TransferCancelled:
+                raise
+            except Exception as e:
+                settled.add(index)
+                self._file_failed(item, e, 1)
+                continue
+            settled.add(index)
+            if transferred is not None:  # None: it failed and is waiting for a retry
+                self._file_done(transferred)
+
+    def _unpack_atomic(self, item: BatchItem, member: PackedFile) -> None:
+        """Write a file unpacked from a tar stream under a temporary name and rename it into place"""
+        part = item.dst + self.PART_SUFFIX
+        try:
+            unpack_member(member, part)
+        except BaseException:
+            if os.path.lexists(part):
+                os.remove(part)
+            raise
+        os.replace(part, item.dst)
+        if self.journal is not None:
+            self.journal.mark_complete(self._dest_key(item.dst), item.size, item.mtime_ns)
+        self._record_done(item)
+
+    def _report(self, snapshot) -> None:
+        """Emit a progress snapshot, if the tracker produced one"""
+        if snapshot is not None:
+            self.listener.on_progress(snapshot.percent)
+            self.listener.on_stats(snapshot)
+            self.metrics.emit(
+                bytes_done=snapshot.bytes_done, files_done=snapshot.files_done,
+                current_bps=snapshot.current_bps, transfer_queue=self.transfer_queue.qsize(),
+                small_lane=self.small_lane.in_flight, large_lane=self.large_lane.in_flight,
+                retries=self.metrics.counters.get('retries', 0)
+            )
+
+    def _transfer_item(self, item: BatchItem, attempt: int = 1) -> Optional[bool]:
+        """
+        Transfer one file, returning False if incremental mode found it unchanged,
+        or None if it failed and another attempt has been scheduled.
+        """
+        start = time.perf_counter()
+        try:
+            return self._transfer_or_skip(item)
+        except TransferCancelled:
+            raise
+        except Exception as e:
+            if self._retry_later(item, attempt, e):
+                return None
+            raise
+        finally:
+            self.metrics.record_latency(time.perf_counter() - start)
+
+    def _transfer_or_skip(self, item: BatchItem) -> bool:
+        skipped = self._check_skip(item)
+        if skipped is not None:
+            return skipped
+        
+        if self.dedup is not None:
+            self._transfer_deduplicated(item)
+        else:
+            self.transfer_file(item.src, item.dst)
+        self._record_done(item)
+        return True
+
+    def _check_skip(self, item: BatchItem) -> Optional[bool]:
+        """
+        Account for a file that needs no transfer: True if an interrupted earlier run
+        wrote it in full, False if incremental mode found it unchanged, None otherwise.
+        """
+        key = self._dest_key(item.dst)
+        if self.journal is not None and self.journal.is_complete(key, item.size, item.mtime_ns):
+            with self.progress_lock:
+                self.resumed_count += 1
+            self._report(self.tracker.add_bytes(item.size, moved=False))
+            self._record_done(item)
+            return True
+        if self.manifest is not None and self._is_unchanged(item):
+            self._report(self.tracker.add_bytes(item.size, moved=False))
+            return False
+        return None
+
+    def _record_done(self, item: BatchItem) -> None:
+        if self.manifest is not None:
+            self.manifest.record(self._dest_key(item.dst), item.size, item.mtime_ns)
+
+    def _transfer_deduplicated(self, item: BatchItem) -> None:
+        """Link to an identical file already written to the destination, or transfer it for others to link to"""
+        content, original = self.dedup.claim(item.src, item.size)
+        if original is not None and self._link_atomic(original, item):
+            return
+        
+        try:
+            self.transfer_file(item.src, item.dst)
+        except BaseException:
+            if content is not None:
+                self.dedup.release(content, None)
+            raise
+        if content is not None:
+            self.dedup.release(content, item.dst)
+
+    def _link_atomic(self, original: str, item: BatchItem) -> bool:
+        """Put a hardlink or reflink to original at item.dst; False if the filesystem won't allow it"""
+        part = item.dst + self.PART_SUFFIX
+        try:
+            if os.path.lexists(part):
+                os.remove(part)  # Left by an interrupted run
+            if self.dedup_mode == 'hardlink':
+                os.link(original, part)
+            else:
+                self.copy_engine.clone(original, part)
+                shutil.copystat(item.src, part)
+        except OSError:
+            return False
+        
+        os.replace(part, item.dst)
+        if self.journal is not None:
+            self.journal.mark_complete(self._dest_key(item.dst), item.size, item.mtime_ns)
+        self.dedup.record_link(item.size)
+        self._report(self.tracker.add_bytes(item.size, moved=False))
+        return True
+
+    def _dest_key(self, dst: str) -> str:
+        """Destination-relative path used as the key in the manifest and journal"""
+        if dst.startswith(self._dest_prefix):
+            key = dst[len(self._dest_prefix):]  # Scanned items; much cheaper than relpath
+        else:
+            key = os.path.relpath(dst, self.dest_dir)
+        return key.replace(os.sep, '/')
+
+    def _is_unchanged(self, item: BatchItem) -> bool:
+        """Decide from the manifest (or the destination, for files it doesn't know) whether to skip a file"""
+        key = self._dest_key(item.dst)
+        entry = self.manifest.get(key)
+        
+        if entry is not None:
+            if entry.size != item.size:
+                return False
+            if entry.mtime_ns == item.mtime_ns:
+                return True
+            # Same size, new mtime: only the content can tell
+            return self.compare_hashes and self._same_content(key, item, entry.digest)
+        
+        # Not in the manifest yet, e.g. copied before incremental mode was used
+        try:
+            dest_stat = os.stat(item.dst)
+        except FileNotFoundError:
+            return False
+        if dest_stat.st_size != item.size:
+            return False
+        if abs(dest_stat.st_mtime_ns - item.mtime_ns) <= self.MTIME_TOLERANCE_NS:
+            self.manifest.record(key, item.size, item.mtime_ns)
+            return True
+        return self.compare_hashes and self._same_content(key, item, None)
+
+    def _same_content(self, key: str, item: BatchItem, known_digest: Optional[str]) -> bool:
+        """Compare source content with the recorded digest, or with the destination file"""
+        digest = self.copy_engine.digest(item.src)
+        try:
+            expected = known_digest or self.copy_engine.digest(item.dst)
+        except FileNotFoundError:
+            return False
+        if digest != expected:
+            return False
+        self.manifest.record(key, item.size, item.mtime_ns, digest)
+        return True
+
+    def transfer_file(self, src: str, dst: str):
+        """One attempt at transferring a file; failed transfers are retried by rescheduling them"""
+        self.file_limiter.acquire(1, lambda: self.should_stop)
+        if self.operation == 'copy':
+            self._copy_atomic(src, dst)
+        else:  # move
+            self._move_atomic(src, dst)
+
+    def _copy_atomic(self, src: str, dst: str, journal_complete: bool = True) -> os.stat_result:
+        """
+        Copy to a temporary name next to dst and rename it into place once complete.
+        Returns the source's stat; with journal_complete False the caller marks the
+        file complete in the journal itself.
+        """
+        part = dst + self.PART_SUFFIX
+        key = self._dest_key(dst)
+        stat = os.stat(src)
+        hasher = hashlib.blake2b() if self.verify_pool is not None else None
+        # Large files keep their part file on failure, to continue from the last checkpoint
+        resumable = self.journal is not None and stat.st_size >= self.large_file_threshold
+        
+        try:
+            if resumable:
+                # Continue from, and checkpoint, offsets confirmed on disk
+                offset = self.journal.partial_offset(key, stat.st_size, stat.st_mtime_ns)
+                try:
+                    if os.path.getsize(part) < offset:
+                        offset = 0
+                except OSError:
+                    offset = 0
+                if offset:
+                    self._report(self.tracker.add_bytes(offset, moved=False))
+                
+                self.copy_engine.copy(
+                    src, part, offset,
+                    on_progress=self._add_bytes,
+                    on_checkpoint=lambda done: self.journal.mark_partial(key, stat.st_size, stat.st_mtime_ns, done),
+                    checkpoint_bytes=self.CHECKPOINT_BYTES,
+                    hasher=hasher
+                )
+            else:
+                self.copy_engine.copy(src, part, on_progress=self._add_bytes, hasher=hasher)
+            
+            shutil.copystat(src, part)
+            if hasher is not None:
+                self._verify_copy(key, part, stat.st_size, hasher.hexdigest())
+            os.replace(part, dst)
+        except BaseException:
+            if not resumable and os.path.lexists(part):
+                os.remove(part)  # No checkpoint to resume from
+            raise
+        if journal_complete and self.journal is not None:
+            self.journal.mark_complete(key, stat.st_size, stat.st_mtime_ns)
+        return stat
+
+    def _verify_copy(self, key: str, part: str, size: int, expected: str):
+        """Read a copy back in the verify pool and compare it with the digest taken while copying"""
+        actual = self.verify_pool.submit(read_back_digest, part, self.copy_engine.chunk_size).result()
+        if actual != expected:
+            self.verify_report.record_mismatch(key)
+            os.remove(part)  # A retry must not resume from corrupt data
+            raise VerificationError(f"{key}: the copy read back from the destination does not match the source")
+        self.verify_report.record_verified(key, size, actual)
+
+    def _add_bytes(self, count: int):
+        self._report(self.tracker.add_bytes(count))
+
+    def _move_atomic(self, src: str, dst: str):
+        """Rename within a filesystem; across devices copy atomically, then remove the source"""
+        try:
+            os.replace(src, dst)
+            self._report(self.tracker.add_bytes(os.stat(dst).st_size, moved=False))
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Only complete once the source is gone, or a resumed run would skip removing it
+            stat = self._copy_atomic(src, dst, journal_complete=False)
+            os.remove(src)
+            if self.journal is not None:
+                self.journal.mark_complete(self._dest_key(dst), stat.st_size, stat.st_mtime_ns)
+
+    def _put_item(self, item) -> bool:
+        """Put an item on the bounded transfer queue, giving up if the transfer is stopped"""
+        self.metrics.sample_queue('transfer_queue', self.transfer_queue.qsize())
+        while not self.should_stop:
+            try:
+                self.transfer_queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _scan_into_queue(self):
+        """Producer: feed scanned items into the transfer queue, refining the running total"""
+        self._thread_started()
+        try:
+            with self.metrics.phase('scan'):
+                for item in self._iter_items():
+                    self._add_to_total(item)
+                    if not self._put_item(item):
+                        return
+            self.listener.on_status(f"Scan complete, {self.total_items} files found")
+        except Exception as e:
+            self.scan_error = e
+        finally:
+            self.scan_complete = True
+            self._put_item(self._SCAN_DONE)
+
+    def _run_streaming(self) -> None:
+        """Consumer: transfer queued items while the scanner thread is still walking"""
+        scanner = threading.Thread(target=self._scan_into_queue, daemon=True)
+        scanner.start()
+        
+        try:
+            while not self.should_stop:
+                try:
+                    item = self.transfer_queue.get(timeout=0.1)
+                except Empty:
+                    continue
+                
+                # Take whatever is ready, up to a full batch, so copying never waits for the scan
+                batch = []
+                while item is not self._SCAN_DONE:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self.transfer_queue.get_nowait()
+                    except Empty:
+                        break
+                
+                if batch:
+                    self.process_batch(batch)
+                if item is self._SCAN_DONE:
+                    self._flush_pack()
+                    break
+                if self.small_lane.in_flight == 0:
+                    self._flush_pack()  # Don't let the lane idle while small files wait for a full stream
+        finally:
+            scanner.join()
+        
+        if self.scan_error is not None:
+            raise self.scan_error
+
+    def _run_batched(self) -> None:
+        """Scan the whole tree first, then transfer it batch by batch"""
+        with self.metrics.phase('scan'):
+            items = ItemStore(self._iter_items())
+        
+        # Count only files (not directories) for progress tracking
+        for item in items:
+            self._add_to_total(item)
+        self.scan_complete = True
+        
+        if self.total_items == 0:
+            return
+        
+        # Process items in batches
+        current_batch = []
+        for item in items:
+            if self.should_stop:
+                return
+            
+            current_batch.append(item)
+            
+            if len(current_batch) >= self.batch_size:
+                self.process_batch(current_batch)
+                current_batch = []
+        
+        # Process remaining items
+        if current_batch:
+            self.process_batch(current_batch)
+        self._flush_pack()
+
+    def run(self):
+        self.metrics = TransferMetrics()
+        if self.metrics_stream:
+            self.metrics.stream_to(self.metrics_stream)
+        if self.profiler is not None:
+            self.profiler.start()
+        if self.low_priority:
+            lower_thread_priority()
+        
+        try:
+            # Scan directory and transfer work items
+            self.listener.on_status("Scanning directory...")
+            
+            # Files finished by an interrupted run into this destination are not copied again
+            self.journal = TransferJournal(self.dest_dir, self.source_dir, self.operation)
+            if self.journal.resuming:
+                self.listener.on_status("Resuming previous transfer...")
+            if self.incremental:
+                self.manifest = TransferManifest(self.dest_dir)
+            if self.dedup_mode:
+                self.dedup = DedupIndex(self.copy_engine.digest)
+            if self.verify:
+                self.verify_report = VerifyReport(self.source_dir, self.dest_dir)
+                # Spawned rather than forked: this process runs other threads (Qt, the lanes)
+                self.verify_pool = ProcessPoolExecutor(
+                    max_workers=self.verify_workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=lower_thread_priority if self.low_priority else None
+                )
+            
+            # One pool per lane for the whole run; batches are not waited on individually
+            self.small_lane.start(self._thread_started)
+            self.large_lane.start(self._thread_started)
+            self.retries.start()
+            with self.metrics.phase('transfer'):
+                try:
+                    if self.streaming:
+                        self._run_streaming()
+                    else:
+                        self._run_batched()
+                    self._wait_for_retries()
+                finally:
+                    # Wait for in-flight transfers, dropping any not yet started if cancelled
+                    self.retries.shutdown()
+                    self.small_lane.shutdown(cancel=self.should_stop)
+                    self.large_lane.shutdown(cancel=self.should_stop)
+                    if self.verify_pool is not None:
+                        self.verify_pool.shutdown()
+                        self.verify_report.write(self.verify_report_path)
+                    if self.manifest is not None:
+                        self.manifest.close()
+                    self.journal.close()
+            
+            if self.should_stop:
+                return
+            
+            self._report(self.tracker.snapshot())
+            
+            # Before the journal goes, so a stale report doesn't keep the state directory
+            failure_summary = self._write_failure_report()
+            
+            # Nothing is left to resume once every file has made it across
+            if self.failed_count == 0:
+                self.journal.discard()
+            
+            if self.total_items == 0 and self.paths is None:
+                self.listener.on_error("No files to transfer after applying ignore patterns")
+                return
+            
+            if self.skipped_count:
+                self.listener.on_status(f"Skipped {self.skipped_count} unchanged files")
+            if self.resumed_count:
+                self.listener.on_status(f"{self.resumed_count} files were already transferred by a previous run")
+            if self.dedup is not None and self.dedup.linked_count:
+                self.listener.on_status(
+                    f"Linked {self.dedup.linked_count} duplicate files, "
+                    f"saving {format_bytes(self.dedup.bytes_saved)}"
+                )
+            if self.verify_report is not None:
+                self.listener.on_status(
+                    f"Verified {len(self.verify_report.verified)} files, "
+                    f"{len(self.verify_report.failed)} failed; report written to {self.verify_report_path}"
+                )
+            
+            # Clean up empty directories if this was a move operation
+            if self.operation == 'move':
+                self.listener.on_status("Cleaning up empty directories...")
+                with self.metrics.phase('cleanup'):
+                    self._remove_emptied_directories()
+            
+            self._finish_metrics()
+            # Last, right before on_finished, as a listener may treat an error as the end of the run
+            if failure_summary is not None:
+                self.listener.on_error(failure_summary)
+            self.listener.on_finished()
+            
+        except Exception as e:
+            self.listener.on_error(str(e))
+        finally:
+            if self.metrics_summary is None:
+                self._finish_metrics()
+    
+    def _write_failure_report(self) -> Optional[str]:
+        """Write every failure to the failure report; the error summing them up, or None if none failed"""
+        if not self.failures:
+            if os.path.exists(self.failure_report_path):
+                os.remove(self.failure_report_path)  # Left by an earlier run
+            return None
+        
+        os.makedirs(os.path.dirname(self.failure_report_path), exist_ok=True)
+        with open(self.failure_report_path, 'w') as f:
+            json.dump({
+                "source": self.source_dir,
+                "destination": self.dest_dir,
+                "failed": [failure.to_dict() for failure in self.failures],
+            }, f, indent=2)
+        
+        transient = sum(1 for failure in self.failures if failure.transient)
+        lines = [
+            f"{len(self.failures)} items could not be transferred "
+            f"({len(self.failures) - transient} permanent errors, "
+            f"{transient} still failing after {self.max_retries} attempts):"
+        ]
+        lines += [f"  {failure.path}: {failure.error}" for failure in self.failures[:self.FAILURES_LISTED]]
+        if len(self.failures) > self.FAILURES_LISTED:
+            lines.append(f"  ...and {len(self.failures) - self.FAILURES_LISTED} more")
+        lines.append(f"Full list in {self.failure_report_path}")
+        return "\n".join(lines)
+    
+    def set_bandwidth_limit(self, bytes_per_second: Optional[int]):
+        """Change the bandwidth limit, also while running; None or 0 removes it"""
+        self.bandwidth_limiter.set_rate(bytes_per_second)
+    
+    def set_files_per_second(self, files_per_second: Optional[float]):
+        """Change the file rate limit, also while running; None or 0 removes it"""
+        self.file_limiter.set_rate(files_per_second)
+    
+    def _thread_started(self):
+        """Initializer for the engine's threads"""
+        if self.low_priority:
+            lower_thread_priority()
+        if self.profiler is not None:
+            self.profiler.profile_thread()
+    
+    def _finish_metrics(self):
+        """Stop profiling, then build the metrics summary, write it out and pass it to the listener"""
+        try:
+            profile = self.profiler.stop() if self.profiler is not None else None
+            snapshot = self.tracker.snapshot()
+            transfer_seconds = self.metrics.phases.get('transfer') or None
+            self.metrics_summary = self.metrics.summary(
+                operation=self.operation,
+                cancelled=self.should_stop,
+                files={
+                    "total": self.total_items, "done": self.processed_count, "skipped": self.skipped_count,
+                    "resumed": self.resumed_count, "failed": self.failed_count,
+                    "linked": self.dedup.linked_count if self.dedup is not None else 0,
+                },
+                bytes={"total": snapshot.bytes_total, "done": snapshot.bytes_done},
+                retries=self.metrics.counters.get('retries', 0),
+                files_per_second=round(self.processed_count / transfer_seconds, 2) if transfer_seconds else None,
+                bytes_per_second=round(snapshot.bytes_done / transfer_seconds) if transfer_seconds else None,
+                profile=profile
+            )
+            self.metrics.close()
+            if self.metrics_path:
+                with open(self.metrics_path, 'w') as f:
+                    json.dump(self.metrics_summary, f, indent=2)
+            self.listener.on_metrics(self.metrics_summary)
+        except Exception as e:
+            self.metrics_summary = {}
+            self.listener.on_error(f"Could not write metrics: {e}")
+    
+    def _remove_emptied_directories(self):
+        """Remove source directories that files were moved out of, if nothing is left in them"""
+        # Scan order lists every directory before its subdirectories, so go backwards
+        for dir_path in reversed(self.emptied_dirs):
+            if dir_path == self.source_dir:
+                continue
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                continue
\ No newline at end of file
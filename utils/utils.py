@@ -1,3 +1,28 @@
-def load_stylesheet(filename):
+from functools import lru_cache
+
+STYLESHEET = "./styles/styles.qss"
+
+@lru_cache(maxsize=None)
+def load_stylesheet(filename: str = STYLESHEET) -> str:
+    """Contents of a stylesheet, read from disk once per process"""
     with open(filename, "r") as file:
-        return file.read()
\ No newline at end of file
+        return file.read()
+
+def format_bytes(size: float) -> str:
+    """Human readable size, e.g. 1.5 GB"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def format_duration(seconds: float) -> str:
+    """Compact duration, e.g. 1h 05m or 3m 20s"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
\ No newline at end of file
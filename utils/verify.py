@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+
+class VerificationError(Exception):
+    """Raised when a file read back from the destination does not match the source"""
+
+
+def read_back_digest(path: str, chunk_size: int) -> str:
+    """
+    Hash a file as stored on its device, for running in a worker process.
+
+    The file is flushed and dropped from the page cache first where the
+    platform allows it, so the bytes hashed come from the device rather than
+    from the copy still in memory.
+    """
+    with open(path, 'rb', buffering=0) as file:
+        fd = file.fileno()
+        try:
+            os.fsync(fd)
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass  # Best effort; hash whatever the OS returns
+
+        digest = hashlib.blake2b()
+        view = memoryview(bytearray(chunk_size))
+        while True:
+            read = file.readinto(view)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+class VerifyReport:
+    """
+    Outcome of verifying a transfer, written as JSON when the run ends.
+
+    Lists every verified file with its size, digest and the number of
+    attempts it took, and every file that failed with its last error.
+    Shared by the transfer threads behind a lock.
+    """
+    ALGORITHM = 'blake2b'
+
+    def __init__(self, source_dir: str, dest_dir: str):
+        self.source_dir = source_dir
+        self.dest_dir = dest_dir
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.verified = {}
+        self.failed = {}
+        self.mismatches = {}  # Failed comparisons per file, including ones fixed by a retry
+
+    def record_mismatch(self, key: str) -> None:
+        with self.lock:
+            self.mismatches[key] = self.mismatches.get(key, 0) + 1
+
+    def record_verified(self, key: str, size: int, digest: str) -> None:
+        with self.lock:
+            self.verified[key] = {
+                "size": size, "digest": digest, "attempts": self.mismatches.get(key, 0) + 1
+            }
+            self.failed.pop(key, None)
+
+    def record_failed(self, key: str, error: str) -> None:
+        with self.lock:
+            self.failed[key] = {"error": error, "mismatches": self.mismatches.get(key, 0)}
+
+    def write(self, path: str) -> None:
+        """Write the report atomically to path"""
+        with self.lock:
+            report = {
+                "source": self.source_dir,
+                "destination": self.dest_dir,
+                "algorithm": self.ALGORITHM,
+                "started": self.started,
+                "finished": time.time(),
+                "verified_count": len(self.verified),
+                "failed_count": len(self.failed),
+                "verified": [dict(path=key, **entry) for key, entry in sorted(self.verified.items())],
+                "failed": [dict(path=key, **entry) for key, entry in sorted(self.failed.items())],
+            }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        part = path + '.tmp'
+        with open(part, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(part, path)
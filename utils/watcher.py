@@ -0,0 +1,316 @@
+import os
+import time
+import threading
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from constants.constants import ProgressSnapshot, STATE_DIRNAME, WatchDefaults
+from utils.ignore_matcher import IgnoreMatcher
+from utils.transfer_engine import TransferEngine, TransferListener
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # Optional: without it the source is polled
+    Observer = None
+    FileSystemEventHandler = object
+
+BACKENDS = WatchDefaults.BACKENDS
+
+# Paths reported by a backend, with whether each is a directory
+Changes = Iterable[Tuple[str, bool]]
+
+
+class ChangeBatcher:
+    """
+    Collects changed paths and hands them out in batches.
+
+    A batch is released once no change has come in for ``debounce`` seconds,
+    or ``max_delay`` seconds after its first change if changes keep coming.
+    A path changed several times is in the batch once.
+    """
+
+    def __init__(self, debounce: float, max_delay: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            debounce (float): Seconds without changes that end a batch
+            max_delay (float): Most seconds a change waits for its batch
+            clock (Callable[[], float]): Monotonic time source, replaceable in tests
+        """
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._clock = clock
+        self._paths: Set[str] = set()
+        self._first = self._last = 0.0
+        self._changed = threading.Condition()
+
+    def add(self, paths: Iterable[str]) -> None:
+        with self._changed:
+            before = len(self._paths)
+            self._paths.update(paths)
+            if len(self._paths) == before:
+                return
+            now = self._clock()
+            if not before:
+                self._first = now
+            self._last = now
+            self._changed.notify_all()
+
+    def wake(self) -> None:
+        """Make a waiting take() look at should_stop again"""
+        with self._changed:
+            self._changed.notify_all()
+
+    def take(self, should_stop: Callable[[], bool]) -> Set[str]:
+        """Wait for the next batch; an empty set if should_stop said so first"""
+        with self._changed:
+            while not should_stop():
+                if not self._paths:
+                    self._changed.wait(0.5)
+                    continue
+                due = min(self._last + self.debounce, self._first + self.max_delay)
+                now = self._clock()
+                if now >= due:
+                    paths, self._paths = self._paths, set()
+                    return paths
+                self._changed.wait(min(due - now, 0.5))
+            return set()
+
+
+class _PollingBackend:
+    """Finds changed files by comparing listings of the source taken every few seconds"""
+
+    def __init__(self, source_dir: str, interval: float, skip: Callable[[str, bool], bool],
+                 on_changes: Callable[[Changes], None]):
+        self.source_dir = source_dir
+        self.interval = interval
+        self.skip = skip
+        self.on_changes = on_changes
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # The first listing is the baseline, so take it before anything can change unseen
+        baseline = self._snapshot()
+        self._thread = threading.Thread(target=self._poll, args=(baseline,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _poll(self, previous: Dict[str, Tuple[int, int]]):
+        while not self._stopped.wait(self.interval):
+            current = self._snapshot()
+            changed = [(path, False) for path, signature in current.items() if previous.get(path) != signature]
+            if changed:
+                self.on_changes(changed)
+            previous = current
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """(size, mtime_ns) of every file not ignored, by absolute path"""
+        files = {}
+        stack = [self.source_dir]
+        while stack and not self._stopped.is_set():
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if self.skip(entry.path, is_dir):
+                                continue
+                            if is_dir:
+                                stack.append(entry.path)
+                            else:
+                                stat = entry.stat()
+                                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                continue  # Removed or unreadable; it is picked up on a later poll
+        return files
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Turns watchdog events into changed paths; deletions are not passed on"""
+    CHANGES = ('created', 'modified', 'moved', 'closed')
+
+    def __init__(self, on_changes: Callable[[Changes], None]):
+        super().__init__()
+        self.on_changes = on_changes
+
+    def on_any_event(self, event):
+        if event.event_type not in self.CHANGES:
+            return
+        if event.is_directory and event.event_type == 'modified':
+            return  # Its entries changed, and they have events of their own
+        path = getattr(event, 'dest_path', None) or event.src_path
+        self.on_changes([(os.fsdecode(path), event.is_directory)])
+
+
+class _WatchdogBackend:
+    """Gets changes from the OS (inotify, FSEvents, ReadDirectoryChangesW) through watchdog"""
+
+    def __init__(self, source_dir: str, on_changes: Callable[[Changes], None]):
+        self.observer = Observer()
+        self.observer.schedule(_EventHandler(on_changes), source_dir, recursive=True)
+
+    def start(self):
+        self.observer.start()
+
+    def stop(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+class _BatchListener(TransferListener):
+    """Passes on the events of each batch's engine, except that the batch finished"""
+
+    def __init__(self, listener: TransferListener):
+        self.listener = listener
+
+    def on_progress(self, percent: int):
+        self.listener.on_progress(percent)
+
+    def on_stats(self, snapshot: ProgressSnapshot):
+        self.listener.on_stats(snapshot)
+
+    def on_status(self, message: str):
+        self.listener.on_status(message)
+
+    def on_error(self, message: str):
+        self.listener.on_error(message)
+
+    def on_metrics(self, summary: dict):
+        self.listener.on_metrics(summary)
+
+
+class MirrorWatcher(WatchDefaults):
+    """
+    Keeps a destination mirroring a source as the source changes.
+
+    Runs one incremental sync of the whole tree, then watches the source
+    (through watchdog if it is installed, else by polling) and copies only
+    the paths that changed, in debounced batches. Ignore patterns apply to
+    the changes as they would to a scan. Files deleted from the source are
+    left at the destination. Runs until should_stop is set.
+    """
+    def __init__(self, source_dir: str, dest_dir: str, ignore_patterns: Set[str], backend: str = 'auto',
+                 debounce: Optional[float] = None, max_delay: Optional[float] = None,
+                 poll_interval: Optional[float] = None,
+                 listener: Optional[TransferListener] = None, **options):
+        """
+        Args:
+            source_dir (str): Directory to watch
+            dest_dir (str): Directory kept in step with it
+            ignore_patterns (Set[str]): Set of patterns to ignore
+            backend (str): 'watchdog', 'poll', or 'auto' for watchdog when it is installed.
+                Defaults to 'auto'
+            debounce (Optional[float]): Seconds of quiet that end a batch; 0 sends every
+                change on at once. Defaults to DEBOUNCE
+            max_delay (Optional[float]): Most seconds a change waits for its batch.
+                Defaults to MAX_DELAY
+            poll_interval (Optional[float]): Seconds between listings when polling.
+                Defaults to POLL_INTERVAL
+            listener (Optional[TransferListener]): Receives every batch's progress, status and
+                errors. Like a cancelled transfer, watching only ends when stopped and
+                on_finished is not called
+            **options: Engine tunables, see TransferEngine; the engines always copy, incrementally
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Watch backend must be one of {', '.join(BACKENDS)}")
+        if backend == 'watchdog' and Observer is None:
+            raise ValueError("The watchdog backend needs the watchdog package")
+        self.source_dir = os.path.abspath(source_dir)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.ignore_patterns = ignore_patterns
+        self.backend_name = 'watchdog' if backend == 'watchdog' or (backend == 'auto' and Observer) else 'poll'
+        self.batcher = ChangeBatcher(
+            self.DEBOUNCE if debounce is None else debounce,
+            self.MAX_DELAY if max_delay is None else max_delay
+        )
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self.listener = listener or TransferListener()
+        self.options = options
+        self.options.pop('incremental', None)
+        self.engine: Optional[TransferEngine] = None
+        self.matcher: Optional[IgnoreMatcher] = None
+        self.batches = 0
+        self._should_stop = False
+        # The first engine checks the options, so mistakes surface here rather than in run()
+        self.engine = self._create_engine(None)
+
+    @property
+    def should_stop(self) -> bool:
+        return self._should_stop
+
+    @should_stop.setter
+    def should_stop(self, value: bool):
+        self._should_stop = value
+        if self.engine is not None:
+            self.engine.should_stop = value
+        self.batcher.wake()
+
+    def set_bandwidth_limit(self, bytes_per_second: Optional[int]):
+        """Change the bandwidth limit of this and later batches; None or 0 removes it"""
+        self.options['bandwidth_limit'] = bytes_per_second
+        if self.engine is not None:
+            self.engine.set_bandwidth_limit(bytes_per_second)
+
+    def _create_engine(self, paths: Optional[Set[str]]) -> TransferEngine:
+        return TransferEngine(
+            self.source_dir, self.dest_dir, self.ignore_patterns, 'copy',
+            incremental=True, paths=paths, listener=_BatchListener(self.listener), **self.options
+        )
+
+    def _skip(self, path: str, is_dir: bool) -> bool:
+        """Whether a change is of no interest: outside the source, ignored, or FilePorta's own"""
+        if path == self.dest_dir or path.startswith(os.path.join(self.dest_dir, '')):
+            return True  # The destination may be inside the source
+        rel_path = os.path.relpath(path, self.source_dir).replace(os.sep, '/')
+        if rel_path == '.' or rel_path.startswith('../'):
+            return True
+        if rel_path == STATE_DIRNAME or rel_path.startswith(STATE_DIRNAME + '/'):
+            return True
+        return self.matcher.matches(rel_path, is_dir)
+
+    def _on_changes(self, changes: Changes):
+        paths = [
+            os.path.relpath(path, self.source_dir).replace(os.sep, '/')
+            for path, is_dir in changes if not self._skip(path, is_dir)
+        ]
+        if paths:
+            self.batcher.add(paths)
+
+    def _start_backend(self):
+        if self.backend_name == 'watchdog':
+            backend = _WatchdogBackend(self.source_dir, self._on_changes)
+        else:
+            backend = _PollingBackend(self.source_dir, self.poll_interval, self._skip, self._on_changes)
+        backend.start()
+        return backend
+
+    def run(self):
+        self.matcher = self.engine.ignore_matcher
+        try:
+            # Watch from the start, so changes made during the initial sync are not missed
+            backend = self._start_backend()
+        except Exception as e:
+            self.listener.on_error(f"Could not watch {self.source_dir}: {e}")
+            return
+
+        try:
+            self.listener.on_status("Initial sync...")
+            self.engine.run()
+            while not self.should_stop:
+                self.listener.on_status(f"Watching {self.source_dir} for changes ({self.backend_name})...")
+                paths = self.batcher.take(lambda: self.should_stop)
+                if not paths:
+                    continue
+                self.batches += 1
+                self.listener.on_status(f"Copying {len(paths)} changed paths...")
+                self.engine = self._create_engine(paths)
+                self.engine.should_stop = self.should_stop
+                self.engine.run()
+        finally:
+            backend.stop()